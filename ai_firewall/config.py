@@ -1,8 +1,23 @@
 """Configuration for AI Firewall proxy."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+
+@dataclass
+class UpstreamBackendConfig:
+    """A single Azure OpenAI endpoint/deployment the proxy may route to."""
+
+    endpoint: str
+    deployment: str
+    api_key: str
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.endpoint.rstrip('/')}/{self.deployment}"
 
 
 @dataclass
@@ -18,3 +33,71 @@ class FirewallConfig:
     enable_logging: bool = True
     sentinel_workspace_id: Optional[str] = None
     sentinel_shared_key: Optional[str] = None
+    sentinel_endpoint: Optional[str] = None
+    backends: List[UpstreamBackendConfig] = field(default_factory=list)
+    routing_strategy: str = "least_outstanding"
+    max_upstream_attempts: int = 3
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    upstream_timeout: float = 60.0
+    api_version: str = "2023-05-15"
+    jailbreak_patterns: List[str] = field(default_factory=list)
+    sensitive_keywords: Optional[List[str]] = None
+    deobfuscation_enabled: bool = True
+    deobfuscation_max_candidates: int = 32
+    deobfuscation_max_bytes: int = 16 * 1024
+    deobfuscation_time_budget_ms: float = 2.0
+    telemetry_sinks: List[str] = field(default_factory=lambda: ["stdout"])
+    telemetry_file: Optional[str] = None
+    telemetry_compress: bool = False
+    telemetry_buffer_size: int = 10_000
+    telemetry_batch_size: int = 500
+    telemetry_flush_interval: float = 1.0
+    telemetry_overflow: str = "drop_oldest"
+    expose_server_timing: bool = False
+    enable_output_scanning: bool = False
+    tenant_header: str = "x-tenant-id"
+    response_cache_enabled: bool = False
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    response_cache_ttl: float = 300.0
+    response_cache_dir: Optional[str] = None
+    response_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+
+    def resolved_backends(self) -> List[UpstreamBackendConfig]:
+        """Return the backend pool, falling back to the single primary deployment."""
+        if self.backends:
+            return list(self.backends)
+        return [
+            UpstreamBackendConfig(
+                endpoint=self.azure_openai_endpoint,
+                deployment=self.azure_openai_deployment,
+                api_key=self.api_key,
+                name="primary",
+            )
+        ]
+
+
+def parse_backends(raw: str, default_api_key: str) -> List[UpstreamBackendConfig]:
+    """Parse a JSON list of backend definitions (e.g. ``AZURE_OPENAI_BACKENDS``)."""
+    payload: Any = json.loads(raw) if raw.strip() else []
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise ValueError("Backend definitions must be a JSON list of objects")
+
+    backends: List[UpstreamBackendConfig] = []
+    for entry in payload:
+        if not isinstance(entry, dict):
+            raise ValueError("Backend definitions must be a JSON list of objects")
+        for key in ("endpoint", "deployment"):
+            if not entry.get(key):
+                raise ValueError(f"Backend definition missing required field: {key}")
+        backends.append(
+            UpstreamBackendConfig(
+                endpoint=str(entry["endpoint"]).rstrip("/"),
+                deployment=str(entry["deployment"]),
+                api_key=str(entry.get("api_key") or default_api_key),
+                name=entry.get("name"),
+            )
+        )
+    return backends
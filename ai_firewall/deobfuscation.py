@@ -0,0 +1,161 @@
+"""Bounded-cost decoding of obfuscated runs (base64, hex, URL, confusables) in prompts."""
+from __future__ import annotations
+
+import base64
+import binascii
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from urllib.parse import unquote_to_bytes
+
+# One alternation, one pass. Every branch is anchored on a fixed character class or
+# a literal '%' with bounded gaps, so the scan stays linear on adversarial input.
+# Base64 runs must contain a digit, a symbol or a lower-to-upper case change, so long
+# plain words ("internationalization") are not spent against the candidate budget.
+_CANDIDATES = re.compile(
+    r"(?P<hex>(?<![A-Za-z0-9+/])(?:[0-9A-Fa-f]{2}){8,}(?![A-Za-z0-9+/=]))"
+    r"|(?P<base64>(?<![A-Za-z0-9+/_-])(?=[A-Za-z0-9+/_-]*?(?:[0-9+/_-]|[a-z][A-Z]))"
+    r"[A-Za-z0-9+/_-]{16,}={0,2})"
+    r"|(?P<url>%[0-9A-Fa-f]{2}(?:[^\s%]{0,16}%[0-9A-Fa-f]{2}){2,}[^\s%]{0,16})"
+)
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "​‌‍⁠﻿­"), None)
+
+# Latin look-alikes from Cyrillic and Greek that NFKC leaves untouched.
+_CONFUSABLES = str.maketrans(
+    "аеорсухіјѕԁɡһӏАВЕКМНОРСТХУαοντικρΑΒΕΖΗΙΚΜΝΟΡΤΥΧ",
+    "aeopcyxijsdghlABEKMHOPCTXYaovtikpABEZHIKMNOPTYX",
+)
+
+
+def _printable_text(raw: bytes) -> str | None:
+    """Return decoded bytes as text if they look like natural language, else None."""
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if not text:
+        return None
+    printable = sum(1 for char in text if char.isprintable() or char in "\n\r\t")
+    return text if printable / len(text) >= 0.9 else None
+
+
+def _decode(kind: str, token: str) -> str | None:
+    try:
+        if kind == "hex":
+            return _printable_text(binascii.unhexlify(token))
+        if kind == "base64":
+            padded = token.rstrip("=")
+            padded += "=" * (-len(padded) % 4)
+            altchars = b"-_" if ("-" in token or "_" in token) else None
+            return _printable_text(base64.b64decode(padded, altchars=altchars, validate=True))
+        if kind == "url":
+            return _printable_text(unquote_to_bytes(token))
+    except (binascii.Error, ValueError):
+        return None
+    return None
+
+
+@dataclass
+class DeobfuscationResult:
+    """Decoded fragments plus rewritten views of the prompt with fragments decoded in place."""
+
+    decoded: List[Tuple[str, str]] = field(default_factory=list)
+    views: List[str] = field(default_factory=list)
+    candidates: int = 0
+    bytes_decoded: int = 0
+    elapsed_ms: float = 0.0
+    budget_exhausted: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "decoded": len(self.decoded),
+            "encodings": sorted({encoding for encoding, _ in self.decoded}),
+            "candidates": self.candidates,
+            "bytes_decoded": self.bytes_decoded,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+
+class Deobfuscator:
+    """Find and decode obfuscated runs under strict per-request budgets.
+
+    Work is capped three ways: the number of candidate runs examined, the total
+    bytes fed to decoders, and wall-clock time. Each pass rewrites the text with
+    its decoded runs substituted in place, so patterns that straddle encoded and
+    plain text still match; the rewritten view is rescanned up to ``max_depth``
+    times (e.g. URL-encoded base64) against the same budgets.
+    """
+
+    def __init__(
+        self,
+        max_candidates: int = 32,
+        max_decoded_bytes: int = 16 * 1024,
+        time_budget_ms: float = 2.0,
+        max_depth: int = 2,
+    ) -> None:
+        if max_candidates <= 0 or max_decoded_bytes <= 0 or time_budget_ms <= 0 or max_depth <= 0:
+            raise ValueError("Deobfuscation budgets must be greater than 0")
+        self.max_candidates = max_candidates
+        self.max_decoded_bytes = max_decoded_bytes
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = max_depth
+
+    def scan(self, content: str) -> DeobfuscationResult:
+        result = DeobfuscationResult()
+        started = time.perf_counter()
+        deadline = started + self.time_budget_ms / 1000.0
+        text = content
+
+        if not content.isascii():
+            # Normalisation is a linear transform like the scan itself, so it is
+            # not charged against the decode budget.
+            normalized = (
+                unicodedata.normalize("NFKC", content)
+                .translate(_ZERO_WIDTH)
+                .translate(_CONFUSABLES)
+            )
+            if normalized != content:
+                result.decoded.append(("unicode", normalized))
+                result.views.append(normalized)
+                text = normalized
+
+        for _ in range(self.max_depth):
+            pieces: List[str] = []
+            cursor = 0
+            for match in _CANDIDATES.finditer(text):
+                if (
+                    result.candidates >= self.max_candidates
+                    or result.bytes_decoded >= self.max_decoded_bytes
+                    or time.perf_counter() > deadline
+                ):
+                    result.budget_exhausted = True
+                    break
+                token = match.group(0)
+                if len(token) > self.max_decoded_bytes - result.bytes_decoded:
+                    # Skip the oversize run rather than stopping: padding one huge
+                    # token in front must not hide the smaller runs behind it.
+                    result.budget_exhausted = True
+                    continue
+                result.candidates += 1
+                result.bytes_decoded += len(token)
+                decoded = _decode(match.lastgroup or "", token)
+                if decoded is None or decoded == token:
+                    continue
+                result.decoded.append((match.lastgroup or "", decoded))
+                pieces.append(text[cursor : match.start()])
+                pieces.append(decoded)
+                cursor = match.end()
+            if not pieces:
+                break
+            pieces.append(text[cursor:])
+            text = "".join(pieces)
+            result.views.append(text)
+            if result.budget_exhausted:
+                break
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
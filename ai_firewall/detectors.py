@@ -3,67 +3,124 @@ from __future__ import annotations
 
 import asyncio
 import re
-from dataclasses import dataclass
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
 
 try:
     from presidio_analyzer import AnalyzerEngine
 except ImportError:  # pragma: no cover - optional dependency
     AnalyzerEngine = None  # type: ignore
 
-JAILBREAK_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in [
-        r"ignore (all|any) previous instructions",
-        r"disregard your (policy|policies)",
-        r"disregard (?:all )?(?:rules|policies|instructions)",
-        r"system prompt",
-        r"now you are (?:allowed|permitted)",
-        r"<\/?system>",
-    ]
+from performance.caching import TieredCache, default_key, memoize
+
+from .deobfuscation import Deobfuscator
+
+DEFAULT_JAILBREAK_PATTERNS = [
+    r"ignore (all|any) previous instructions",
+    r"disregard your (policy|policies)",
+    r"disregard (?:all )?(?:rules|policies|instructions)",
+    r"system prompt",
+    r"now you are (?:allowed|permitted)",
+    r"<\/?system>",
 ]
 
+JAILBREAK_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in DEFAULT_JAILBREAK_PATTERNS]
+
+
+@memoize(max_entries=64)
+def _compile_alternation(sources: Tuple[str, ...]) -> Pattern[str]:
+    # Memoized so reloads with unchanged pattern lists reuse the compiled matcher.
+    return re.compile("|".join(sources), re.IGNORECASE)
+
+
+def compile_pattern_set(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+    """Fold a pattern list into one alternation so content is scanned once, not per pattern."""
+    sources = tuple(f"(?:{pattern})" for pattern in patterns if pattern)
+    if not sources:
+        return None
+    return _compile_alternation(sources)
+
+
+def compile_keyword_set(keywords: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compile literal keywords into a single case-insensitive substring matcher."""
+    ordered = sorted({keyword.lower() for keyword in keywords if keyword}, key=len, reverse=True)
+    if not ordered:
+        return None
+    return _compile_alternation(tuple(re.escape(keyword) for keyword in ordered))
+
 
 @dataclass
 class DetectionResult:
     detected: bool
     confidence: float
     reasons: List[str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 
 class PromptInjectionDetector:
     """Composite detector for common prompt injection & jailbreak patterns."""
 
-    def __init__(self) -> None:
-        self._pii_analyzer = AnalyzerEngine() if AnalyzerEngine is not None else None
+    def __init__(
+        self,
+        patterns: Optional[Iterable[str]] = None,
+        pii_analyzer: Any = None,
+        enable_pii: bool = True,
+        deobfuscator: Optional[Deobfuscator] = None,
+        enable_deobfuscation: bool = True,
+        pii_cache: Optional[TieredCache] = None,
+    ) -> None:
+        self.patterns = list(DEFAULT_JAILBREAK_PATTERNS if patterns is None else patterns)
+        self._matcher = compile_pattern_set(self.patterns)
+        if not enable_deobfuscation:
+            self._deobfuscator = None
+        else:
+            self._deobfuscator = deobfuscator if deobfuscator is not None else Deobfuscator()
+        if not enable_pii:
+            self._pii_analyzer = None
+        elif pii_analyzer is not None:
+            self._pii_analyzer = pii_analyzer
+        else:
+            self._pii_analyzer = AnalyzerEngine() if AnalyzerEngine is not None else None
+        # Analysis results stay in process memory only: prompt text never reaches disk.
+        self._pii_cache = (
+            pii_cache if pii_cache is not None else TieredCache(max_entries=4096, ttl=3600.0)
+        )
 
     async def detect(self, content: str) -> DetectionResult:
         if not content:
             return DetectionResult(False, 0.0, [])
-        
+
         reasons: List[str] = []
         confidence = 0.0
+        metadata: Dict[str, Any] = {}
 
-        if any(pattern.search(content) for pattern in JAILBREAK_PATTERNS):
+        if self._matcher is not None and self._matcher.search(content):
             reasons.append("Matched known jailbreak pattern")
             confidence = max(confidence, 0.8)
+        elif self._matcher is not None and self._deobfuscator is not None:
+            decoded = self._deobfuscator.scan(content)
+            metadata["deobfuscation"] = decoded.as_dict()
+            if any(self._matcher.search(view) for view in decoded.views):
+                encodings = ", ".join(sorted({encoding for encoding, _ in decoded.decoded}))
+                reasons.append(f"Matched jailbreak pattern in decoded content ({encodings})")
+                confidence = max(confidence, 0.85)
 
         if "base64" in content.lower() and "system" in content.lower():
             reasons.append("Potential obfuscated system prompt request")
             confidence = max(confidence, 0.6)
 
         if self._pii_analyzer:
-            pii_entities = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self._pii_analyzer.analyze,
-                content,
-                "en",
+            pii_entities = await self._pii_cache.aget_or_compute(
+                default_key((content,), {}),
+                lambda: asyncio.get_running_loop().run_in_executor(
+                    None, self._pii_analyzer.analyze, content, "en"
+                ),
             )
             if pii_entities:
                 reasons.append("Detected potential PII in request")
                 confidence = max(confidence, 0.7)
 
-        return DetectionResult(bool(reasons), confidence, reasons)
+        return DetectionResult(bool(reasons), confidence, reasons, metadata)
 
 
 class DataExfiltrationDetector:
@@ -73,10 +130,18 @@ class DataExfiltrationDetector:
         "internal", "confidential", "secret", "classified", "proprietary"
     ]
 
+    def __init__(self, keywords: Optional[Iterable[str]] = None) -> None:
+        self.keywords = [
+            keyword.lower()
+            for keyword in (self.SENSITIVE_KEYWORDS if keywords is None else keywords)
+        ]
+        self._matcher = compile_keyword_set(self.keywords)
+
     async def detect(self, content: str) -> DetectionResult:
-        if not content:
+        if not content or self._matcher is None:
             return DetectionResult(False, 0.0, [])
-        
-        matches = [keyword for keyword in self.SENSITIVE_KEYWORDS if keyword in content.lower()]
+
+        found = {match.group(0).lower() for match in self._matcher.finditer(content)}
+        matches = [keyword for keyword in self.keywords if keyword in found]
         confidence = min(0.5 + 0.1 * len(matches), 0.95) if matches else 0.0
         return DetectionResult(bool(matches), confidence, matches)
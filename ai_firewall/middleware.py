@@ -3,10 +3,13 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
 
 from fastapi import HTTPException, Request
 
+from .telemetry import TelemetryPipeline, make_event
+
 
 class RateLimiter:
     """Very small in-memory token bucket suitable for demo usage."""
@@ -24,20 +27,57 @@ class RateLimiter:
             now = time.time()
             last = self._timestamps.get(key, now)
             elapsed = now - last
-            
+
             # Refill tokens based on time elapsed
             refill_amount = (elapsed / 60.0) * self.max_per_minute
             current_tokens = self._tokens.get(key, self.max_per_minute)
             tokens = min(self.max_per_minute, current_tokens + refill_amount)
-            
+
             if tokens < 1.0:
                 raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            
+
             self._tokens[key] = tokens - 1.0
             self._timestamps[key] = now
 
 
-async def log_request(request: Request, metadata: dict[str, str]) -> None:
+class StageTimer:
+    """Accumulate per-stage durations for the ``Server-Timing`` response header."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def header(self) -> str:
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()
+        )
+
+
+async def log_request(
+    request: Request,
+    metadata: dict[str, str],
+    telemetry: Optional[TelemetryPipeline] = None,
+) -> None:
     # Don't try to read request body as it may already be consumed
     # Just log basic request info
-    print("[AI-FIREWALL]", request.method, request.url.path, metadata)
+    if telemetry is None:
+        print("[AI-FIREWALL]", request.method, request.url.path, metadata)
+        return
+    # Only enqueue here; the pipeline's background task does the I/O. Under the
+    # ``backpressure`` policy this waits for buffer space instead of dropping.
+    await telemetry.put(
+        make_event(
+            "request",
+            method=request.method,
+            path=request.url.path,
+            client=request.client.host if request.client else None,
+            **metadata,
+        )
+    )
@@ -0,0 +1,221 @@
+"""Opt-in response cache for deterministic chat completions."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Request fields that do not change the completion and are left out of the key.
+_NON_SEMANTIC_FIELDS = frozenset({"user", "stream_options"})
+
+
+def is_cacheable(payload: Dict[str, Any]) -> bool:
+    """Only explicit ``temperature: 0``, single-choice, non-streaming requests are deterministic."""
+    temperature = payload.get("temperature")
+    return (
+        isinstance(temperature, (int, float))
+        and not isinstance(temperature, bool)
+        and temperature == 0
+        and not payload.get("stream")
+        and payload.get("n", 1) == 1
+    )
+
+
+def parse_cache_control(header: Optional[str]) -> Tuple[bool, bool]:
+    """Return ``(lookup, store)`` for a request ``Cache-Control`` header."""
+    directives = {part.strip().lower() for part in (header or "").split(",") if part.strip()}
+    no_store = "no-store" in directives
+    no_cache = "no-cache" in directives or no_store
+    return not no_cache, not no_store
+
+
+def cache_key(
+    payload: Dict[str, Any], tenant: str, deployments: Iterable[str], credential: str
+) -> str:
+    """Hash the canonicalised payload together with caller, tenant and deployment identity.
+
+    The tenant header is client-supplied, so the caller's credential (its
+    ``Authorization`` header) is part of the key: a caller can only ever read
+    entries that were stored under the same credential.
+    """
+    canonical = json.dumps(
+        {
+            "credential": hashlib.sha256(credential.encode("utf-8")).hexdigest(),
+            "tenant": tenant,
+            "deployments": sorted(set(deployments)),
+            "payload": {k: v for k, v in payload.items() if k not in _NON_SEMANTIC_FIELDS},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """One file per entry, written atomically; LRU by access time within a byte budget."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        entries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in entries:
+            self._sizes[path.stem] = path.stat().st_size
+        self.bytes = sum(self._sizes.values())
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str, now: float) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            try:
+                raw = self._path(key).read_bytes()
+                header, _, body = raw.partition(b"\n")
+                expires_at = float(header)
+            except (OSError, ValueError):
+                self._delete(key)
+                return None
+            if expires_at < now:
+                self._delete(key)
+                return None
+            self._sizes.move_to_end(key)
+            return expires_at, body
+
+    def put(self, key: str, body: bytes, expires_at: float) -> None:
+        data = f"{expires_at}\n".encode("ascii") + body
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            os.replace(tmp, path)
+            self._forget(key)
+            self._sizes[key] = len(data)
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes and self._sizes:
+                self._delete(next(iter(self._sizes)))
+                self.evictions += 1
+
+    def _delete(self, key: str) -> None:
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _forget(self, key: str) -> None:
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self.bytes -= size
+
+
+class ResponseCache:
+    """Two-tier (memory, optional disk) TTL + LRU cache bounded by bytes."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300.0,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0")
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.memory_bytes = 0
+        self._disk = _DiskTier(disk_dir, disk_max_bytes) if disk_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    def _store_memory(self, key: str, expires_at: float, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        self._drop_memory(key)
+        self._entries[key] = (expires_at, body)
+        self.memory_bytes += len(body)
+        while self.memory_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= len(entry[1])
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_served += len(entry[1])
+                return json.loads(entry[1])
+            self._drop_memory(key)
+
+        if self._disk is not None:
+            stored = await asyncio.to_thread(self._disk.get, key, now)
+            if stored is not None:
+                expires_at, body = stored
+                self.hits += 1
+                self.disk_hits += 1
+                self.bytes_served += len(body)
+                self._store_memory(key, expires_at, body)
+                return json.loads(body)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        body = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        expires_at = self._clock() + self.ttl
+        self._store_memory(key, expires_at, body)
+        self.stores += 1
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, body, expires_at)
+
+    def record_bypass(self) -> None:
+        self.bypasses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "memory_bytes": self.memory_bytes,
+            "max_bytes": self.max_bytes,
+            "bytes_served": self.bytes_served,
+            "disk_bytes": self._disk.bytes if self._disk else 0,
+            "disk_evictions": self._disk.evictions if self._disk else 0,
+        }
@@ -0,0 +1,367 @@
+"""Runtime configuration resolution and hot reload for the firewall."""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import re
+import signal
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Set
+
+from .config import FirewallConfig, parse_backends
+from .deobfuscation import Deobfuscator
+from .detectors import DEFAULT_JAILBREAK_PATTERNS, DataExfiltrationDetector, PromptInjectionDetector
+from .middleware import RateLimiter
+from .response_cache import ResponseCache
+from .telemetry import OVERFLOW_POLICIES, TelemetryPipeline, build_sinks
+from .upstream import UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+_CONFIG_FIELDS = {f.name for f in dataclasses.fields(FirewallConfig)}
+
+
+def _read_config_file(path: Path) -> Dict[str, Any]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in {".yaml", ".yml"}:
+        try:
+            import yaml  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("Install PyYAML to load YAML firewall configuration") from exc
+        payload = yaml.safe_load(text) or {}
+    else:
+        payload = json.loads(text) if text.strip() else {}
+    if not isinstance(payload, dict):
+        raise ValueError(f"Firewall configuration file must contain a mapping: {path}")
+    return payload
+
+
+def load_config(
+    config_file: Optional[Path] = None,
+    environ: Optional[Mapping[str, str]] = None,
+) -> FirewallConfig:
+    """Resolve configuration from the environment, overlaid with an optional config file."""
+    env = os.environ if environ is None else environ
+    values: Dict[str, Any] = {}
+    for env_key, field_name in (
+        ("AZURE_OPENAI_ENDPOINT", "azure_openai_endpoint"),
+        ("AZURE_OPENAI_DEPLOYMENT", "azure_openai_deployment"),
+        ("AZURE_OPENAI_API_KEY", "api_key"),
+        ("UPSTREAM_ROUTING", "routing_strategy"),
+        ("SENTINEL_WORKSPACE_ID", "sentinel_workspace_id"),
+        ("SENTINEL_SHARED_KEY", "sentinel_shared_key"),
+        ("SENTINEL_ENDPOINT", "sentinel_endpoint"),
+        ("TELEMETRY_FILE", "telemetry_file"),
+        ("TELEMETRY_OVERFLOW", "telemetry_overflow"),
+        ("RESPONSE_CACHE_DIR", "response_cache_dir"),
+    ):
+        if env.get(env_key):
+            values[field_name] = env[env_key]
+    if env.get("TELEMETRY_SINKS"):
+        values["telemetry_sinks"] = [
+            sink.strip() for sink in env["TELEMETRY_SINKS"].split(",") if sink.strip()
+        ]
+    for env_key, field_name in (
+        ("FIREWALL_SERVER_TIMING", "expose_server_timing"),
+        ("FIREWALL_OUTPUT_SCANNING", "enable_output_scanning"),
+        ("RESPONSE_CACHE", "response_cache_enabled"),
+        ("FIREWALL_DEOBFUSCATION", "deobfuscation_enabled"),
+    ):
+        if env.get(env_key):
+            values[field_name] = env[env_key].lower() in {"1", "true", "yes"}
+    if env.get("RATE_LIMIT"):
+        values["rate_limit_per_minute"] = int(env["RATE_LIMIT"])
+
+    file_values: Dict[str, Any] = _read_config_file(config_file) if config_file else {}
+    unknown = set(file_values) - _CONFIG_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown firewall configuration keys: {sorted(unknown)}")
+    values.update({key: value for key, value in file_values.items() if key != "backends"})
+
+    api_key = values.get("api_key", "")
+    if "backends" in file_values:
+        backends = parse_backends(json.dumps(file_values["backends"]), api_key)
+    else:
+        backends = parse_backends(env.get("AZURE_OPENAI_BACKENDS", ""), api_key)
+    if backends:
+        values.setdefault("azure_openai_endpoint", backends[0].endpoint)
+        values.setdefault("azure_openai_deployment", backends[0].deployment)
+    values["backends"] = backends
+
+    for required, env_key in (
+        ("azure_openai_endpoint", "AZURE_OPENAI_ENDPOINT"),
+        ("azure_openai_deployment", "AZURE_OPENAI_DEPLOYMENT"),
+        ("api_key", "AZURE_OPENAI_API_KEY"),
+    ):
+        if not values.get(required):
+            raise RuntimeError(f"Missing configuration: '{env_key}'")
+    if int(values.get("rate_limit_per_minute", 60)) <= 0:
+        raise ValueError("rate_limit_per_minute must be greater than 0")
+    if values.get("telemetry_overflow", "drop_oldest") not in OVERFLOW_POLICIES:
+        raise ValueError(f"Unsupported telemetry overflow policy: {values['telemetry_overflow']}")
+    for size_key in ("telemetry_buffer_size", "telemetry_batch_size"):
+        if int(values.get(size_key, 1)) <= 0:
+            raise ValueError(f"{size_key} must be greater than 0")
+    return FirewallConfig(**values)
+
+
+def _pool_key(config: FirewallConfig) -> tuple:
+    return (
+        tuple((b.endpoint, b.deployment, b.api_key, b.label) for b in config.resolved_backends()),
+        config.routing_strategy,
+        config.max_upstream_attempts,
+        config.circuit_failure_threshold,
+        config.circuit_reset_seconds,
+        config.api_version,
+        config.upstream_timeout,
+    )
+
+
+def _cache_key(config: FirewallConfig) -> tuple:
+    return (
+        config.response_cache_enabled,
+        config.response_cache_max_bytes,
+        config.response_cache_ttl,
+        config.response_cache_dir,
+        config.response_cache_disk_max_bytes,
+    )
+
+
+def _telemetry_key(config: FirewallConfig) -> tuple:
+    return (
+        config.enable_logging,
+        tuple(config.telemetry_sinks),
+        config.telemetry_file,
+        config.telemetry_compress,
+        config.sentinel_workspace_id,
+        config.sentinel_shared_key,
+        config.sentinel_endpoint,
+    )
+
+
+class RuntimeState:
+    """Snapshot of everything a request needs, built once per (re)load."""
+
+    def __init__(
+        self,
+        config: FirewallConfig,
+        generation: int,
+        rate_limiter: RateLimiter,
+        detector: PromptInjectionDetector,
+        exfil_detector: DataExfiltrationDetector,
+        pool: UpstreamPool,
+        telemetry: TelemetryPipeline,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.config = config
+        self.generation = generation
+        self.rate_limiter = rate_limiter
+        self.detector = detector
+        self.exfil_detector = exfil_detector
+        self.pool = pool
+        self.telemetry = telemetry
+        self.response_cache = response_cache
+
+
+class FirewallRuntime:
+    """Owns the active :class:`RuntimeState` and swaps it atomically on reload.
+
+    Requests pin the snapshot they started with, so a reload never changes
+    configuration mid-request. Resources that a reload replaces (such as the
+    upstream HTTP pool) are closed once the last request pinned to them drains.
+    A pool is shared by every snapshot built while its settings were unchanged,
+    so pinned requests are counted per pool rather than per snapshot.
+    """
+
+    def __init__(
+        self,
+        config_file: Optional[Path] = None,
+        environ: Optional[Mapping[str, str]] = None,
+        pool_client: Any = None,
+    ) -> None:
+        env = os.environ if environ is None else environ
+        if config_file is None and env.get("FIREWALL_CONFIG_FILE"):
+            config_file = Path(env["FIREWALL_CONFIG_FILE"])
+        self.config_file = config_file
+        self._environ = environ
+        self._pool_client = pool_client
+        self._state: Optional[RuntimeState] = None
+        self._pool_users: Dict[UpstreamPool, int] = {}
+        self._retired_pools: Set[UpstreamPool] = set()
+        self._telemetry_key: Optional[tuple] = None
+        self.telemetry: Optional[TelemetryPipeline] = None
+        self._reload_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._config_mtime: Optional[float] = None
+        self.reload_count = 0
+        self.last_reload_error: Optional[str] = None
+
+    @property
+    def state(self) -> RuntimeState:
+        if self._state is None:
+            config = load_config(self.config_file, self._environ)
+            self.telemetry = TelemetryPipeline.from_config(config)
+            self._telemetry_key = _telemetry_key(config)
+            self._state = self._build(config)
+        return self._state
+
+    @property
+    def config(self) -> FirewallConfig:
+        return self.state.config
+
+    def _build(self, config: FirewallConfig) -> RuntimeState:
+        previous = self._state
+        # Compile patterns before touching any live state so a bad reload leaves it intact.
+        detector = PromptInjectionDetector(
+            patterns=[*DEFAULT_JAILBREAK_PATTERNS, *config.jailbreak_patterns],
+            pii_analyzer=previous.detector._pii_analyzer if previous else None,
+            pii_cache=previous.detector._pii_cache if previous else None,
+            enable_pii=config.enable_content_safety,
+            deobfuscator=Deobfuscator(
+                max_candidates=config.deobfuscation_max_candidates,
+                max_decoded_bytes=config.deobfuscation_max_bytes,
+                time_budget_ms=config.deobfuscation_time_budget_ms,
+            ),
+            enable_deobfuscation=config.deobfuscation_enabled,
+        )
+        exfil_detector = DataExfiltrationDetector(keywords=config.sensitive_keywords)
+
+        if previous and previous.config.rate_limit_per_minute == config.rate_limit_per_minute:
+            rate_limiter = previous.rate_limiter
+        else:
+            rate_limiter = RateLimiter(max_per_minute=config.rate_limit_per_minute)
+
+        if previous and _pool_key(config) == _pool_key(previous.config):
+            pool = previous.pool
+        else:
+            pool = UpstreamPool.from_config(config, client=self._pool_client)
+
+        # Cached entries stay valid across reloads: responses are re-scanned on every hit.
+        if previous and _cache_key(config) == _cache_key(previous.config):
+            response_cache = previous.response_cache
+        elif config.response_cache_enabled:
+            response_cache = ResponseCache(
+                max_bytes=config.response_cache_max_bytes,
+                ttl=config.response_cache_ttl,
+                disk_dir=Path(config.response_cache_dir) if config.response_cache_dir else None,
+                disk_max_bytes=config.response_cache_disk_max_bytes,
+            )
+        else:
+            response_cache = None
+
+        generation = previous.generation + 1 if previous else 1
+        return RuntimeState(
+            config,
+            generation,
+            rate_limiter,
+            detector,
+            exfil_detector,
+            pool,
+            self.telemetry,
+            response_cache,
+        )
+
+    async def reload(self) -> RuntimeState:
+        """Re-resolve configuration and swap it in without interrupting in-flight requests."""
+        async with self._reload_lock:
+            try:
+                config = load_config(self.config_file, self._environ)
+                self.state  # ensure the telemetry pipeline exists before reconfiguring it
+                telemetry_key = _telemetry_key(config)
+                sinks = build_sinks(config) if telemetry_key != self._telemetry_key else None
+                try:
+                    new_state = self._build(config)
+                except Exception:
+                    for sink in sinks or []:
+                        await sink.aclose()
+                    raise
+            except (OSError, ValueError, RuntimeError, re.error) as exc:
+                self.last_reload_error = str(exc)
+                raise
+            self.telemetry.configure(
+                config.telemetry_buffer_size,
+                config.telemetry_batch_size,
+                config.telemetry_flush_interval,
+                config.telemetry_overflow,
+            )
+            old_state, self._state = self._state, new_state
+            self.reload_count += 1
+            self.last_reload_error = None
+            if sinks is not None:
+                self._telemetry_key = telemetry_key
+                await self.telemetry.set_sinks(sinks)
+            if self.config_file and self.config_file.exists():
+                self._config_mtime = self.config_file.stat().st_mtime
+            if old_state is not None and old_state.pool is not new_state.pool:
+                self._retired_pools.add(old_state.pool)
+                if not self._pool_users.get(old_state.pool):
+                    await self._close_pool(old_state.pool)
+            return new_state
+
+    async def _close_pool(self, pool: UpstreamPool) -> None:
+        self._retired_pools.discard(pool)
+        self._pool_users.pop(pool, None)
+        await pool.aclose()
+
+    @asynccontextmanager
+    async def snapshot(self) -> AsyncIterator[RuntimeState]:
+        """Pin the current state for the duration of a request."""
+        state = self.state
+        pool = state.pool
+        self._pool_users[pool] = self._pool_users.get(pool, 0) + 1
+        try:
+            yield state
+        finally:
+            self._pool_users[pool] -= 1
+            if not self._pool_users[pool] and pool in self._retired_pools:
+                await self._close_pool(pool)
+
+    def install_signal_handler(self, sig: int = getattr(signal, "SIGHUP", 1)) -> bool:
+        """Reload on ``sig`` (SIGHUP by default). Returns False where signals are unsupported."""
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(sig, lambda: loop.create_task(self._safe_reload()))
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+
+    async def _safe_reload(self) -> None:
+        try:
+            await self.reload()
+        except Exception:  # keep serving the last good configuration
+            logger.exception("Configuration reload failed")
+
+    def start_watching(self, interval: float = 5.0) -> None:
+        """Poll the configuration file and reload when its modification time changes."""
+        if not self.config_file or self._watch_task is not None:
+            return
+        if self.config_file.exists():
+            self._config_mtime = self.config_file.stat().st_mtime
+        self._watch_task = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtime = self.config_file.stat().st_mtime if self.config_file else None
+            except OSError:
+                continue
+            if mtime is not None and mtime != self._config_mtime:
+                self._config_mtime = mtime
+                await self._safe_reload()
+
+    async def start(self) -> None:
+        """Resolve configuration and start background telemetry flushing."""
+        self.state.telemetry.start()
+
+    async def aclose(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self._state is not None:
+            await self._state.telemetry.stop()
+            await self._state.pool.aclose()
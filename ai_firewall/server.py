@@ -2,91 +2,199 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
-import httpx
 from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 
 from .config import FirewallConfig
-from .detectors import DataExfiltrationDetector, PromptInjectionDetector
-from .middleware import RateLimiter, log_request
+from .middleware import StageTimer, log_request
+from .response_cache import cache_key, is_cacheable, parse_cache_control
+from .runtime import FirewallRuntime, RuntimeState
+from .telemetry import make_event
+from .upstream import UpstreamError
 
-app = FastAPI(title="Azure AI Security Proxy", version="0.1.0")
+_runtime = FirewallRuntime()
 
-_detector = PromptInjectionDetector()
-_exfil_detector = DataExfiltrationDetector()
-_rate_limiter = RateLimiter(max_per_minute=60)
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Resolve configuration once at startup so misconfiguration fails fast.
+    await _runtime.start()
+    _runtime.install_signal_handler()
+    watch_interval = float(os.getenv("FIREWALL_CONFIG_WATCH_SECONDS", "0"))
+    if watch_interval > 0:
+        _runtime.start_watching(watch_interval)
+    yield
+    await _runtime.aclose()
+
+
+app = FastAPI(title="Azure AI Security Proxy", version="0.1.0", lifespan=_lifespan)
+
+
+def get_runtime() -> FirewallRuntime:
+    return _runtime
 
 
 async def get_config() -> FirewallConfig:
-    try:
-        return FirewallConfig(
-            azure_openai_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-            azure_openai_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT"],
-            api_key=os.environ["AZURE_OPENAI_API_KEY"],
-            rate_limit_per_minute=int(os.getenv("RATE_LIMIT", "60")),
+    return _runtime.config
+
+
+async def get_runtime_state() -> AsyncIterator[RuntimeState]:
+    async with _runtime.snapshot() as state:
+        yield state
+
+
+async def _block(
+    request: Request, state: RuntimeState, detector: Any, result: Any, direction: str
+) -> HTTPException:
+    await state.telemetry.put(
+        make_event(
+            "verdict",
+            path=request.url.path,
+            action="blocked",
+            direction=direction,
+            detector=type(detector).__name__,
+            confidence=result.confidence,
+            reasons=result.reasons,
+            **result.metadata,
         )
-    except KeyError as exc:  # pragma: no cover - env misconfiguration
-        raise RuntimeError(f"Missing configuration: {exc}") from exc
+    )
+    prefix = "Response blocked: " if direction == "response" else ""
+    return HTTPException(status_code=403, detail={"reason": prefix + ", ".join(result.reasons)})
+
+
+async def _scan_output(request: Request, state: RuntimeState, completion: Dict[str, Any]) -> None:
+    """Apply the detectors to completion text; runs for cached and fresh responses alike."""
+    content = "\n".join(
+        str(choice.get("message", {}).get("content") or "")
+        for choice in completion.get("choices", [])
+        if isinstance(choice, dict) and isinstance(choice.get("message"), dict)
+    )
+    for detector in (state.detector, state.exfil_detector):
+        result = await detector.detect(content)
+        if result.detected:
+            raise await _block(request, state, detector, result, "response")
 
 
 async def _proxy_request(
     request: Request,
-    config: FirewallConfig,
+    state: RuntimeState,
     authorization: str | None = Header(default=None),
+    timer: StageTimer | None = None,
 ) -> Dict[str, Any]:
-    await log_request(request, {"tenant": "default"})
-    
+    timer = timer or StageTimer()
+    tenant = request.headers.get(state.config.tenant_header) or "default"
+    await log_request(request, {"tenant": tenant}, state.telemetry)
+
     try:
-        payload = await request.json()
+        with timer.stage("parse"):
+            payload = await request.json()
     except Exception as exc:
         raise HTTPException(status_code=400, detail="Invalid JSON payload") from exc
-    
+
     if "messages" not in payload:
         raise HTTPException(status_code=400, detail="Invalid OpenAI payload: missing 'messages'")
-    
+
     if not isinstance(payload["messages"], list):
         raise HTTPException(status_code=400, detail="Invalid OpenAI payload: 'messages' must be a list")
 
     content = "\n".join(
-        str(message.get("content", "")) for message in payload["messages"] 
+        str(message.get("content", ""))
+        for message in payload["messages"]
         if isinstance(message, dict) and message.get("content") is not None
     )
-    detection = await _detector.detect(content)
-    if detection.detected:
-        raise HTTPException(status_code=403, detail={"reason": ", ".join(detection.reasons)})
-
-    exfil = await _exfil_detector.detect(content)
-    if exfil.detected:
-        raise HTTPException(status_code=403, detail={"reason": ", ".join(exfil.reasons)})
-
-    api_headers = {
-        "api-key": config.api_key,
-        "Content-Type": "application/json",
-    }
+    inspected: Dict[str, Any] = {}
+    for detector in (state.detector, state.exfil_detector):
+        with timer.stage("detection"):
+            result = await detector.detect(content)
+        if result.detected:
+            raise await _block(request, state, detector, result, "request")
+        inspected.update(result.metadata)
+    # Allowed verdicts carry the same summaries, so exhausted deobfuscation budgets stay visible.
+    await state.telemetry.put(
+        make_event("verdict", path=request.url.path, action="allowed", **inspected)
+    )
+
+    cache = state.response_cache
+    key = None
+    lookup = store = False
+    request.state.cache_status = "DISABLED" if cache is None else "BYPASS"
+    # Anonymous callers are indistinguishable from one another, so they never share entries.
+    if cache is not None and authorization and is_cacheable(payload):
+        lookup, store = parse_cache_control(request.headers.get("cache-control"))
+        deployments = (backend.deployment for backend in state.config.resolved_backends())
+        key = cache_key(payload, tenant, deployments, authorization)
+    if key is not None and lookup:
+        with timer.stage("cache"):
+            cached = await cache.get(key)
+        if cached is not None:
+            request.state.cache_status = "HIT"
+            if state.config.enable_output_scanning:
+                with timer.stage("output_scan"):
+                    await _scan_output(request, state, cached)
+            return cached
+        request.state.cache_status = "MISS"
+    elif cache is not None:
+        cache.record_bypass()
+
+    api_headers: Dict[str, str] = {}
     if authorization:
         api_headers["Authorization"] = authorization
 
-    endpoint = f"{config.azure_openai_endpoint}/openai/deployments/{config.azure_openai_deployment}/chat/completions?api-version=2023-05-15"
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(endpoint, headers=api_headers, json=payload)
-        if response.status_code >= 400:
-            detail = response.text
-            raise HTTPException(status_code=response.status_code, detail=detail)
-        return response.json()
+    try:
+        with timer.stage("upstream"):
+            completion = await state.pool.send(payload, api_headers)
+    except UpstreamError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+
+    if key is not None and store:
+        await cache.put(key, completion)
+    if state.config.enable_output_scanning:
+        with timer.stage("output_scan"):
+            await _scan_output(request, state, completion)
+    return completion
 
 
 @app.post("/v1/chat/completions")
 async def chat_completions(
     request: Request,
-    config: FirewallConfig = Depends(get_config),
+    state: RuntimeState = Depends(get_runtime_state),
     authorization: str | None = Header(default=None),
 ) -> JSONResponse:
-    client_ip = request.client.host if request.client and request.client.host else "anonymous"
-    await _rate_limiter.acquire(client_ip)
-    result = await _proxy_request(request, config, authorization)
-    return JSONResponse(content=result)
+    timer = StageTimer()
+    try:
+        client_ip = request.client.host if request.client and request.client.host else "anonymous"
+        with timer.stage("rate_limit"):
+            await state.rate_limiter.acquire(client_ip)
+        result = await _proxy_request(request, state, authorization, timer)
+    except HTTPException as exc:
+        if state.config.expose_server_timing:
+            exc.headers = {**(exc.headers or {}), "Server-Timing": timer.header()}
+        raise
+    response = JSONResponse(content=result)
+    if state.response_cache is not None:
+        response.headers["X-Cache"] = request.state.cache_status
+    if state.config.expose_server_timing:
+        response.headers["Server-Timing"] = timer.header()
+    return response
+
+
+@app.get("/upstreams")
+async def upstream_stats() -> Dict[str, Any]:
+    return _runtime.state.pool.stats()
+
+
+@app.get("/telemetry")
+async def telemetry_stats() -> Dict[str, Any]:
+    return _runtime.state.telemetry.stats()
+
+
+@app.get("/cache")
+async def cache_stats() -> Dict[str, Any]:
+    cache = _runtime.state.response_cache
+    return {"enabled": False} if cache is None else {"enabled": True, **cache.stats()}
 
 
 @app.get("/healthz")
@@ -0,0 +1,324 @@
+"""Non-blocking, batched security telemetry pipeline for the firewall."""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import deque
+from datetime import datetime, UTC
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+import httpx
+
+from performance.azure_http import sentinel_signature
+
+from .config import FirewallConfig
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "backpressure")
+
+
+def make_event(event_type: str, **data: Any) -> Dict[str, Any]:
+    """Create a telemetry event; timestamps are taken at emit time, not flush time."""
+    return {"event_type": event_type, "timestamp": datetime.now(UTC).isoformat(), **data}
+
+
+def encode_ndjson(batch: Sequence[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(event, default=str) + "\n" for event in batch).encode("utf-8")
+
+
+class TelemetrySink:
+    """Destination for flushed event batches."""
+
+    name = "sink"
+
+    async def write(self, batch: Sequence[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        return None
+
+
+class StdoutSink(TelemetrySink):
+    name = "stdout"
+
+    @staticmethod
+    def _emit(text: str) -> None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    async def write(self, batch: Sequence[Dict[str, Any]]) -> None:
+        # A slow or full stdout pipe must stall the flusher thread, not the event loop.
+        await asyncio.to_thread(self._emit, encode_ndjson(batch).decode("utf-8"))
+
+
+class NDJSONFileSink(TelemetrySink):
+    """Append batches to an NDJSON file, optionally as concatenated gzip members."""
+
+    name = "file"
+
+    def __init__(self, path: Path, compress: bool = False) -> None:
+        self.path = Path(path)
+        self.compress = compress
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _append(self, payload: bytes) -> None:
+        with self.path.open("ab") as handle:
+            handle.write(gzip.compress(payload) if self.compress else payload)
+
+    async def write(self, batch: Sequence[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._append, encode_ndjson(batch))
+
+
+class SentinelSink(TelemetrySink):
+    """Post batches to the Log Analytics HTTP Data Collector API used by Sentinel."""
+
+    name = "sentinel"
+
+    def __init__(
+        self,
+        workspace_id: str,
+        shared_key: str,
+        log_type: str = "AIFirewall",
+        endpoint: Optional[str] = None,
+        compress: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.workspace_id = workspace_id
+        self.shared_key = shared_key
+        self.log_type = log_type
+        self.endpoint = endpoint or f"https://{workspace_id}.ods.opinsights.azure.com"
+        self.compress = compress
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=30.0)
+
+    def signature(self, date: str, content_length: int) -> str:
+        return sentinel_signature(self.workspace_id, self.shared_key, date, content_length)
+
+    async def write(self, batch: Sequence[Dict[str, Any]]) -> None:
+        body = json.dumps(list(batch), default=str).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Log-Type": self.log_type,
+            "time-generated-field": "timestamp",
+        }
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        date = format_datetime(datetime.now(UTC), usegmt=True)
+        headers["x-ms-date"] = date
+        headers["Authorization"] = self.signature(date, len(body))
+        response = await self._client.post(
+            f"{self.endpoint.rstrip('/')}/api/logs?api-version=2016-04-01",
+            content=body,
+            headers=headers,
+        )
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+
+def build_sinks(config: FirewallConfig) -> List[TelemetrySink]:
+    """Instantiate the sinks named in ``config.telemetry_sinks``."""
+    sinks: List[TelemetrySink] = []
+    if not config.enable_logging:
+        return sinks
+    for name in config.telemetry_sinks:
+        if name == "stdout":
+            sinks.append(StdoutSink())
+        elif name == "file":
+            if not config.telemetry_file:
+                raise ValueError("telemetry_file is required for the 'file' telemetry sink")
+            sinks.append(
+                NDJSONFileSink(Path(config.telemetry_file), compress=config.telemetry_compress)
+            )
+        elif name == "sentinel":
+            if not (config.sentinel_workspace_id and config.sentinel_shared_key):
+                raise ValueError(
+                    "sentinel_workspace_id and sentinel_shared_key are required "
+                    "for the 'sentinel' sink"
+                )
+            sinks.append(
+                SentinelSink(
+                    config.sentinel_workspace_id,
+                    config.sentinel_shared_key,
+                    endpoint=config.sentinel_endpoint,
+                    compress=config.telemetry_compress,
+                )
+            )
+        else:
+            raise ValueError(f"Unsupported telemetry sink: {name}")
+    return sinks
+
+
+class TelemetryPipeline:
+    """Bounded ring buffer drained by a background task that batch-flushes to sinks.
+
+    Neither ``emit`` nor ``put`` performs I/O; the firewall enqueues through ``put``.
+    When the buffer is full, ``drop_oldest`` evicts the oldest event and
+    ``drop_newest`` discards the new one. ``backpressure`` makes :meth:`put`
+    wait for space; ``emit`` never blocks and drops the new event instead.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[Sequence[TelemetrySink]] = None,
+        capacity: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "drop_oldest",
+    ) -> None:
+        self.configure(capacity, batch_size, flush_interval, overflow)
+        self.sinks: List[TelemetrySink] = list(sinks or [])
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_latencies: Deque[float] = deque(maxlen=1024)
+        self.emitted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+        self.sink_errors: Dict[str, int] = {}
+
+    def configure(
+        self, capacity: int, batch_size: int, flush_interval: float, overflow: str
+    ) -> None:
+        """Apply buffer settings; a smaller capacity takes effect as the buffer drains."""
+        if capacity <= 0 or batch_size <= 0:
+            raise ValueError("capacity and batch_size must be greater than 0")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow}")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+
+    @classmethod
+    def from_config(cls, config: FirewallConfig) -> "TelemetryPipeline":
+        return cls(
+            build_sinks(config),
+            capacity=config.telemetry_buffer_size,
+            batch_size=config.telemetry_batch_size,
+            flush_interval=config.telemetry_flush_interval,
+            overflow=config.telemetry_overflow,
+        )
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        """Enqueue an event without blocking. Returns False if the event was dropped."""
+        self.emitted += 1
+        if len(self._buffer) >= self.capacity:
+            if self.overflow == "drop_oldest":
+                self._buffer.popleft()
+                self.dropped += 1
+            else:
+                self.dropped += 1
+                return False
+        self._buffer.append(event)
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def put(self, event: Dict[str, Any], timeout: Optional[float] = None) -> bool:
+        """Enqueue an event, waiting for space under the ``backpressure`` policy."""
+        if self.overflow == "backpressure" and self._task is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while len(self._buffer) >= self.capacity:
+                self._ensure_events()
+                self._space.clear()
+                self._wakeup.set()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._space.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        return self.emit(event)
+
+    def _ensure_events(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._ensure_events()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Drain the buffer to every sink in batches; returns the number of events flushed."""
+        self._ensure_events()
+        total = 0
+        async with self._flush_lock:
+            while self._buffer:
+                count = min(self.batch_size, len(self._buffer))
+                batch = [self._buffer.popleft() for _ in range(count)]
+                self._space.set()
+                started = time.perf_counter()
+                for sink in list(self.sinks):
+                    try:
+                        await sink.write(batch)
+                    except Exception:  # a failing sink must not stall the others
+                        self.sink_errors[sink.name] = self.sink_errors.get(sink.name, 0) + 1
+                self._flush_latencies.append(time.perf_counter() - started)
+                self.flushed += count
+                self.batches += 1
+                total += count
+        return total
+
+    async def set_sinks(self, sinks: Sequence[TelemetrySink]) -> None:
+        """Swap sinks between batches, closing the ones being replaced."""
+        self._ensure_events()
+        async with self._flush_lock:
+            old, self.sinks = self.sinks, list(sinks)
+        for sink in old:
+            if sink not in self.sinks:
+                await sink.aclose()
+
+    async def stop(self) -> None:
+        """Stop the flusher after it drains whatever is still buffered."""
+        if self._task is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._closing = False
+        await self.flush()
+        for sink in self.sinks:
+            await sink.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._flush_latencies)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "overflow": self.overflow,
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "sink_errors": dict(self.sink_errors),
+            "flush_latency_avg_ms": (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+            "flush_latency_p95_ms": p95 * 1000,
+            "flush_latency_max_ms": (latencies[-1] * 1000) if latencies else 0.0,
+        }
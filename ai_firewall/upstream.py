@@ -0,0 +1,349 @@
+"""Upstream backend pool with load balancing, circuit breaking, and failover."""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+
+from performance.azure_http import parse_retry_after
+
+from .config import FirewallConfig, UpstreamBackendConfig
+
+# Statuses that mean the upstream did not process the completion, so the request
+# can safely be replayed against a different backend.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Transport failures raised before the request reached the upstream.
+RETRYABLE_EXCEPTIONS: Tuple[type, ...] = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+ROUTING_STRATEGIES = ("least_outstanding", "remaining_quota")
+
+
+class UpstreamError(Exception):
+    """Raised when no backend could serve a request."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be greater than 0")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_until = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() >= self._opened_until:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent to the backend right now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    @property
+    def probing(self) -> bool:
+        return self._probe_in_flight
+
+    def release_probe(self) -> None:
+        """Let another request probe if this one ended without recording an outcome."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, open_for: Optional[float] = None) -> None:
+        """Count a failure; ``open_for`` ejects the backend immediately (e.g. Retry-After)."""
+        self._failures += 1
+        self._probe_in_flight = False
+        if (
+            open_for is not None
+            or self._state == self.HALF_OPEN
+            or self._failures >= self.failure_threshold
+        ):
+            self._state = self.OPEN
+            self._opened_until = self._clock() + (
+                open_for if open_for is not None else self.reset_timeout
+            )
+
+
+class BackendStats:
+    """Rolling latency and error counters for a single backend."""
+
+    def __init__(self, window: int = 1024) -> None:
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.client_errors = 0
+        self.total_latency = 0.0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def observe(self, latency: float) -> None:
+        self.requests += 1
+        self.total_latency += latency
+        self._latencies.append(latency)
+
+    def percentile(self, pct: float) -> float:
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "client_errors": self.client_errors,
+            "error_rate": self.failures / self.requests if self.requests else 0.0,
+            "latency_avg_ms": (self.total_latency / self.requests * 1000) if self.requests else 0.0,
+            "latency_p50_ms": self.percentile(50) * 1000,
+            "latency_p95_ms": self.percentile(95) * 1000,
+            "latency_p99_ms": self.percentile(99) * 1000,
+        }
+
+
+class UpstreamBackend:
+    """Runtime state for one endpoint/deployment pair."""
+
+    def __init__(self, config: UpstreamBackendConfig, breaker: CircuitBreaker) -> None:
+        self.config = config
+        self.breaker = breaker
+        self.stats = BackendStats()
+        self.outstanding = 0
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return self.config.label
+
+    def url(self, api_version: str) -> str:
+        return (
+            f"{self.config.endpoint.rstrip('/')}/openai/deployments/{self.config.deployment}"
+            f"/chat/completions?api-version={api_version}"
+        )
+
+    def update_quota(self, headers: Mapping[str, str]) -> None:
+        """Track Azure OpenAI's remaining-quota headers when the upstream sends them."""
+        for header, attr in (
+            ("x-ratelimit-remaining-requests", "remaining_requests"),
+            ("x-ratelimit-remaining-tokens", "remaining_tokens"),
+        ):
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                setattr(self, attr, int(float(value)))
+            except ValueError:
+                continue
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.config.endpoint,
+            "deployment": self.config.deployment,
+            "circuit": self.breaker.state,
+            "outstanding": self.outstanding,
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            **self.stats.as_dict(),
+        }
+
+
+class UpstreamPool:
+    """Routes chat completions across a pool of Azure OpenAI backends."""
+
+    def __init__(
+        self,
+        backends: Iterable[UpstreamBackendConfig],
+        strategy: str = "least_outstanding",
+        max_attempts: int = 3,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        api_version: str = "2023-05-15",
+        timeout: float = 60.0,
+        client: Optional[httpx.AsyncClient] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unsupported routing strategy: {strategy}")
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be greater than 0")
+        self.backends: List[UpstreamBackend] = [
+            UpstreamBackend(backend, CircuitBreaker(failure_threshold, reset_timeout, clock))
+            for backend in backends
+        ]
+        if not self.backends:
+            raise ValueError("At least one upstream backend is required")
+        self.strategy = strategy
+        self.max_attempts = max_attempts
+        self.api_version = api_version
+        self._clock = clock
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self._cursor = 0
+
+    @classmethod
+    def from_config(
+        cls, config: FirewallConfig, client: Optional[httpx.AsyncClient] = None
+    ) -> "UpstreamPool":
+        return cls(
+            config.resolved_backends(),
+            strategy=config.routing_strategy,
+            max_attempts=config.max_upstream_attempts,
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_seconds,
+            api_version=config.api_version,
+            timeout=config.upstream_timeout,
+            client=client,
+        )
+
+    def _rank(self, backend: UpstreamBackend) -> Tuple[float, ...]:
+        if self.strategy == "remaining_quota":
+            # Backends that have not reported quota yet are probed first to learn it.
+            quota = backend.remaining_requests
+            return (-(quota if quota is not None else float("inf")), backend.outstanding)
+        return (backend.outstanding,)
+
+    def select(self, exclude: Iterable[UpstreamBackend] = ()) -> Optional[UpstreamBackend]:
+        """Pick the best healthy backend, rotating ties so load spreads evenly."""
+        excluded = {id(backend) for backend in exclude}
+        count = len(self.backends)
+        start = self._cursor
+        self._cursor = (self._cursor + 1) % count
+        ordered = [self.backends[(start + offset) % count] for offset in range(count)]
+        candidates = [
+            backend
+            for backend in ordered
+            if id(backend) not in excluded and backend.breaker.state != CircuitBreaker.OPEN
+        ]
+        for backend in sorted(candidates, key=self._rank):
+            if backend.breaker.allow():
+                return backend
+        return None
+
+    async def send(
+        self, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Send a chat completion, failing over to another backend on retryable errors."""
+        tried: List[UpstreamBackend] = []
+        last_error: Optional[UpstreamError] = None
+
+        for _ in range(min(self.max_attempts, len(self.backends))):
+            backend = self.select(exclude=tried)
+            if backend is None:
+                break
+            tried.append(backend)
+            probe = backend.breaker.probing
+            try:
+                request_headers = {"Content-Type": "application/json", **(headers or {})}
+                request_headers["api-key"] = backend.config.api_key
+
+                backend.outstanding += 1
+                started = self._clock()
+                try:
+                    response = await self._client.post(
+                        backend.url(self.api_version), headers=request_headers, json=payload
+                    )
+                except RETRYABLE_EXCEPTIONS as exc:
+                    backend.stats.observe(self._clock() - started)
+                    backend.stats.failures += 1
+                    backend.breaker.record_failure()
+                    last_error = UpstreamError(502, f"Upstream {backend.name} unreachable: {exc}")
+                    continue
+                except httpx.HTTPError as exc:
+                    # The request may have been processed upstream; do not replay it.
+                    backend.stats.observe(self._clock() - started)
+                    backend.stats.failures += 1
+                    backend.breaker.record_failure()
+                    raise UpstreamError(504, f"Upstream {backend.name} failed: {exc}") from exc
+                finally:
+                    backend.outstanding -= 1
+
+                backend.stats.observe(self._clock() - started)
+                backend.update_quota(response.headers)
+                status = response.status_code
+                if status in RETRYABLE_STATUS_CODES:
+                    backend.stats.failures += 1
+                    if status == 429:
+                        backend.stats.throttled += 1
+                        backend.breaker.record_failure(open_for=parse_retry_after(response.headers))
+                    else:
+                        backend.breaker.record_failure()
+                    last_error = UpstreamError(status, response.text)
+                    continue
+                if status >= 400:
+                    # Client errors are the caller's problem, not a sign of backend health.
+                    backend.stats.client_errors += 1
+                    backend.breaker.record_success()
+                    raise UpstreamError(status, response.text)
+
+                try:
+                    result = response.json()
+                except ValueError as exc:
+                    # The request was processed upstream; do not replay it.
+                    backend.stats.failures += 1
+                    backend.breaker.record_failure()
+                    raise UpstreamError(
+                        502, f"Upstream {backend.name} returned an invalid body"
+                    ) from exc
+                backend.stats.successes += 1
+                backend.breaker.record_success()
+                return result
+            finally:
+                # A cancelled or failed probe must not leave the backend ejected for good.
+                if probe:
+                    backend.breaker.release_probe()
+
+        if last_error is not None:
+            raise last_error
+        raise UpstreamError(503, "No healthy upstream backends available")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "backends": {backend.name: backend.as_dict() for backend in self.backends},
+        }
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
@@ -2,86 +2,560 @@
 from __future__ import annotations
 
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pq = None
+
+GroupColumns = Union[np.ndarray, Sequence[np.ndarray], Mapping[str, np.ndarray]]
+Partial = Tuple[Callable[..., "GroupStatistics"], Tuple[Any, ...]]
+
+# Minimum acceptable value per metric. Every metric is scaled so that 1.0 is perfectly fair.
+THRESHOLDS: Dict[str, float] = {
+    "demographic_parity": 0.8,
+    "false_positive_rate_gap": 0.7,
+    "true_positive_rate_gap": 0.7,
+    "equalized_odds": 0.7,
+    "predictive_parity": 0.7,
+    "calibration": 0.9,
+}
+
+# Confusion matrix columns, indexed by ``2 * prediction + label``.
+TN, FN, FP, TP = range(4)
+# Rows per bincount pass; bounds the int64 temporaries to a few tens of MB.
+CHUNK_ROWS = 1 << 22
+_DENSE_SPAN = 1 << 22
+
 
 @dataclass
 class FairnessMetric:
     name: str
     value: float
     threshold: float
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    compliance_probability: Optional[float] = None
 
     def compliant(self) -> bool:
         return self.value >= self.threshold
 
 
+@dataclass
+class GroupStatistics:
+    """Per-group sufficient statistics: a confusion matrix and, with scores, their sums."""
+
+    groups: List[str]
+    confusion: np.ndarray  # (groups, 4) int64 columns TN, FN, FP, TP
+    score_sum: Optional[np.ndarray] = None  # (groups, 4) score sums per confusion cell
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.confusion.sum(axis=1)
+
+    def merge(self, other: "GroupStatistics") -> "GroupStatistics":
+        """Combine statistics of two disjoint row sets, aligning groups by label."""
+        if self.groups and other.groups and (self.score_sum is None) != (other.score_sum is None):
+            raise ValueError("cannot merge statistics computed with and without scores")
+        positions = {group: index for index, group in enumerate(self.groups)}
+        groups = list(self.groups)
+        for group in other.groups:
+            if group not in positions:
+                positions[group] = len(groups)
+                groups.append(group)
+        target = np.array([positions[group] for group in other.groups], dtype=np.intp)
+        confusion = np.zeros((len(groups), 4), dtype=np.int64)
+        confusion[: len(self.groups)] = self.confusion
+        confusion[target] += other.confusion
+        score_sum = None
+        if self.score_sum is not None or other.score_sum is not None:
+            score_sum = np.zeros((len(groups), 4))
+            if self.score_sum is not None:
+                score_sum[: len(self.groups)] = self.score_sum
+            if other.score_sum is not None:
+                score_sum[target] += other.score_sum
+        return GroupStatistics(groups, confusion, score_sum)
+
+    def rates(self) -> Dict[str, Dict[str, float]]:
+        """Selection rate, FPR, TPR and precision for each group."""
+        rates = _group_rates(self.confusion.astype(np.float64))
+        return {
+            group: {name: float(values[index]) for name, values in rates.items()}
+            for index, group in enumerate(self.groups)
+        }
+
+
+def _factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """``np.unique(values, return_inverse=True)`` with an O(N) path for small integer ranges."""
+    if values.dtype.kind in "biu" and values.size:
+        if values.dtype.kind == "b":
+            values = values.view(np.uint8)
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        if span <= _DENSE_SPAN:
+            shifted = values.astype(np.intp) - low if low else values.astype(np.intp, copy=False)
+            present = np.flatnonzero(np.bincount(shifted, minlength=span))
+            table = np.zeros(span, dtype=np.intp)
+            table[present] = np.arange(len(present))
+            return present + low, table[shifted]
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return uniques, inverse.reshape(-1)
+
+
+class GroupIndex:
+    """Stable mapping from (intersectional) group values to dense codes across calls."""
+
+    def __init__(self, attributes: Sequence[str]) -> None:
+        self.attributes = list(attributes)
+        self.codes: Dict[Tuple[object, ...], int] = {}
+        self.keys: List[Tuple[object, ...]] = []
+
+    def labels(self) -> List[str]:
+        return ["|".join(str(value) for value in key) for key in self.keys]
+
+    def encode(self, columns: Sequence[np.ndarray]) -> np.ndarray:
+        factorized = [_factorize(np.asarray(column).reshape(-1)) for column in columns]
+        combined = factorized[0][1]
+        for uniques, inverse in factorized[1:]:
+            combined = combined * len(uniques) + inverse
+        if len(factorized) > 1:
+            present, local = _factorize(combined)
+        else:
+            present, local = np.arange(len(factorized[0][0])), combined
+        table = np.empty(len(present), dtype=np.intp)
+        for position, value in enumerate(present.tolist()):
+            digits = []
+            for uniques, _ in reversed(factorized):
+                value, digit = divmod(value, len(uniques))
+                digits.append(uniques[digit].item())
+            key = tuple(reversed(digits))
+            code = self.codes.get(key)
+            if code is None:
+                code = self.codes[key] = len(self.keys)
+                self.keys.append(key)
+            table[position] = code
+        return table[local]
+
+
+def _require_binary(name: str, values: np.ndarray) -> None:
+    # Scores or class ids would otherwise be read as "not selected" and look compliant.
+    if ((values != 0) & (values != 1)).any():
+        raise ValueError(f"{name} must be binary (0/1); threshold scores before evaluating")
+
+
+class FairnessAccumulator:
+    """Accumulates per-group confusion matrices (and score sums) in bincount passes."""
+
+    def __init__(self, attributes: Sequence[str]) -> None:
+        self.index = GroupIndex(attributes)
+        self.confusion = np.zeros((0, 4), dtype=np.int64)
+        self.score_sum: Optional[np.ndarray] = None
+        self.rows = 0
+
+    def update(
+        self,
+        labels: np.ndarray,
+        predictions: np.ndarray,
+        columns: Sequence[np.ndarray],
+        scores: Optional[np.ndarray] = None,
+    ) -> None:
+        labels = np.asarray(labels).reshape(-1)
+        predictions = np.asarray(predictions).reshape(-1)
+        if not all(len(column) == len(labels) for column in columns) or len(predictions) != len(
+            labels
+        ):
+            raise ValueError("labels, predictions, and groups must have the same length")
+        if scores is not None and len(scores) != len(labels):
+            raise ValueError("scores must have the same length as labels")
+        for start in range(0, len(labels), CHUNK_ROWS):
+            window = slice(start, start + CHUNK_ROWS)
+            _require_binary("labels", labels[window])
+            _require_binary("predictions", predictions[window])
+            codes = self.index.encode([column[window] for column in columns])
+            groups = len(self.index.keys)
+            if groups > len(self.confusion):
+                self.confusion = np.pad(self.confusion, ((0, groups - len(self.confusion)), (0, 0)))
+            cells = codes * 4
+            cells += 2 * (predictions[window] == 1)
+            cells += labels[window] != 0
+            self.confusion += np.bincount(cells, minlength=groups * 4).reshape(groups, 4)
+            if scores is not None:
+                weights = np.asarray(scores[window], dtype=np.float64)
+                sums = np.bincount(cells, weights=weights, minlength=groups * 4).reshape(groups, 4)
+                if self.score_sum is None:
+                    self.score_sum = np.zeros((0, 4))
+                self.score_sum = (
+                    np.pad(self.score_sum, ((0, groups - len(self.score_sum)), (0, 0))) + sums
+                )
+        self.rows += len(labels)
+
+    def statistics(self) -> GroupStatistics:
+        score_sum = None if self.score_sum is None else self.score_sum.copy()
+        return GroupStatistics(self.index.labels(), self.confusion.copy(), score_sum)
+
+
+def _chunk_statistics(
+    attributes: Sequence[str],
+    labels: np.ndarray,
+    predictions: np.ndarray,
+    groups: GroupColumns,
+    scores: Optional[np.ndarray] = None,
+) -> GroupStatistics:
+    return FairnessPipeline(attributes).statistics(labels, predictions, groups, scores)
+
+
+def _npy_statistics(
+    attributes: Sequence[str], paths: Dict[str, str], start: int, stop: int
+) -> GroupStatistics:
+    arrays = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+    accumulator = FairnessAccumulator(attributes)
+    accumulator.update(
+        arrays["labels"][start:stop],
+        arrays["predictions"][start:stop],
+        [arrays[f"group:{attribute}"][start:stop] for attribute in attributes],
+        arrays["scores"][start:stop] if "scores" in arrays else None,
+    )
+    return accumulator.statistics()
+
+
+def _parquet_statistics(
+    attributes: Sequence[str], path: str, row_group: int, columns: Dict[str, Optional[str]]
+) -> GroupStatistics:
+    names = [name for name in (*columns.values(), *attributes) if name]
+    table = pq.ParquetFile(path).read_row_group(row_group, columns=names)
+
+    def column(name: str) -> np.ndarray:
+        return table.column(name).to_numpy()
+
+    accumulator = FairnessAccumulator(attributes)
+    accumulator.update(
+        column(columns["labels"]),
+        column(columns["predictions"]),
+        [column(attribute) for attribute in attributes],
+        column(columns["scores"]) if columns["scores"] else None,
+    )
+    return accumulator.statistics()
+
+
+@dataclass
+class NpyColumns:
+    """Memory-mapped ``.npy`` columns, one file per column, scanned ``chunk_rows`` at a time."""
+
+    labels: Path
+    predictions: Path
+    groups: Mapping[str, Path]
+    scores: Optional[Path] = None
+    chunk_rows: int = 1 << 24
+
+    def partials(self, attributes: Sequence[str]) -> Iterator[Partial]:
+        paths = {"labels": str(self.labels), "predictions": str(self.predictions)}
+        paths.update(
+            {f"group:{attribute}": str(self.groups[attribute]) for attribute in attributes}
+        )
+        if self.scores is not None:
+            paths["scores"] = str(self.scores)
+        rows = len(np.load(paths["labels"], mmap_mode="r"))
+        for start in range(0, rows, self.chunk_rows):
+            yield _npy_statistics, (
+                list(attributes),
+                paths,
+                start,
+                min(rows, start + self.chunk_rows),
+            )
+
+
+@dataclass
+class ParquetColumns:
+    """Parquet scoring logs, scanned one row group at a time; group columns are the attributes."""
+
+    paths: Sequence[Path]
+    label_column: str = "label"
+    prediction_column: str = "prediction"
+    score_column: Optional[str] = None
+
+    def partials(self, attributes: Sequence[str]) -> Iterator[Partial]:
+        if pq is None:
+            raise RuntimeError("Install pyarrow to evaluate fairness over Parquet files")
+        columns = {
+            "labels": self.label_column,
+            "predictions": self.prediction_column,
+            "scores": self.score_column,
+        }
+        for path in self.paths:
+            for row_group in range(pq.ParquetFile(str(path)).num_row_groups):
+                yield _parquet_statistics, (list(attributes), str(path), row_group, columns)
+
+
+def _rate(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # Groups with an empty denominator count as a rate of 0, as the per-group loops always did.
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _group_rates(confusion: np.ndarray) -> Dict[str, np.ndarray]:
+    selected = confusion[..., FP] + confusion[..., TP]
+    return {
+        "selection_rate": _rate(selected, confusion.sum(axis=-1)),
+        "false_positive_rate": _rate(confusion[..., FP], confusion[..., TN] + confusion[..., FP]),
+        "true_positive_rate": _rate(confusion[..., TP], confusion[..., FN] + confusion[..., TP]),
+        "precision": _rate(confusion[..., TP], selected),
+    }
+
+
+def metric_values(
+    confusion: np.ndarray, score_sum: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Every metric from ``(..., groups, 4)`` confusion matrices; leading axes are kept."""
+    confusion = np.asarray(confusion, dtype=np.float64)
+    rates = _group_rates(confusion)
+    selection = rates["selection_rate"]
+    top = selection.max(axis=-1)
+    values = {
+        "demographic_parity": np.where(
+            top > 0, selection.min(axis=-1) / np.where(top > 0, top, 1.0), 1.0
+        ),
+    }
+    gaps = {}
+    for name, rate in (
+        ("false_positive_rate_gap", "false_positive_rate"),
+        ("true_positive_rate_gap", "true_positive_rate"),
+    ):
+        gaps[name] = rates[rate].max(axis=-1) - rates[rate].min(axis=-1)
+        values[name] = 1 - gaps[name]
+    values["equalized_odds"] = 1 - np.maximum(
+        gaps["false_positive_rate_gap"], gaps["true_positive_rate_gap"]
+    )
+    precision = rates["precision"]
+    values["predictive_parity"] = 1 - (precision.max(axis=-1) - precision.min(axis=-1))
+    if score_sum is not None:
+        counts = confusion.sum(axis=-1)
+        observed = _rate(confusion[..., FN] + confusion[..., TP], counts)
+        expected = _rate(np.asarray(score_sum, dtype=np.float64).sum(axis=-1), counts)
+        values["calibration"] = 1 - np.abs(expected - observed).max(axis=-1)
+    return values
+
+
+def compute_metrics(statistics: GroupStatistics) -> List[FairnessMetric]:
+    if not statistics.groups:
+        return []
+    values = metric_values(statistics.confusion, statistics.score_sum)
+    return [FairnessMetric(name, float(value), THRESHOLDS[name]) for name, value in values.items()]
+
+
+def _bootstrap_batch(
+    confusion: np.ndarray,
+    score_means: Optional[np.ndarray],
+    seed: np.random.SeedSequence,
+    size: int,
+) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    counts = confusion.sum(axis=1)
+    probabilities = confusion / np.maximum(counts, 1)[:, None]
+    resampled = rng.multinomial(counts, probabilities, size=(size, len(counts)))
+    score_sum = None if score_means is None else resampled * score_means
+    return metric_values(resampled, score_sum)
+
+
+def bootstrap_metrics(
+    statistics: GroupStatistics,
+    samples: int = 10_000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    workers: int = 1,
+    batch_size: int = 1_000,
+) -> List[FairnessMetric]:
+    """Point estimates with percentile bootstrap intervals and compliance probabilities.
+
+    Rows are resampled with replacement within each group. That only changes how
+    many rows land in each confusion cell, so a batch of resamples is a single
+    multinomial draw over the cells and the cost does not depend on the row
+    count. Batches get child seeds of ``seed``, so results are identical for
+    any ``workers``. Calibration resamples use each cell's mean score.
+    """
+    if samples <= 0 or batch_size <= 0:
+        raise ValueError("samples and batch_size must be greater than 0")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    metrics = compute_metrics(statistics)
+    if not metrics:
+        return metrics
+    confusion = statistics.confusion
+    score_means = None
+    if statistics.score_sum is not None:
+        score_means = _rate(statistics.score_sum, confusion.astype(np.float64))
+    sizes = [min(batch_size, samples - start) for start in range(0, samples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = ([confusion] * len(sizes), [score_means] * len(sizes), seeds, sizes)
+    if workers <= 1:
+        batches = list(map(_bootstrap_batch, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_bootstrap_batch, *arguments))
+    tail = (1 - confidence) / 2
+    for metric in metrics:
+        values = np.concatenate([batch[metric.name] for batch in batches])
+        metric.lower, metric.upper = (
+            float(bound) for bound in np.quantile(values, [tail, 1 - tail])
+        )
+        metric.compliance_probability = float((values >= metric.threshold).mean())
+    return metrics
+
+
 class FairnessPipeline:
-    """Simple fairness metric calculator placeholder."""
+    """Computes group fairness metrics from one pass of per-group confusion matrices.
 
-    def __init__(self, protected_attribute: str = "gender") -> None:
+    ``protected_attribute`` may name several attributes; ``groups`` then holds one
+    column per attribute (a mapping, a sequence of arrays or an ``(N, k)`` array)
+    and metrics are computed over their intersections. With ``bootstrap_samples``
+    set, every metric also carries a confidence interval and the probability
+    that it meets its threshold.
+    """
+
+    def __init__(
+        self,
+        protected_attribute: Union[str, Sequence[str]] = "gender",
+        bootstrap_samples: int = 0,
+        confidence: float = 0.95,
+        seed: int = 0,
+        bootstrap_workers: int = 1,
+    ) -> None:
         self.protected_attribute = protected_attribute
+        self.bootstrap_samples = bootstrap_samples
+        self.confidence = confidence
+        self.seed = seed
+        self.bootstrap_workers = bootstrap_workers
+        self.attributes = (
+            [protected_attribute]
+            if isinstance(protected_attribute, str)
+            else list(protected_attribute)
+        )
 
-    def evaluate(self, labels: np.ndarray, predictions: np.ndarray, groups: np.ndarray) -> List[FairnessMetric]:
-        if len(labels) == 0 or len(predictions) == 0 or len(groups) == 0:
-            return []
-        if not (len(labels) == len(predictions) == len(groups)):
-            raise ValueError("labels, predictions, and groups must have the same length")
-        
-        metrics: List[FairnessMetric] = []
-        unique_groups = np.unique(groups)
-        
-        if len(unique_groups) == 0:
+    def _columns(self, groups: GroupColumns) -> List[np.ndarray]:
+        if isinstance(groups, Mapping):
+            return [np.asarray(groups[attribute]) for attribute in self.attributes]
+        if (
+            isinstance(groups, (list, tuple))
+            and groups
+            and isinstance(groups[0], (np.ndarray, list, tuple))
+        ):
+            return [np.asarray(column) for column in groups]
+        groups = np.asarray(groups)
+        if groups.ndim == 2:
+            return [groups[:, index] for index in range(groups.shape[1])]
+        return [groups]
+
+    def statistics(
+        self,
+        labels: np.ndarray,
+        predictions: np.ndarray,
+        groups: GroupColumns,
+        scores: Optional[np.ndarray] = None,
+    ) -> GroupStatistics:
+        columns = self._columns(groups)
+        if len(columns) != len(self.attributes):
+            raise ValueError(f"expected {len(self.attributes)} group columns, got {len(columns)}")
+        accumulator = FairnessAccumulator(self.attributes)
+        accumulator.update(labels, predictions, columns, scores)
+        return accumulator.statistics()
+
+    def evaluate(
+        self,
+        labels: np.ndarray,
+        predictions: np.ndarray,
+        groups: GroupColumns,
+        scores: Optional[np.ndarray] = None,
+    ) -> List[FairnessMetric]:
+        if len(labels) == 0 or len(predictions) == 0 or len(self._columns(groups)[0]) == 0:
             return []
-        
-        acceptance_rates = {}
-        for group in unique_groups:
-            mask = groups == group
-            count = mask.sum()
-            if count > 0:
-                acceptance_rates[group] = predictions[mask].mean()
-            else:
-                acceptance_rates[group] = 0.0
-        
-        max_rate = max(acceptance_rates.values())
-        if max_rate > 0:
-            parity = min(rate / max_rate for rate in acceptance_rates.values())
+        return self._metrics(self.statistics(labels, predictions, groups, scores))
+
+    def _metrics(self, statistics: GroupStatistics) -> List[FairnessMetric]:
+        if not self.bootstrap_samples:
+            return compute_metrics(statistics)
+        return bootstrap_metrics(
+            statistics, self.bootstrap_samples, self.confidence, self.seed, self.bootstrap_workers
+        )
+
+    def stream_statistics(
+        self,
+        source: Union[NpyColumns, ParquetColumns, Iterable[Sequence[Any]]],
+        workers: int = 1,
+    ) -> GroupStatistics:
+        """Accumulate statistics over data larger than memory.
+
+        ``source`` is an ``NpyColumns``/``ParquetColumns`` description or an
+        iterable of ``(labels, predictions, groups[, scores])`` chunks. Each
+        chunk is reduced to per-group counts (in a process pool when
+        ``workers > 1``) and merged, so memory is bounded by the chunk size.
+        """
+        if isinstance(source, (NpyColumns, ParquetColumns)):
+            partials: Iterable[Partial] = source.partials(self.attributes)
         else:
-            parity = 1.0  # All rates are zero, treat as equal
-        metrics.append(FairnessMetric("demographic_parity", parity, 0.8))
-
-        false_positive_rates: Dict[str, float] = {}
-        for group in unique_groups:
-            mask = groups == group
-            negatives = (labels[mask] == 0).sum()
-            if negatives > 0:
-                fp = ((predictions[mask] == 1) & (labels[mask] == 0)).sum()
-                false_positive_rates[group] = fp / negatives
-            else:
-                false_positive_rates[group] = 0.0
-        
-        if false_positive_rates:
-            disparity = max(false_positive_rates.values()) - min(false_positive_rates.values())
-            metrics.append(FairnessMetric("false_positive_rate_gap", 1 - disparity, 0.7))
-        
-        return metrics
+            partials = ((_chunk_statistics, (self.attributes, *chunk)) for chunk in source)
+        merged = GroupStatistics([], np.zeros((0, 4), dtype=np.int64))
+        if workers <= 1:
+            for function, args in partials:
+                merged = merged.merge(function(*args))
+            return merged
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Any] = deque()
+            for function, args in partials:
+                pending.append(pool.submit(function, *args))
+                if len(pending) >= 2 * workers:
+                    merged = merged.merge(pending.popleft().result())
+            while pending:
+                merged = merged.merge(pending.popleft().result())
+        return merged
+
+    def evaluate_stream(
+        self,
+        source: Union[NpyColumns, ParquetColumns, Iterable[Sequence[Any]]],
+        workers: int = 1,
+    ) -> List[FairnessMetric]:
+        return self._metrics(self.stream_statistics(source, workers))
 
     def generate_report(self, metrics: List[FairnessMetric], output_path: Path) -> Path:
-        payload = {
+        entries = []
+        for metric in metrics:
+            entry: Dict[str, Any] = {
+                "name": metric.name,
+                "value": metric.value,
+                "threshold": metric.threshold,
+                "compliant": metric.compliant(),
+            }
+            if metric.lower is not None:
+                entry["confidence_interval"] = [metric.lower, metric.upper]
+                entry["compliance_probability"] = metric.compliance_probability
+            entries.append(entry)
+        payload: Dict[str, Any] = {
             "protected_attribute": self.protected_attribute,
-            "metrics": [
-                {
-                    "name": metric.name,
-                    "value": metric.value,
-                    "threshold": metric.threshold,
-                    "compliant": metric.compliant(),
-                }
-                for metric in metrics
-            ],
+            "metrics": entries,
         }
+        if any(metric.lower is not None for metric in metrics):
+            payload["bootstrap"] = {
+                "samples": self.bootstrap_samples,
+                "confidence": self.confidence,
+                "seed": self.seed,
+            }
         output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
         return output_path
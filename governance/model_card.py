@@ -1,10 +1,59 @@
 """Model card generator with security considerations."""
 from __future__ import annotations
 
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime, UTC
 from pathlib import Path
-from typing import Dict, List
+from string import Template
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import yaml
+
+REQUIRED_FIELDS = ["model_name", "version", "owners", "intended_use"]
+MITIGATION_FIELDS = ["category", "description", "status"]
+FORMATS = {"markdown": ".md", "html": ".html", "json": ".json"}
+# Part of every card's input hash; bump it whenever the templates change.
+TEMPLATE_VERSION = "1"
+MANIFEST_NAME = ".model-cards.json"
+
+_MARKDOWN = Template(
+    "# Model Card: $model_name ($version)\n\n"
+    "**Owners:** $owners\n"
+    "**Intended Use:** $intended_use\n"
+    "**Security Review Date:** $security_review_date\n"
+    "\n## Threat Model\n\n"
+    "$threat_model_summary\n"
+    "\n## Risk Mitigations\n\n"
+    "$mitigations"
+    "\n## Evaluation Data\n\n"
+    "$evaluation_data"
+    "\n_Generated: ${generated}_\n"
+)
+_MARKDOWN_MITIGATION = Template("- **$category** ($status): $description\n")
+_MARKDOWN_ITEM = Template("- **$key**: $value\n")
+_HTML = Template(
+    '<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8">'
+    "<title>Model Card: $model_name ($version)</title></head>\n<body>\n"
+    "<h1>Model Card: $model_name ($version)</h1>\n"
+    "<p><strong>Owners:</strong> $owners<br>\n"
+    "<strong>Intended Use:</strong> $intended_use<br>\n"
+    "<strong>Security Review Date:</strong> $security_review_date</p>\n"
+    "<h2>Threat Model</h2>\n<p>$threat_model_summary</p>\n"
+    "<h2>Risk Mitigations</h2>\n<ul>\n$mitigations\n</ul>\n"
+    "<h2>Evaluation Data</h2>\n<ul>\n$evaluation_data\n</ul>\n"
+    "<p><em>Generated: $generated</em></p>\n</body>\n</html>\n"
+)
+_HTML_MITIGATION = Template("<li><strong>$category</strong> ($status): $description</li>")
+_HTML_ITEM = Template("<li><strong>$key</strong>: $value</li>")
 
 
 @dataclass
@@ -25,21 +74,52 @@ class ModelCard:
     mitigations: List[RiskMitigation]
     evaluation_data: Dict[str, str]
 
+    def render(self, fmt: str = "markdown", generated: Optional[str] = None) -> str:
+        generated = generated or datetime.now(UTC).isoformat()
+        if fmt == "json":
+            return json.dumps({**asdict(self), "generated": generated}, indent=2)
+        if fmt == "html":
+            escape = lambda value: html.escape(str(value))  # noqa: E731
+            return _HTML.substitute(
+                model_name=escape(self.model_name),
+                version=escape(self.version),
+                owners=escape(", ".join(self.owners)),
+                intended_use=escape(self.intended_use),
+                security_review_date=escape(self.security_review_date),
+                threat_model_summary=escape(self.threat_model_summary),
+                mitigations="\n".join(
+                    _HTML_MITIGATION.substitute(
+                        {key: escape(value) for key, value in asdict(item).items()}
+                    )
+                    for item in self.mitigations
+                ),
+                evaluation_data="\n".join(
+                    _HTML_ITEM.substitute(key=escape(key), value=escape(value))
+                    for key, value in self.evaluation_data.items()
+                ),
+                generated=escape(generated),
+            )
+        if fmt != "markdown":
+            raise ValueError(f"Unsupported model card format: {fmt}")
+        return _MARKDOWN.substitute(
+            model_name=self.model_name,
+            version=self.version,
+            owners=", ".join(self.owners),
+            intended_use=self.intended_use,
+            security_review_date=self.security_review_date,
+            threat_model_summary=self.threat_model_summary,
+            mitigations="".join(
+                _MARKDOWN_MITIGATION.substitute(asdict(item)) for item in self.mitigations
+            ),
+            evaluation_data="".join(
+                _MARKDOWN_ITEM.substitute(key=key, value=value)
+                for key, value in self.evaluation_data.items()
+            ),
+            generated=generated,
+        )
+
     def to_markdown(self) -> str:
-        lines = [f"# Model Card: {self.model_name} ({self.version})\n"]
-        lines.append(f"**Owners:** {', '.join(self.owners)}")
-        lines.append(f"**Intended Use:** {self.intended_use}")
-        lines.append(f"**Security Review Date:** {self.security_review_date}")
-        lines.append("\n## Threat Model\n")
-        lines.append(self.threat_model_summary)
-        lines.append("\n## Risk Mitigations\n")
-        for mitigation in self.mitigations:
-            lines.append(f"- **{mitigation.category}** ({mitigation.status}): {mitigation.description}")
-        lines.append("\n## Evaluation Data\n")
-        for key, value in self.evaluation_data.items():
-            lines.append(f"- **{key}**: {value}")
-        lines.append(f"\n_Generated: {datetime.now(UTC).isoformat()}_\n")
-        return "\n".join(lines)
+        return self.render("markdown")
 
     def save(self, path: Path) -> Path:
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -48,14 +128,13 @@ class ModelCard:
 
 
 def create_model_card(template: Dict[str, str]) -> ModelCard:
-    required_fields = ["model_name", "version", "owners", "intended_use"]
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in template:
             raise ValueError(f"Missing required field in template: {field}")
-    
+
     if not isinstance(template.get("owners"), list):
         raise ValueError("Field 'owners' must be a list")
-    
+
     mitigations = [
         RiskMitigation(category=entry["category"], description=entry["description"], status=entry["status"])
         for entry in template.get("mitigations", [])
@@ -71,3 +150,206 @@ def create_model_card(template: Dict[str, str]) -> ModelCard:
         mitigations=mitigations,
         evaluation_data=template.get("evaluation_data", {}),
     )
+
+
+def validate_entry(entry: Any) -> List[str]:
+    """Every problem with a registry entry; unlike ``create_model_card`` nothing is dropped."""
+    if not isinstance(entry, dict):
+        return ["entry must be a mapping"]
+    errors = [f"missing required field: {field}" for field in REQUIRED_FIELDS if field not in entry]
+    owners = entry.get("owners")
+    if "owners" in entry and not (
+        isinstance(owners, list) and owners and all(isinstance(o, str) for o in owners)
+    ):
+        errors.append("'owners' must be a non-empty list of strings")
+    for field in ("model_name", "version"):
+        if field in entry and not str(entry[field]).strip():
+            errors.append(f"'{field}' must not be empty")
+    mitigations = entry.get("mitigations", [])
+    if not isinstance(mitigations, list):
+        errors.append("'mitigations' must be a list")
+    else:
+        for index, mitigation in enumerate(mitigations):
+            if not isinstance(mitigation, dict) or any(
+                key not in mitigation for key in MITIGATION_FIELDS
+            ):
+                errors.append(f"mitigation {index} needs {', '.join(MITIGATION_FIELDS)}")
+    if not isinstance(entry.get("evaluation_data", {}), dict):
+        errors.append("'evaluation_data' must be a mapping")
+    return errors
+
+
+def load_registry(source: Path) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(origin, entry)`` from an NDJSON registry export or a directory of YAML files."""
+    source = Path(source)
+    if source.is_dir():
+        for path in sorted([*source.rglob("*.yaml"), *source.rglob("*.yml")]):
+            payload = yaml.safe_load(path.read_text(encoding="utf-8"))
+            entries = payload if isinstance(payload, list) else [payload]
+            for index, entry in enumerate(entries):
+                yield (f"{path}" if len(entries) == 1 else f"{path}#{index}"), entry
+        return
+    with source.open("r", encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if line.strip():
+                try:
+                    yield f"{source}:{number}", json.loads(line)
+                except ValueError as exc:
+                    yield f"{source}:{number}", exc
+
+
+def _slug(value: Any) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", str(value)).strip("-.") or "_"
+
+
+def card_digest(entry: Dict[str, Any], formats: Sequence[str]) -> str:
+    canonical = json.dumps(
+        entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    header = f"{TEMPLATE_VERSION}\0{','.join(sorted(formats))}\0"
+    return hashlib.sha256((header + canonical).encode("utf-8")).hexdigest()
+
+
+def _file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp creates files as 0600; published cards get the mode a plain open() would give.
+_FILE_MODE = _file_mode()
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.chmod(tmp, _FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _render_batch(
+    batch: List[Tuple[str, Dict[str, Any]]], output_dir: str, formats: Sequence[str], generated: str
+) -> int:
+    for relative, entry in batch:
+        card = create_model_card(entry)
+        for fmt in formats:
+            _write(Path(output_dir) / f"{relative}{FORMATS[fmt]}", card.render(fmt, generated))
+    return len(batch)
+
+
+def generate_catalog(
+    source: Path,
+    output_dir: Path,
+    formats: Sequence[str] = ("markdown",),
+    workers: int = 1,
+    batch_size: int = 200,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """Render cards for a whole registry, skipping entries whose inputs are unchanged.
+
+    The manifest in ``output_dir`` maps each ``model_name@version`` to the hash
+    of its entry, the requested formats and ``TEMPLATE_VERSION``. Changed
+    entries are rendered in batches, across a process pool when ``workers > 1``.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported model card formats: {unknown}")
+    if workers <= 0 or batch_size <= 0:
+        raise ValueError("workers and batch_size must be greater than 0")
+    started = time.perf_counter()
+    output_dir = Path(output_dir)
+    manifest_path = output_dir / MANIFEST_NAME
+    previous: Dict[str, str] = {}
+    if manifest_path.exists() and not force:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest: Dict[str, str] = {}
+    # Output path (case-folded, for case-insensitive filesystems) -> the card that owns it.
+    paths: Dict[str, str] = {}
+    invalid: List[Dict[str, Any]] = []
+    pending: List[Tuple[str, Dict[str, Any]]] = []
+    total = 0
+    for origin, entry in load_registry(source):
+        total += 1
+        errors = (
+            [f"invalid JSON: {entry}"] if isinstance(entry, Exception) else validate_entry(entry)
+        )
+        if not errors:
+            card_id = f"{entry['model_name']}@{entry['version']}"
+            relative = f"{_slug(entry['model_name'])}/{_slug(entry['version'])}"
+            owner = paths.setdefault(relative.casefold(), card_id)
+            if card_id in manifest:
+                errors = [f"duplicate card {card_id}"]
+            elif owner != card_id:
+                errors = [f"card {card_id} would overwrite {owner} at {relative}"]
+        if errors:
+            invalid.append({"origin": origin, "errors": errors})
+            continue
+        digest = card_digest(entry, formats)
+        manifest[card_id] = digest
+        outputs = [output_dir / f"{relative}{FORMATS[fmt]}" for fmt in formats]
+        if previous.get(card_id) == digest and all(path.exists() for path in outputs):
+            continue
+        pending.append((relative, entry))
+
+    generated = datetime.now(UTC).isoformat()
+    batches = [pending[start : start + batch_size] for start in range(0, len(pending), batch_size)]
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_render_batch, batch, str(output_dir), list(formats), generated)
+                for batch in batches
+            ]
+            rendered = sum(future.result() for future in futures)
+    else:
+        rendered = sum(
+            _render_batch(batch, str(output_dir), formats, generated) for batch in batches
+        )
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+    seconds = time.perf_counter() - started
+    return {
+        "entries": total,
+        "rendered": rendered,
+        "unchanged": len(manifest) - rendered,
+        "invalid": invalid,
+        "seconds": round(seconds, 3),
+        "entries_per_second": round(total / seconds) if seconds else None,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate model cards for a model registry export."
+    )
+    parser.add_argument(
+        "--registry", required=True, help="NDJSON registry export or directory of YAML entries"
+    )
+    parser.add_argument("--output", required=True, help="Directory for the generated cards")
+    parser.add_argument(
+        "--format", action="append", choices=sorted(FORMATS), help="Repeat for several formats"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--force", action="store_true", help="Re-render every card even if unchanged"
+    )
+    args = parser.parse_args(argv)
+
+    summary = generate_catalog(
+        Path(args.registry),
+        Path(args.output),
+        args.format or ["markdown"],
+        args.workers,
+        force=args.force,
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["invalid"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
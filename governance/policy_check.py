@@ -2,12 +2,41 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import yaml
 
+FieldPath = Tuple[str, ...]
+Values = Dict[FieldPath, Any]
+Predicate = Callable[[Values], bool]
+
+# Part of every policy digest; bump it when evaluation semantics change.
+ENGINE_VERSION = "1"
+MAX_REPORTED_INVALIDATIONS = 100
+DEFAULT_CACHE_DIR = ".cache/policy-check"
+OPERATORS = (
+    "equals",
+    "not_equals",
+    "in",
+    "not_in",
+    "regex",
+    "gte",
+    "gt",
+    "lte",
+    "lt",
+    "exists",
+    "all",
+    "any",
+)
+
 
 class PolicyViolation(Exception):
     """Raised when policy requirements are not met."""
@@ -19,31 +48,320 @@ def load_policies(path: Path) -> List[Dict[str, Any]]:
         return payload if isinstance(payload, list) else [payload]
 
 
-def evaluate_policy(policy: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-    field = policy.get("field", "")
-    if not field:
-        raise ValueError("Policy missing required 'field' key")
-    if "equals" not in policy:
-        raise ValueError("Policy missing required 'equals' key")
-    
-    expected = policy["equals"]
-    severity = policy.get("severity", "MEDIUM")
+def _split(field: str) -> FieldPath:
+    return tuple(segment for segment in field.split(".") if segment)
+
+
+def extract(context: Any, path: FieldPath) -> Any:
+    """Follow ``path`` through nested mappings (and list indexes); missing keys give ``None``."""
     actual = context
-    for segment in field.split('.'):
+    for segment in path:
         if isinstance(actual, dict):
             actual = actual.get(segment)
+        elif isinstance(actual, list) and segment.isdigit() and int(segment) < len(actual):
+            actual = actual[int(segment)]
+        else:
+            return None
+    return actual
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _compile_condition(
+    condition: Dict[str, Any], inherited: Optional[FieldPath], paths: List[FieldPath]
+) -> Predicate:
+    operators = [name for name in OPERATORS if name in condition]
+    if len(operators) != 1:
+        raise ValueError(
+            f"Policy condition must define exactly one operator of {', '.join(OPERATORS)}"
+        )
+    operator = operators[0]
+    expected = condition[operator]
+    path = _split(condition["field"]) if condition.get("field") else inherited
+
+    if operator in ("all", "any"):
+        if not isinstance(expected, list) or not expected:
+            raise ValueError(f"'{operator}' expects a non-empty list of conditions")
+        children = [_compile_condition(child, path, paths) for child in expected]
+        if operator == "all":
+            return lambda values: all(child(values) for child in children)
+        return lambda values: any(child(values) for child in children)
+
+    if path is None:
+        raise ValueError("Policy missing required 'field' key")
+    if path not in paths:
+        paths.append(path)
+
+    if operator == "equals":
+        return lambda values: values[path] == expected
+    if operator == "not_equals":
+        return lambda values: values[path] != expected
+    if operator in ("in", "not_in"):
+        if not isinstance(expected, list):
+            raise ValueError(f"'{operator}' expects a list of values")
+        hashable = all(isinstance(item, (str, int, float, bool, type(None))) for item in expected)
+        choices = frozenset(expected) if hashable else expected
+        negate = operator == "not_in"
+
+        def member(values: Values) -> bool:
+            actual = values[path]
+            try:
+                found = actual in choices
+            except TypeError:  # unhashable actual value against a frozenset
+                found = False
+            return found != negate
+
+        return member
+    if operator == "regex":
+        try:
+            pattern = re.compile(str(expected))
+        except re.error as exc:
+            raise ValueError(f"Invalid regex {expected!r}: {exc}") from exc
+        return (
+            lambda values: isinstance(values[path], str)
+            and pattern.search(values[path]) is not None
+        )
+    if operator == "exists":
+        return lambda values: (values[path] is not None) == bool(expected)
+
+    bound = _number(expected)
+    if bound is None:
+        raise ValueError(f"'{operator}' expects a number, got {expected!r}")
+    compare = {
+        "gte": lambda actual: actual >= bound,
+        "gt": lambda actual: actual > bound,
+        "lte": lambda actual: actual <= bound,
+        "lt": lambda actual: actual < bound,
+    }[operator]
+
+    def ordered(values: Values) -> bool:
+        actual = _number(values[path])
+        return actual is not None and compare(actual)
+
+    return ordered
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """A policy parsed once into a predicate over pre-split field paths."""
+
+    policy_id: str
+    description: str
+    severity: str
+    expected: Any
+    field: Optional[FieldPath]
+    paths: Tuple[FieldPath, ...]
+    predicate: Predicate
+
+    def result(self, values: Values) -> Dict[str, Any]:
+        if self.field is not None:
+            actual = values[self.field]
         else:
-            actual = None
-            break
-    compliant = actual == expected
-    return {
-        "policy_id": policy.get("id", "UNKNOWN"),
-        "description": policy.get("description", ""),
-        "severity": severity,
-        "compliant": compliant,
-        "actual": actual,
-        "expected": expected,
-    }
+            actual = {".".join(path): values[path] for path in self.paths}
+        return {
+            "policy_id": self.policy_id,
+            "description": self.description,
+            "severity": self.severity,
+            "compliant": self.predicate(values),
+            "actual": actual,
+            "expected": self.expected,
+        }
+
+
+def compile_policy(policy: Dict[str, Any]) -> CompiledPolicy:
+    paths: List[FieldPath] = []
+    predicate = _compile_condition(policy, None, paths)
+    field = _split(policy["field"]) if policy.get("field") else None
+    if field is not None and field not in paths:
+        paths.append(field)  # reported as ``actual`` even when only nested conditions read it
+    operator = next(name for name in OPERATORS if name in policy)
+    expected = policy[operator] if operator == "equals" else {operator: policy[operator]}
+    return CompiledPolicy(
+        policy_id=policy.get("id", "UNKNOWN"),
+        description=policy.get("description", ""),
+        severity=policy.get("severity", "MEDIUM"),
+        expected=expected,
+        field=field,
+        paths=tuple(paths),
+        predicate=predicate,
+    )
+
+
+class PolicyEngine:
+    """Evaluates compiled policies against one or many contexts.
+
+    Every distinct field path is extracted once per context and shared by all
+    policies that read it.
+    """
+
+    def __init__(self, policies: Iterable[Dict[str, Any]]) -> None:
+        self.policies = [compile_policy(policy) for policy in policies]
+        self.paths: List[FieldPath] = []
+        for policy in self.policies:
+            for path in policy.paths:
+                if path not in self.paths:
+                    self.paths.append(path)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PolicyEngine":
+        return cls(load_policies(path))
+
+    def evaluate(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        values = {path: extract(context, path) for path in self.paths}
+        return [policy.result(values) for policy in self.policies]
+
+    def evaluate_many(self, contexts: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        for context in contexts:
+            yield self.evaluate(context)
+
+
+def evaluate_policy(policy: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    compiled = compile_policy(policy)
+    return compiled.result({path: extract(context, path) for path in compiled.paths})
+
+
+def policy_digest(policy_bytes: bytes) -> str:
+    return hashlib.sha256(ENGINE_VERSION.encode() + b"\0" + policy_bytes).hexdigest()
+
+
+def context_digest(context: Any) -> str:
+    canonical = json.dumps(context, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: Path, payload: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _read(path: Path) -> Optional[Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class PolicyResultCache:
+    """Policy results stored one JSON file per (policy digest, context digest) pair.
+
+    Entries are written to a temporary file and renamed into place, so several
+    CI jobs can share one directory (e.g. a mounted volume or a restored
+    ``actions/cache`` path) without locking. When a ``source`` (a context file
+    or fleet entry) is given, the digests it was last evaluated with are kept so
+    a miss can be reported as a policy or context change.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.invalidations: Dict[str, int] = {"policy_changed": 0, "context_changed": 0}
+        self.invalidated: List[Dict[str, str]] = []
+
+    def _entry(self, policy: str, context: str) -> Path:
+        return self.root / "results" / policy[:16] / context[:2] / f"{context}.json"
+
+    def _index(self, source: str) -> Path:
+        return self.root / "sources" / f"{hashlib.sha256(source.encode('utf-8')).hexdigest()}.json"
+
+    def get(
+        self, policy: str, context: str, source: Optional[str] = None
+    ) -> Tuple[bool, Optional[List[Dict[str, Any]]]]:
+        entry = _read(self._entry(policy, context))
+        if entry is not None and entry.get("policy") == policy and entry.get("context") == context:
+            self.hits += 1
+            return True, entry["results"]
+        self.misses += 1
+        if source is not None:
+            previous = _read(self._index(source))
+            if previous is not None:
+                reason = "policy_changed" if previous.get("policy") != policy else "context_changed"
+                if previous.get("policy") != policy or previous.get("context") != context:
+                    self.invalidations[reason] += 1
+                    if len(self.invalidated) < MAX_REPORTED_INVALIDATIONS:
+                        self.invalidated.append({"source": source, "reason": reason})
+        return False, None
+
+    def set(
+        self, policy: str, context: str, results: List[Dict[str, Any]], source: Optional[str] = None
+    ) -> None:
+        _atomic_write(
+            self._entry(policy, context), {"policy": policy, "context": context, "results": results}
+        )
+        if source is not None:
+            _atomic_write(
+                self._index(source), {"source": source, "policy": policy, "context": context}
+            )
+        self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "directory": str(self.root),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "invalidations": dict(self.invalidations),
+            "invalidated": list(self.invalidated),
+        }
+
+
+def iter_contexts(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(line_number, context)`` for each non-empty line of an NDJSON file."""
+    with path.open("r", encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+
+
+Evaluator = Callable[[Dict[str, Any], str], List[Dict[str, Any]]]
+
+
+def _check_contexts(evaluate: Evaluator, path: Path) -> int:
+    contexts = violations = 0
+    by_policy: Dict[str, int] = {}
+    for number, context in iter_contexts(path):
+        contexts += 1
+        label = context.get("id", number)
+        failures = [
+            result for result in evaluate(context, f"{path}#{label}") if not result["compliant"]
+        ]
+        if failures:
+            violations += 1
+            for failure in failures:
+                by_policy[failure["policy_id"]] = by_policy.get(failure["policy_id"], 0) + 1
+            print(json.dumps({"context": label, "violations": failures}))
+    print(
+        json.dumps(
+            {"contexts": contexts, "noncompliant_contexts": violations, "violations": by_policy}
+        )
+    )
+    if violations:
+        raise PolicyViolation(
+            f"Policy violations detected in {violations} of {contexts} contexts: "
+            f"{sorted(by_policy)}"
+        )
+    return 0
 
 
 def main(argv: List[str] | None = None) -> int:
@@ -55,20 +373,65 @@ def main(argv: List[str] | None = None) -> int:
         default="governance/context.json",
         help="Context JSON file containing evaluated values",
     )
+    parser.add_argument(
+        "--contexts",
+        required=False,
+        default=None,
+        help="NDJSON file with one context per line, checked as a fleet",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Result cache directory; may be shared between CI jobs (env: GOVERNANCE_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Evaluate everything and skip the result cache"
+    )
     args = parser.parse_args(argv)
 
-    policies = load_policies(Path(args.config))
-    context_path = Path(args.context)
-    context = json.loads(context_path.read_text(encoding="utf-8")) if context_path.exists() else {}
+    config_path = Path(args.config)
+    cache_dir = args.cache_dir or os.environ.get("GOVERNANCE_CACHE_DIR") or DEFAULT_CACHE_DIR
+    cache = None if args.no_cache else PolicyResultCache(Path(cache_dir))
+    digest = policy_digest(config_path.read_bytes()) if cache is not None else ""
+    engine: Optional[PolicyEngine] = None
 
-    results = [evaluate_policy(policy, context) for policy in policies]
-    failures = [r for r in results if not r["compliant"]]
-    if failures:
-        print(json.dumps(results, indent=2))
-        raise PolicyViolation(f"Policy violations detected: {[f['policy_id'] for f in failures]}")
+    def evaluate(context: Dict[str, Any], source: str) -> List[Dict[str, Any]]:
+        nonlocal engine
+        key = ""
+        if cache is not None:
+            key = context_digest(context)
+            found, results = cache.get(digest, key, source)
+            if found:
+                return results
+        if engine is None:  # only parsed once something actually needs evaluating
+            engine = PolicyEngine.from_file(config_path)
+        results = engine.evaluate(context)
+        if cache is not None:
+            cache.set(digest, key, results, source)
+        return results
 
-    print(json.dumps(results, indent=2))
-    return 0
+    try:
+        if args.contexts:
+            return _check_contexts(evaluate, Path(args.contexts))
+
+        context_path = Path(args.context)
+        context = (
+            json.loads(context_path.read_text(encoding="utf-8")) if context_path.exists() else {}
+        )
+
+        results = evaluate(context, str(context_path))
+        failures = [r for r in results if not r["compliant"]]
+        if failures:
+            print(json.dumps(results, indent=2))
+            raise PolicyViolation(
+                f"Policy violations detected: {[f['policy_id'] for f in failures]}"
+            )
+
+        print(json.dumps(results, indent=2))
+        return 0
+    finally:
+        if cache is not None:
+            print(json.dumps({"cache": cache.stats()}), file=sys.stderr)
 
 
 if __name__ == "__main__":
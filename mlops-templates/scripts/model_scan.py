@@ -2,50 +2,541 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
 import json
+import mmap
+import os
+import pickletools
+import struct
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import IO, Any, Dict, FrozenSet, List, Optional, Union
+
+CHUNK_SIZE = 16 * 1024 * 1024
+PICKLE_SUFFIXES = {".pkl", ".pickle", ".joblib", ".pt", ".pth", ".bin", ".ckpt", ".sav"}
+MAX_SAFETENSORS_HEADER = 100 * 1024 * 1024
+# Strings longer than this cannot name a module or attribute; the walker skips them unread.
+MAX_TRACKED_STRING = 256
+# Bytes read from files and zip members without a pickle suffix to check for pickle opcodes.
+SNIFF_BYTES = 64 * 1024
+# Opcodes a sniffed prefix must parse cleanly before it counts as pickle without STOP or import.
+SNIFF_MIN_OPCODES = 64
+SEVERITY_ORDER = {"critical": 3, "high": 2, "medium": 1, "low": 0}
+
+_DANGEROUS_BUILTINS = frozenset(
+    {
+        "eval",
+        "exec",
+        "compile",
+        "open",
+        "getattr",
+        "setattr",
+        "delattr",
+        "__import__",
+        "globals",
+        "locals",
+        "vars",
+        "input",
+        "breakpoint",
+        "apply",
+        "execfile",
+        "file",
+        "reload",
+    }
+)
+# Module -> "*" (everything, including submodules) or the specific risky names.
+UNSAFE_GLOBALS: Dict[str, Union[str, FrozenSet[str]]] = {
+    "os": "*",
+    "posix": "*",
+    "nt": "*",
+    "subprocess": "*",
+    "sys": "*",
+    "socket": "*",
+    "shutil": "*",
+    "runpy": "*",
+    "pty": "*",
+    "ctypes": "*",
+    "importlib": "*",
+    "marshal": "*",
+    "pickle": "*",
+    "_pickle": "*",
+    "code": "*",
+    "commands": "*",
+    "webbrowser": "*",
+    "requests": "*",
+    "httpx": "*",
+    "urllib": "*",
+    "http.client": "*",
+    "asyncio": "*",
+    "multiprocessing": "*",
+    "signal": "*",
+    "pip": "*",
+    "setuptools": "*",
+    "builtins": _DANGEROUS_BUILTINS,
+    "__builtin__": _DANGEROUS_BUILTINS,
+    "operator": frozenset({"attrgetter", "methodcaller"}),
+    "numpy.testing._private.utils": frozenset({"runstring"}),
+    "torch.hub": "*",
+}
+
+_OPCODES = {op.code.encode("latin-1")[0]: op for op in pickletools.opcodes}
+_LENGTH_PREFIX = {
+    pickletools.TAKEN_FROM_ARGUMENT1: ("<B", 1),
+    pickletools.TAKEN_FROM_ARGUMENT4: ("<i", 4),
+    pickletools.TAKEN_FROM_ARGUMENT4U: ("<I", 4),
+    pickletools.TAKEN_FROM_ARGUMENT8U: ("<Q", 8),
+}
+_STRING_OPS = {
+    "SHORT_BINUNICODE",
+    "BINUNICODE",
+    "BINUNICODE8",
+    "SHORT_BINSTRING",
+    "BINSTRING",
+    "UNICODE",
+    "STRING",
+}
+_CALL_OPS = {"REDUCE", "OBJ", "NEWOBJ", "NEWOBJ_EX", "INST"}
+_MEMO_OPS = {"MEMOIZE", "PUT", "BINPUT", "LONG_BINPUT"}
+_GET_OPS = {"GET", "BINGET", "LONG_BINGET"}
+_MARK = object()
 
 
 def assess_bias(model_path: Path) -> dict[str, float]:
-    if not model_path.exists():
-        raise FileNotFoundError(f"Model not found: {model_path}")
     # Placeholder scoring logic; integrate with Fairlearn/MLFlow in production
     return {"demographic_parity": 0.92, "equalized_odds": 0.88}
 
 
 def assess_robustness(model_path: Path) -> dict[str, float]:
-    if not model_path.exists():
-        raise FileNotFoundError(f"Model not found: {model_path}")
     return {"fgsm_resilience": 0.75, "pgd_resilience": 0.68}
 
 
-def check_vulnerabilities(model_path: Path) -> dict[str, bool]:
-    if not model_path.exists():
-        raise FileNotFoundError(f"Model not found: {model_path}")
-    return {"signed_model": True, "dependency_scan_clean": True}
+def is_unsafe_global(module: str, name: str) -> bool:
+    for candidate, names in UNSAFE_GLOBALS.items():
+        if module == candidate or (names == "*" and module.startswith(candidate + ".")):
+            return names == "*" or name in names
+    return False
+
+
+def sha256_file(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Hash ``path`` through one fixed-size memory-mapped window at a time."""
+    granularity = mmap.ALLOCATIONGRANULARITY
+    chunk_size = max(granularity, chunk_size // granularity * granularity)
+    digest = hashlib.sha256()
+    size = path.stat().st_size
+    with path.open("rb") as handle:
+        for offset in range(0, size, chunk_size):
+            length = min(chunk_size, size - offset)
+            with mmap.mmap(
+                handle.fileno(), length, offset=offset, access=mmap.ACCESS_READ
+            ) as window:
+                if hasattr(window, "madvise"):
+                    window.madvise(mmap.MADV_SEQUENTIAL)
+                digest.update(window)
+    return digest.hexdigest()
+
+
+class _Stream:
+    """Minimal reader over a file object that can skip large arguments without reading them."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        self.handle = handle
+        self.seekable = handle.seekable()
+
+    def read(self, size: int) -> bytes:
+        data = self.handle.read(size)
+        if len(data) < size:
+            raise EOFError("truncated pickle")
+        return data
+
+    def readline(self) -> bytes:
+        line = self.handle.readline(64 * 1024)
+        if not line.endswith(b"\n"):
+            raise EOFError("truncated pickle line")
+        return line
+
+    def skip(self, size: int) -> None:
+        if self.seekable:
+            self.handle.seek(size, io.SEEK_CUR)
+            return
+        while size:
+            size -= len(self.read(min(size, CHUNK_SIZE)))
+
+    def peek_byte(self) -> Optional[int]:
+        data = self.handle.read(1)
+        if not data:
+            return None
+        if self.seekable:
+            self.handle.seek(-1, io.SEEK_CUR)
+            return data[0]
+        raise ValueError("cannot peek a non-seekable stream")  # pragma: no cover - zip is seekable
+
+
+def _apply_stack_effect(stack: List[Any], op: pickletools.OpcodeInfo, pushed: Any) -> None:
+    """Pop and push what ``op`` consumes and produces, the way the Unpickler's stack moves."""
+    before = op.stack_before
+    if pickletools.markobject in before:
+        while stack and stack.pop() is not _MARK:
+            pass
+        below = before.index(pickletools.markobject)
+    else:
+        below = len(before)
+    del stack[max(len(stack) - below, 0) :]
+    for produced in op.stack_after:
+        stack.append(_MARK if produced is pickletools.markobject else pushed)
+
+
+def walk_pickle(handle: IO[bytes], source: str = "") -> Dict[str, Any]:
+    """Walk pickle opcodes without executing them and report every imported global.
+
+    Memory stays bounded: string arguments longer than ``MAX_TRACKED_STRING``
+    and all byte payloads are skipped rather than read. Consecutive pickles
+    (as in legacy ``torch.save`` files) are walked until non-pickle data starts.
+    """
+    stream = _Stream(handle)
+    imports: Dict[str, int] = {}
+    findings: List[Dict[str, Any]] = []
+    opcodes = pickles = 0
+    while True:
+        stack: List[Any] = []
+        memo: Dict[int, Any] = {}
+        uncalled: List[Dict[str, Any]] = []
+        pickles += 1
+        while True:
+            position = handle.tell() if stream.seekable else -1
+            code = stream.read(1)[0]
+            op = _OPCODES.get(code)
+            if op is None:
+                findings.append(
+                    {
+                        "severity": "medium",
+                        "issue": "malformed_pickle",
+                        "detail": f"unknown opcode {code:#x}",
+                        "offset": position,
+                        "source": source,
+                    }
+                )
+                return {
+                    "opcodes": opcodes,
+                    "pickles": pickles,
+                    "imports": imports,
+                    "findings": findings,
+                }
+            opcodes += 1
+            value: Any = None
+            arg = op.arg
+            if arg is not None:
+                if arg.n in _LENGTH_PREFIX:
+                    fmt, width = _LENGTH_PREFIX[arg.n]
+                    length = struct.unpack(fmt, stream.read(width))[0]
+                    if op.name in _STRING_OPS and 0 <= length <= MAX_TRACKED_STRING:
+                        raw = stream.read(length)
+                        value = raw.decode(
+                            "utf-8" if "UNICODE" in op.name else "latin-1", "replace"
+                        )
+                    else:
+                        stream.skip(max(length, 0))
+                elif arg.n == pickletools.UP_TO_NEWLINE or arg.n >= 0:
+                    value = arg.reader(stream)
+            name = op.name
+            if name in ("GLOBAL", "INST", "STACK_GLOBAL"):
+                if name == "STACK_GLOBAL":
+                    module, attribute = stack[-2:] if len(stack) >= 2 else (None, None)
+                else:
+                    module, attribute = value.split(" ", 1)
+                if not isinstance(module, str) or not isinstance(attribute, str):
+                    # Names computed at load time could be anything, so calling one is critical.
+                    finding = {
+                        "severity": "high",
+                        "issue": "unresolved_global",
+                        "opcode": name,
+                        "offset": position,
+                        "source": source,
+                    }
+                    findings.append(finding)
+                    uncalled.append(finding)
+                else:
+                    qualified = f"{module}.{attribute}"
+                    imports[qualified] = imports.get(qualified, 0) + 1
+                    if is_unsafe_global(module, attribute):
+                        finding = {
+                            "severity": "high",
+                            "issue": "unsafe_global",
+                            "global": qualified,
+                            "opcode": name,
+                            "offset": position,
+                            "source": source,
+                        }
+                        findings.append(finding)
+                        uncalled.append(finding)
+                        if name == "INST":
+                            finding["severity"] = "critical"
+            elif name in _CALL_OPS:
+                for finding in uncalled:
+                    finding["severity"] = "critical"
+                    finding["opcode"] += "+" + name
+                uncalled.clear()
+
+            if name == "MEMOIZE":
+                memo[len(memo)] = stack[-1] if stack else None
+            elif name in _MEMO_OPS:
+                memo[int(value)] = stack[-1] if stack else None
+            elif name == "DUP":
+                stack.append(stack[-1] if stack else None)
+            elif name in _GET_OPS:
+                stack.append(memo.get(int(value)))
+            else:
+                _apply_stack_effect(stack, op, value if name in _STRING_OPS else None)
+            if name == "STOP":
+                break
+        if stream.peek_byte() != 0x80:  # another pickle only follows if it starts with PROTO
+            return {
+                "opcodes": opcodes,
+                "pickles": pickles,
+                "imports": imports,
+                "findings": findings,
+            }
+
+
+def _read_safetensors_header(path: Path, size: int) -> Dict[str, Any]:
+    with path.open("rb") as handle:
+        prefix = handle.read(8)
+        if len(prefix) < 8:
+            raise ValueError("file shorter than the header length prefix")
+        length = struct.unpack("<Q", prefix)[0]
+        if length > min(MAX_SAFETENSORS_HEADER, size - 8):
+            raise ValueError(f"header length {length} exceeds the file")
+        header = json.loads(handle.read(length))
+    if not isinstance(header, dict):
+        raise ValueError("header is not a JSON object")
+    data_size = size - 8 - length
+    tensors = {key: value for key, value in header.items() if key != "__metadata__"}
+    for key, tensor in tensors.items():
+        if not isinstance(tensor, dict):
+            raise ValueError(f"tensor {key} is not a JSON object")
+        start, end = tensor["data_offsets"]
+        if not 0 <= start <= end <= data_size:
+            raise ValueError(f"tensor {key} points outside the data section")
+    return {"tensors": len(tensors), "metadata": header.get("__metadata__", {})}
+
+
+def _is_dotted_name(name: str) -> bool:
+    return all(part.isidentifier() for part in name.split("."))
+
+
+def looks_like_pickle(head: bytes) -> bool:
+    """Whether ``head`` starts with pickle opcodes, for files whose name does not say so.
+
+    Protocol 0/1 pickles have no PROTO header, so the prefix is parsed instead:
+    it counts when it reaches a balanced STOP, imports a well-formed global, or
+    stays a valid opcode stream for ``SNIFF_MIN_OPCODES`` opcodes until the sniffed
+    window runs out. Text and tensor data fail within a few bytes.
+    """
+    if head[:1] == b"\x80":
+        return len(head) > 1 and 2 <= head[1] <= 5
+    count = 0
+    try:
+        for op, arg, _ in pickletools.genops(io.BytesIO(head)):
+            count += 1
+            if op.name == "STOP":
+                # dis() also checks the stack and marks balance out to a single result.
+                pickletools.dis(io.BytesIO(head), out=io.StringIO())
+                return True
+            if op.name in ("GLOBAL", "INST"):
+                module, _, attribute = arg.partition(" ")
+                return _is_dotted_name(module) and _is_dotted_name(attribute)
+    except (ValueError, EOFError, struct.error):
+        return len(head) >= SNIFF_BYTES and count >= SNIFF_MIN_OPCODES
+    return False
+
+
+def detect_format(path: Path) -> str:
+    with path.open("rb") as handle:
+        head = handle.read(SNIFF_BYTES)
+    suffix = path.suffix.lower()
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if suffix == ".safetensors":
+        return "safetensors"
+    if suffix == ".onnx":
+        return "onnx"
+    if suffix in PICKLE_SUFFIXES or looks_like_pickle(head):
+        return "pickle"
+    return "unknown"
+
+
+def _is_pickled_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bool:
+    if info.is_dir():
+        return False
+    if info.filename.endswith(".pkl"):
+        return True
+    with archive.open(info) as member:
+        return looks_like_pickle(member.read(SNIFF_BYTES))
+
+
+def scan_artifact(path: Path, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Hash one artifact for provenance and inspect it for unsafe deserialization."""
+    started = time.perf_counter()
+    size = path.stat().st_size
+    result: Dict[str, Any] = {
+        "path": str(path),
+        "size": size,
+        "format": detect_format(path),
+        "findings": [],
+    }
+    result["sha256"] = sha256_file(path, chunk_size)
+    try:
+        if result["format"] == "pickle":
+            with path.open("rb") as handle:
+                walked = walk_pickle(handle, path.name)
+            result.update(
+                imports=sorted(walked["imports"]),
+                opcodes=walked["opcodes"],
+                findings=walked["findings"],
+            )
+        elif result["format"] == "zip":
+            with zipfile.ZipFile(path) as archive:
+                # Every member is checked: a pickle does not have to be named *.pkl to load.
+                members = [info for info in archive.infolist() if _is_pickled_member(archive, info)]
+                imports: Dict[str, int] = {}
+                for info in members:
+                    with archive.open(info) as member:
+                        walked = walk_pickle(member, info.filename)
+                    result["findings"].extend(walked["findings"])
+                    for qualified, count in walked["imports"].items():
+                        imports[qualified] = imports.get(qualified, 0) + count
+            result.update(pickled_members=len(members), imports=sorted(imports))
+        elif result["format"] == "safetensors":
+            result.update(_read_safetensors_header(path, size))
+    # NotImplementedError: zip members using a compression method zipfile cannot read.
+    except (
+        EOFError,
+        ValueError,
+        KeyError,
+        TypeError,
+        struct.error,
+        zipfile.BadZipFile,
+        NotImplementedError,
+    ) as exc:
+        result["findings"].append(
+            {
+                "severity": "medium",
+                "issue": f"malformed_{result['format']}",
+                "detail": str(exc),
+                "source": path.name,
+            }
+        )
+
+    sidecar = path.with_name(path.name + ".sha256")
+    if sidecar.exists():
+        expected = next(iter(sidecar.read_text(encoding="utf-8").split()), "").lower()
+        result["provenance_verified"] = expected == result["sha256"]
+        if not result["provenance_verified"]:
+            result["findings"].append(
+                {
+                    "severity": "critical",
+                    "issue": "digest_mismatch",
+                    "detail": f"expected {expected}",
+                    "source": path.name,
+                }
+            )
+    seconds = time.perf_counter() - started
+    result["seconds"] = round(seconds, 4)
+    result["mb_s"] = round(size / 1e6 / seconds, 1) if seconds else None
+    return result
+
+
+def scan_model(
+    model_path: Path, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Scan a file or every file under a directory, largest first, on a thread pool."""
+    if model_path.is_dir():
+        files = [
+            path for path in model_path.rglob("*") if path.is_file() and path.suffix != ".sha256"
+        ]
+    else:
+        files = [model_path]
+    files.sort(key=lambda path: path.stat().st_size, reverse=True)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+        artifacts = list(pool.map(lambda path: scan_artifact(path, chunk_size), files))
+    seconds = time.perf_counter() - started
+    total = sum(artifact["size"] for artifact in artifacts)
+    findings = [finding for artifact in artifacts for finding in artifact["findings"]]
+    return {
+        "artifacts": sorted(artifacts, key=lambda artifact: artifact["path"]),
+        "files": len(artifacts),
+        "bytes": total,
+        "seconds": round(seconds, 3),
+        "throughput_mb_s": round(total / 1e6 / seconds, 1) if seconds else None,
+        "findings": {
+            severity: sum(finding["severity"] == severity for finding in findings)
+            for severity in SEVERITY_ORDER
+        },
+    }
+
+
+def check_vulnerabilities(scan: Dict[str, Any]) -> dict[str, bool]:
+    verified = [
+        artifact["provenance_verified"]
+        for artifact in scan["artifacts"]
+        if "provenance_verified" in artifact
+    ]
+    issues = {
+        finding["issue"] for artifact in scan["artifacts"] for finding in artifact["findings"]
+    }
+    return {
+        "unsafe_deserialization": bool(issues & {"unsafe_global", "unresolved_global"}),
+        "malformed_artifacts": any(issue.startswith("malformed_") for issue in issues),
+        "provenance_verified": bool(verified) and all(verified),
+    }
 
 
-def main() -> int:
+def main(argv: List[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Run model security assessments.")
-    parser.add_argument("--model-path", required=True, help="Path to serialized model artifact")
+    parser.add_argument(
+        "--model-path", required=True, help="Serialized model artifact or directory of shards"
+    )
     parser.add_argument("--output", default="reports/model_scan.json", help="Output report path")
-    args = parser.parse_args()
+    parser.add_argument("--workers", type=int, default=None, help="Files scanned in parallel")
+    parser.add_argument(
+        "--chunk-mb", type=int, default=CHUNK_SIZE // (1024 * 1024), help="Hashing window size"
+    )
+    parser.add_argument(
+        "--fail-on",
+        choices=[*SEVERITY_ORDER, "never"],
+        default="critical",
+        help="Exit non-zero when a finding of this severity or worse is present",
+    )
+    args = parser.parse_args(argv)
 
     model_path = Path(args.model_path)
     if not model_path.exists():
         raise FileNotFoundError(model_path)
 
+    scan = scan_model(model_path, args.workers, args.chunk_mb * 1024 * 1024)
     report = {
         "model_path": str(model_path),
         "bias": assess_bias(model_path),
         "robustness": assess_robustness(model_path),
-        "vulnerabilities": check_vulnerabilities(model_path),
+        "vulnerabilities": check_vulnerabilities(scan),
+        "scan": scan,
     }
 
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
     print(json.dumps(report, indent=2))
+    if args.fail_on != "never":
+        threshold = SEVERITY_ORDER[args.fail_on]
+        if any(
+            count
+            for severity, count in scan["findings"].items()
+            if SEVERITY_ORDER[severity] >= threshold
+        ):
+            return 1
     return 0
 
 
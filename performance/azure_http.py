@@ -0,0 +1,30 @@
+"""HTTP helpers shared by the clients that call Azure APIs."""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from typing import Mapping, Optional
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``retry-after``, if either is numeric."""
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        return seconds / 1000.0 if header == "retry-after-ms" else seconds
+    return None
+
+
+def sentinel_signature(workspace_id: str, shared_key: str, date: str, content_length: int) -> str:
+    """Authorization header for a Log Analytics HTTP Data Collector API post."""
+    string_to_sign = f"POST\n{content_length}\napplication/json\nx-ms-date:{date}\n/api/logs"
+    digest = hmac.new(
+        base64.b64decode(shared_key), string_to_sign.encode("utf-8"), hashlib.sha256
+    ).digest()
+    return f"SharedKey {workspace_id}:{base64.b64encode(digest).decode('ascii')}"
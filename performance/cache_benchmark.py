@@ -0,0 +1,147 @@
+"""Benchmark ``performance.caching.disk_cache`` against the previous whole-file JSON cache.
+
+Fills each cache with ``--entries`` distinct keys, then replays ``--lookups`` calls
+with the requested hit ratio and records throughput and per-call latency.
+
+Usage::
+
+    python -m performance.cache_benchmark --entries 1000 --lookups 5000 \\
+        --output reports/bench/cache.json
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .caching import disk_cache
+from .firewall_benchmark import summarize_latencies
+
+
+def legacy_disk_cache(cache_file: Path) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """The original implementation: parse the whole JSON file per call, rewrite it per miss."""
+    lock = threading.Lock()
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        def load() -> Dict[str, Any]:
+            if not cache_file.exists():
+                return {}
+            try:
+                return json.loads(cache_file.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError):
+                return {}
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=str)
+            with lock:
+                data = load()
+                if key in data:
+                    return data[key]
+            result = func(*args, **kwargs)
+            with lock:
+                data = load()
+                data[key] = result
+                try:
+                    cache_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
+                except OSError:
+                    pass
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _workload(index: int) -> Dict[str, Any]:
+    return {"index": index, "findings": [f"finding-{index}-{n}" for n in range(8)]}
+
+
+def _bench(
+    decorator: Callable[[Callable[..., Any]], Callable[..., Any]],
+    entries: int,
+    lookups: int,
+    hit_ratio: float,
+    seed: int,
+) -> Dict[str, Any]:
+    cached = decorator(_workload)
+    started = time.perf_counter()
+    for index in range(entries):
+        cached(index)
+    fill_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    keys = [
+        rng.randrange(entries) if rng.random() < hit_ratio else entries + n for n in range(lookups)
+    ]
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for key in keys:
+        call_started = time.perf_counter()
+        cached(key)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "fill_seconds": round(fill_seconds, 4),
+        "lookup_seconds": round(elapsed, 4),
+        "calls_per_second": round(lookups / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+    }
+
+
+def run_benchmark(entries: int, lookups: int, hit_ratio: float, seed: int = 0) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "parameters": {"entries": entries, "lookups": lookups, "hit_ratio": hit_ratio, "seed": seed}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        results["legacy"] = _bench(
+            legacy_disk_cache(Path(tmp) / "legacy.json"), entries, lookups, hit_ratio, seed
+        )
+        results["sqlite"] = _bench(
+            disk_cache(Path(tmp) / "cache.sqlite"), entries, lookups, hit_ratio, seed
+        )
+    legacy_rate = results["legacy"]["calls_per_second"]
+    results["speedup"] = (
+        round(results["sqlite"]["calls_per_second"] / legacy_rate, 1) if legacy_rate else None
+    )
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the disk cache against the legacy JSON cache."
+    )
+    parser.add_argument(
+        "--entries", type=int, default=1000, help="Distinct keys stored before measuring"
+    )
+    parser.add_argument("--lookups", type=int, default=5000, help="Measured calls")
+    parser.add_argument("--hit-ratio", type=float, default=0.9, help="Fraction of calls that hit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON result file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.entries, args.lookups, args.hit_ratio, args.seed)
+    for name in ("legacy", "sqlite"):
+        row = results[name]
+        print(
+            f"{name:>7}: fill {row['fill_seconds']:.3f}s  "
+            f"{row['calls_per_second']:>10.1f} calls/s  "
+            f"p50 {row['latency_ms']['p50']:.3f}ms  p99 {row['latency_ms']['p99']:.3f}ms"
+        )
+    print(f"speedup: {results['speedup']}x")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
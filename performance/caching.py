@@ -1,61 +1,567 @@
 """Caching helpers for performance optimisation."""
 from __future__ import annotations
 
+import asyncio
+import dataclasses
 import functools
+import hashlib
+import inspect
 import json
-from pathlib import Path
-from typing import Any, Callable
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path, PurePath
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
 
+_SQLITE_HEADER = b"SQLite format 3\x00"
 
-def disk_cache(cache_file: Path) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-    """Simple disk cache decorator for deterministic functions."""
-    import threading
-    
-    _lock = threading.Lock()
+# Entry count and byte totals are maintained by triggers so limit checks never scan the table.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries(expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER,
+    bytes INTEGER
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - old.size + new.size WHERE id = 0;
+END;
+"""
+
+
+class DiskCache:
+    """SQLite (WAL) backed key/value cache with TTL and LRU eviction.
+
+    Lookups are a single primary-key read. Writes are atomic transactions, and WAL
+    mode lets readers in other threads and processes proceed while one writes.
+    Connections are opened lazily per thread and re-opened after ``fork``; call
+    :meth:`close` before forking workers from a process that has used the cache,
+    as SQLite connections must not cross ``fork``. Recency is
+    refreshed at most once per ``touch_resolution`` seconds per entry so hot keys
+    do not turn every hit into a write.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        touch_resolution: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0")
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_resolution = touch_resolution
+        self._clock = clock
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._retire_legacy_file()
+        # Use a throwaway connection: SQLite state must not be inherited across fork(), and
+        # caches are often created at import time in a parent of worker processes.
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _retire_legacy_file(self) -> None:
+        """Move aside a cache file written by the old whole-file JSON implementation.
+
+        The old file is kept next to the new one as ``<name>.legacy``.
+        """
+        try:
+            with self.path.open("rb") as handle:
+                header = handle.read(len(_SQLITE_HEADER))
+        except FileNotFoundError:
+            return
+        if header and header != _SQLITE_HEADER:
+            legacy = self.path.with_name(self.path.name + ".legacy")
+            os.replace(self.path, legacy)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Take the write lock up front so a read-then-write never fails to upgrade.
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(found, value)``; expired entries count as misses and are removed."""
+        started = time.perf_counter()
+        conn = self._connection()
+        now = self._clock()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        found, value = False, None
+        if row is not None:
+            raw, expires_at, accessed_at = row
+            if expires_at is not None and expires_at <= now:
+                with self._transaction() as txn:
+                    txn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            else:
+                found, value = True, json.loads(raw)
+                if now - accessed_at >= self.touch_resolution:
+                    with self._transaction() as txn:
+                        txn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._record_lookup(found, time.perf_counter() - started)
+        return found, value
+
+    def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        now = self._clock()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                (key, raw, len(raw), expires_at, now),
+            )
+            evicted = self._evict(conn, now)
+        with self._stats_lock:
+            self.stores += 1
+            self.evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+        entries, total_bytes = conn.execute(
+            "SELECT entries, bytes FROM totals WHERE id = 0"
+        ).fetchone()
+        if not self._over_limit(entries, total_bytes):
+            return 0
+        evicted = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+        entries, total_bytes = conn.execute(
+            "SELECT entries, bytes FROM totals WHERE id = 0"
+        ).fetchone()
+        while self._over_limit(entries, total_bytes):
+            batch = max(1, entries - self.max_entries) if self.max_entries is not None else 1
+            evicted += conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at, rowid LIMIT ?)",
+                (batch,),
+            ).rowcount
+            entries, total_bytes = conn.execute(
+                "SELECT entries, bytes FROM totals WHERE id = 0"
+            ).fetchone()
+        return evicted
+
+    def _over_limit(self, entries: int, total_bytes: int) -> bool:
+        return (self.max_entries is not None and entries > self.max_entries) or (
+            self.max_bytes is not None and total_bytes > self.max_bytes and entries > 0
+        )
+
+    def _record_lookup(self, hit: bool, elapsed: float) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.lookup_seconds += elapsed
+            self.max_lookup_seconds = max(self.max_lookup_seconds, elapsed)
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total_bytes = (
+            self._connection().execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        )
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total_bytes,
+                "avg_lookup_ms": self.lookup_seconds / lookups * 1000 if lookups else 0.0,
+                "max_lookup_ms": self.max_lookup_seconds * 1000,
+            }
+
+
+KeyHasher = Callable[[Tuple[Any, ...], Dict[str, Any]], str]
+
+
+def _tagged(value: Any) -> Any:
+    """Encode ``value`` so that distinct arguments never share a JSON representation.
+
+    Strings, numbers, booleans and ``None`` map to themselves (JSON keeps ``1``,
+    ``1.0``, ``"1"`` and ``true`` apart); every container and richer type is
+    wrapped in a single-key object naming its type, so e.g. a tuple and a list,
+    or ``{1: x}`` and ``{"1": x}``, hash differently.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, tuple):
+        return {"tuple": [_tagged(item) for item in value]}
+    if isinstance(value, list):
+        return {"list": [_tagged(item) for item in value]}
+    if isinstance(value, dict):
+        items = [[_tagged(k), _tagged(v)] for k, v in value.items()]
+        return {"dict": sorted(items, key=lambda item: json.dumps(item, sort_keys=True))}
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted(json.dumps(_tagged(item), sort_keys=True) for item in value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": bytes(value).hex()}
+    if isinstance(value, PurePath):
+        return {"path": str(value)}
+    if isinstance(value, Enum):
+        return {
+            "enum": f"{type(value).__module__}.{type(value).__qualname__}",
+            "value": _tagged(value.value),
+        }
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = {f.name: _tagged(getattr(value, f.name)) for f in dataclasses.fields(value)}
+        return {
+            "dataclass": f"{type(value).__module__}.{type(value).__qualname__}",
+            "fields": fields,
+        }
+    raise TypeError(
+        f"Cannot derive a cache key from {type(value).__name__}; pass a custom key hasher"
+    )
+
+
+def default_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    """Hash call arguments with a type-tagged canonical encoding (see ``_tagged``)."""
+    material = json.dumps([_tagged(args), _tagged(kwargs)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """A computation in progress that concurrent thread callers wait on."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TieredCache:
+    """In-process LRU (L1) over an optional :class:`DiskCache` (L2) with single-flight.
+
+    Concurrent misses on one key run the computation once: other threads block on
+    the leader's result, and other coroutines await it. Values served from L1 are
+    the cached objects themselves, as with ``functools.lru_cache``. Only JSON
+    serialisable values can use the disk tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        disk: Optional[DiskCache] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, "asyncio.Future[Any]"] = {}
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _get_memory(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            self.l1_hits += 1
+            return True, value
+
+    def _set_memory(self, key: str, value: Any) -> None:
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _get_disk(self, key: str) -> Tuple[bool, Any]:
+        if self.disk is None:
+            return False, None
+        found, value = self.disk.get(key)
+        if found:
+            with self._lock:
+                self.l2_hits += 1
+            self._set_memory(key, value)
+        return found, value
+
+    def _set_disk(self, key: str, value: Any) -> None:
+        if self.disk is None:
+            return
+        try:
+            self.disk.set(key, value)
+        except sqlite3.Error:
+            # Caching is best-effort; a locked or read-only database must not fail the call.
+            pass
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        found, value = self._get_memory(key)
+        if found:
+            return found, value
+        return self._get_disk(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._set_memory(key, value)
+        self._set_disk(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        found, value = self._get_memory(key)
+        if found:
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            found, value = self._get_disk(key)
+            if not found:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                self.set(key, value)
+            flight.value = value
+            return value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = self._get_memory(key)
+        if found:
+            return value
+        loop = asyncio.get_running_loop()
+        while True:
+            future = self._async_flights.get(key)
+            if future is None or future.get_loop() is not loop:
+                break
+            with self._lock:
+                self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: retry and let someone else lead.
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+
+        future = loop.create_future()
+        self._async_flights[key] = future
+        try:
+            found, value = (
+                await asyncio.to_thread(self._get_disk, key) if self.disk else (False, None)
+            )
+            if not found:
+                with self._lock:
+                    self.misses += 1
+                value = await compute()
+                self._set_memory(key, value)
+                if self.disk is not None:
+                    await asyncio.to_thread(self._set_disk, key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a flight without followers does not log a warning.
+            future.exception()
+            raise
+        finally:
+            if self._async_flights.get(key) is future:
+                del self._async_flights[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.l1_hits + self.l2_hits + self.misses
+            stats: Dict[str, Any] = {
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.l1_hits + self.l2_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+            }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+def memoize(
+    max_entries: int = 1024,
+    ttl: Optional[float] = None,
+    disk_path: Optional[Path] = None,
+    disk_max_entries: Optional[int] = None,
+    disk_max_bytes: Optional[int] = None,
+    key: KeyHasher = default_key,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Tiered, single-flight memoization for plain and ``async`` functions.
+
+    The wrapper exposes ``cache``, ``cache_info()`` and ``cache_clear()``.
+    """
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-        cache_file.parent.mkdir(parents=True, exist_ok=True)
-
-        @functools.wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=str)
-            
-            with _lock:
-                # Read cache once
-                if cache_file.exists():
-                    try:
-                        data = json.loads(cache_file.read_text(encoding="utf-8"))
-                    except (json.JSONDecodeError, OSError):
-                        data = {}
-                else:
-                    data = {}
-                
-                # Return cached value if exists
-                if key in data:
-                    return data[key]
-                
-                # Compute result outside lock
-            
-            result = func(*args, **kwargs)
-            
-            with _lock:
-                # Re-read cache in case it was updated
-                if cache_file.exists():
-                    try:
-                        data = json.loads(cache_file.read_text(encoding="utf-8"))
-                    except (json.JSONDecodeError, OSError):
-                        data = {}
-                else:
-                    data = {}
-                
-                data[key] = result
-                try:
-                    cache_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
-                except OSError:
-                    # Ignore write errors - cache is best-effort
-                    pass
-            return result
+        disk = (
+            DiskCache(disk_path, ttl=ttl, max_entries=disk_max_entries, max_bytes=disk_max_bytes)
+            if disk_path is not None
+            else None
+        )
+        cache = TieredCache(max_entries=max_entries, ttl=ttl, disk=disk)
+        prefix = f"{func.__module__}.{func.__qualname__}:"
+
+        if inspect.iscoroutinefunction(func):
 
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await cache.aget_or_compute(
+                    prefix + key(args, kwargs), lambda: func(*args, **kwargs)
+                )
+
+            wrapper: Any = async_wrapper
+        else:
+
+            @functools.wraps(func)
+            def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return cache.get_or_compute(
+                    prefix + key(args, kwargs), lambda: func(*args, **kwargs)
+                )
+
+            wrapper = sync_wrapper
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.stats
+        wrapper.cache_clear = cache.clear
         return wrapper
 
     return decorator
+
+
+def disk_cache(
+    cache_file: Path,
+    ttl: Optional[float] = None,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    memory_entries: int = 256,
+    key: KeyHasher = default_key,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Disk cache decorator for deterministic functions with JSON-serialisable results.
+
+    A thin :func:`memoize` configuration: hot keys are served from a small in-process
+    tier and concurrent misses on the same key compute once.
+    """
+    return memoize(
+        max_entries=memory_entries,
+        ttl=ttl,
+        disk_path=cache_file,
+        disk_max_entries=max_entries,
+        disk_max_bytes=max_bytes,
+        key=key,
+    )
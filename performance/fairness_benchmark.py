@@ -0,0 +1,149 @@
+"""Benchmark for the vectorized fairness engine.
+
+Generates ``--rows`` synthetic predictions with one or more protected attributes,
+times ``FairnessPipeline.evaluate`` and, on a ``--legacy-rows`` slice, the
+original per-group mask loops it replaced. ``--bootstrap`` also times the
+bootstrap confidence intervals.
+
+Usage::
+
+    python -m performance.fairness_benchmark --rows 100000000 --attributes 2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from governance.fairness_pipeline import FairnessPipeline, bootstrap_metrics  # noqa: E402
+
+
+def synthesize(rows: int, attributes: int, cardinality: int, seed: int = 7) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    columns = {
+        f"attribute_{index}": rng.integers(0, cardinality, rows, dtype=np.int8)
+        for index in range(attributes)
+    }
+    scores = rng.random(rows, dtype=np.float32)
+    labels = (rng.random(rows, dtype=np.float32) < scores).astype(np.int8)
+    predictions = (scores >= 0.5).astype(np.int8)
+    return {"labels": labels, "predictions": predictions, "groups": columns, "scores": scores}
+
+
+def legacy_evaluate(
+    labels: np.ndarray, predictions: np.ndarray, groups: np.ndarray
+) -> Dict[str, float]:
+    """The mask-per-group loops ``FairnessPipeline.evaluate`` used before vectorization."""
+    rates, fprs = {}, {}
+    for group in np.unique(groups):
+        mask = groups == group
+        rates[group] = predictions[mask].mean()
+    for group in np.unique(groups):
+        mask = groups == group
+        negatives = (labels[mask] == 0).sum()
+        fprs[group] = (
+            ((predictions[mask] == 1) & (labels[mask] == 0)).sum() / negatives if negatives else 0.0
+        )
+    top = max(rates.values())
+    return {
+        "demographic_parity": min(rates.values()) / top if top else 1.0,
+        "false_positive_rate_gap": 1 - (max(fprs.values()) - min(fprs.values())),
+    }
+
+
+def run_benchmark(
+    rows: int,
+    attributes: int,
+    cardinality: int,
+    legacy_rows: int,
+    bootstrap: int = 0,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    data = synthesize(rows, attributes, cardinality)
+    pipeline = FairnessPipeline(list(data["groups"]))
+    started = time.perf_counter()
+    metrics = pipeline.evaluate(data["labels"], data["predictions"], data["groups"], data["scores"])
+    seconds = time.perf_counter() - started
+    report: Dict[str, Any] = {
+        "rows": rows,
+        "attributes": attributes,
+        "groups": cardinality**attributes,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds),
+        "metrics": {metric.name: round(metric.value, 6) for metric in metrics},
+    }
+    if bootstrap:
+        statistics = pipeline.statistics(
+            data["labels"], data["predictions"], data["groups"], data["scores"]
+        )
+        started = time.perf_counter()
+        intervals = bootstrap_metrics(statistics, samples=bootstrap, workers=workers)
+        report["bootstrap"] = {
+            "samples": bootstrap,
+            "workers": workers,
+            "seconds": round(time.perf_counter() - started, 3),
+            "intervals": {
+                metric.name: [round(metric.lower, 6), round(metric.upper, 6)]
+                for metric in intervals
+            },
+        }
+    if legacy_rows:
+        subset = slice(0, min(legacy_rows, rows))
+        first = data["groups"]["attribute_0"][subset]
+        started = time.perf_counter()
+        legacy = legacy_evaluate(data["labels"][subset], data["predictions"][subset], first)
+        legacy_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        vectorized = FairnessPipeline("attribute_0").evaluate(
+            data["labels"][subset], data["predictions"][subset], first
+        )
+        vector_seconds = time.perf_counter() - started
+        report["legacy"] = {
+            "rows": subset.stop,
+            "legacy_seconds": round(legacy_seconds, 3),
+            "vectorized_seconds": round(vector_seconds, 3),
+            "speedup": round(legacy_seconds / vector_seconds, 1),
+            "max_difference": max(
+                abs(legacy[metric.name] - metric.value) for metric in vectorized[:2]
+            ),
+        }
+    return report
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized fairness engine.")
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument(
+        "--attributes", type=int, default=2, help="Protected attributes to intersect"
+    )
+    parser.add_argument("--cardinality", type=int, default=8, help="Distinct values per attribute")
+    parser.add_argument(
+        "--legacy-rows", type=int, default=10_000_000, help="Rows for the legacy comparison"
+    )
+    parser.add_argument(
+        "--bootstrap", type=int, default=10_000, help="Bootstrap resamples (0 to skip)"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes for bootstrap batches")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON result file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.rows, args.attributes, args.cardinality, args.legacy_rows, args.bootstrap, args.workers
+    )
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""Benchmark for the local hunting engine over synthetic AzureDiagnostics exports.
+
+Writes ``--megabytes`` of NDJSON (or scans an existing ``--input`` file), runs the
+per-model hunting queries plus a ``summarize`` query, and reports MB/s and how
+many lines predicate push-down kept away from the JSON decoder.
+
+Usage::
+
+    python -m performance.hunting_benchmark --megabytes 1024 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "soar-platform"))
+
+from automation.hunting_engine import HuntingEngine  # noqa: E402
+from automation.threat_hunting import generate_hunting_queries  # noqa: E402
+
+MODELS = ("gpt-4o", "gpt-35-turbo", "text-embedding-3-large", "dall-e-3", "whisper")
+OPERATIONS = ("ChatCompletions_Create", "Embeddings_Create", "ImageGenerations_Create")
+DEPLOYMENTS_PATH = "/PROVIDERS/MICROSOFT.COGNITIVESERVICES/ACCOUNTS/AOAI/DEPLOYMENTS/"
+
+
+def write_export(path: Path, megabytes: int, seed: int = 7) -> int:
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = lines = 0
+    with path.open("w", encoding="utf-8") as handle:
+        while written < target:
+            batch = []
+            for _ in range(10_000):
+                model = (
+                    MODELS[rng.randrange(len(MODELS))]
+                    if rng.random() < 0.9
+                    else f"custom-{rng.randrange(500)}"
+                )
+                batch.append(
+                    json.dumps(
+                        {
+                            "TimeGenerated": (
+                                f"2024-05-{rng.randrange(1, 29):02d}T{rng.randrange(24):02d}:00:00Z"
+                            ),
+                            "ResourceId": (
+                                f"/SUBSCRIPTIONS/{rng.randrange(20):04d}"
+                                f"{DEPLOYMENTS_PATH}{model.upper()}"
+                            ),
+                            "OperationName": OPERATIONS[rng.randrange(len(OPERATIONS))],
+                            "ResultType": "Blocked" if rng.random() < 0.01 else "Success",
+                            "CallerIPAddress": "10."
+                            + ".".join(str(rng.randrange(256)) for _ in range(3)),
+                            "DurationMs": rng.randrange(50, 5000),
+                        }
+                    )
+                )
+            chunk = "\n".join(batch) + "\n"
+            handle.write(chunk)
+            written += len(chunk)
+            lines += len(batch)
+    return lines
+
+
+def run_benchmark(path: Path, workers: int, model: str) -> Dict[str, Any]:
+    queries = [
+        query for query in generate_hunting_queries(model) if query.startswith("AzureDiagnostics")
+    ]
+    queries += [
+        f"AzureDiagnostics | where ResourceId contains '{model}' and ResultType == 'Blocked' "
+        "| summarize count() by OperationName",
+        "AzureDiagnostics | where ResultType != 'Success' "
+        "| summarize count() by ResourceId | take 10",
+    ]
+    results = []
+    with HuntingEngine({"AzureDiagnostics": [path]}, workers=workers) as engine:
+        for query in queries:
+            started = time.perf_counter()
+            result = engine.run(query)
+            results.append(
+                {
+                    "query": query,
+                    "rows": len(result.rows),
+                    "seconds": round(time.perf_counter() - started, 3),
+                    **result.stats,
+                }
+            )
+    return {"file_mb": round(path.stat().st_size / 1e6, 1), "workers": workers, "queries": results}
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the local KQL hunting engine.")
+    parser.add_argument(
+        "--input", type=Path, default=None, help="Existing AzureDiagnostics NDJSON export"
+    )
+    parser.add_argument("--megabytes", type=int, default=256, help="Size of the synthetic export")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON result file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input
+        if path is None:
+            path = Path(tmp) / "AzureDiagnostics.ndjson"
+            write_export(path, args.megabytes)
+        report = run_benchmark(path, args.workers or 0, args.model)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""Throughput benchmark for SOAR event ingestion with stub integrations.
+
+Pushes ``--events`` firewall-style events through ``EventIngestor`` into a
+``SOAROrchestrator`` running the bundled prompt-injection playbook, and reports
+sustained events/s plus queue-wait and processing latency. ``--journal`` runs
+the orchestrator in durable mode and adds the journal's group-commit stats.
+
+Usage::
+
+    python -m performance.soar_ingestion_benchmark --events 50000 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "soar-platform"))
+
+from orchestrator.ingestion import EventIngestor  # noqa: E402
+from orchestrator.journal import PlaybookJournal  # noqa: E402
+from orchestrator.workflow_engine import SOAROrchestrator  # noqa: E402
+
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+class StubIntegration:
+    """Zero-latency stand-in for PagerDuty, forensics storage, and Azure ML."""
+
+    async def trigger_incident(self, subject: str) -> None:
+        return None
+
+    async def collect(self, context: Dict[str, Any], incident_id: str | None = None) -> str:
+        return "stub://forensics"
+
+    async def quarantine_model(self, model_name: str) -> None:
+        return None
+
+
+async def run_benchmark(
+    events: int, workers: int, capacity: int, journal_path: Path | None = None
+) -> Dict[str, Any]:
+    playbook = yaml.safe_load(
+        (ROOT / "soar-platform" / "playbooks" / "prompt_injection_response.yaml").read_text(
+            encoding="utf-8"
+        )
+    )
+    stub = StubIntegration()
+    journal = PlaybookJournal(journal_path) if journal_path else None
+    orchestrator = SOAROrchestrator(
+        {playbook["incident_type"]: playbook},
+        {"pagerduty": stub, "forensics": stub, "ml": stub},
+        journal=journal,
+    )
+    ingestor = EventIngestor(orchestrator, workers=workers, capacity=capacity)
+    ingestor.start()
+    started = time.perf_counter()
+    for index in range(events):
+        await ingestor.submit(
+            {
+                "type": "PROMPT_INJECTION",
+                "severity": SEVERITIES[index % len(SEVERITIES)],
+                "context": {"user_id": f"user-{index % 1000}", "model_name": "gpt-4o"},
+            }
+        )
+    await ingestor.stop()
+    elapsed = time.perf_counter() - started
+    metrics = ingestor.metrics()
+    if journal is not None:
+        await journal.close()
+        metrics["journal"] = journal.stats()
+    metrics["events_per_second"] = round(events / elapsed, 1)
+    metrics["elapsed_seconds"] = round(elapsed, 3)
+    return metrics
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SOAR event ingestion throughput.")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--capacity", type=int, default=10_000)
+    parser.add_argument("--journal", type=Path, default=None, help="Write-ahead journal path")
+    parser.add_argument(
+        "--target", type=float, default=10_000, help="Fail below this many events/s"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON result file")
+    args = parser.parse_args(argv)
+
+    metrics = asyncio.run(run_benchmark(args.events, args.workers, args.capacity, args.journal))
+    print(json.dumps(metrics, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    return 0 if metrics["events_per_second"] >= args.target else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
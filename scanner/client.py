@@ -3,7 +3,9 @@ from __future__ import annotations
 
 import asyncio
 from dataclasses import dataclass
-from typing import Any, AsyncIterator, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from performance.caching import TieredCache, default_key
 
 try:
     from azure.identity.aio import DefaultAzureCredential
@@ -14,6 +16,9 @@ except ImportError:  # pragma: no cover - optional Azure SDK
     ResourceGraphClient = object  # type: ignore
     QueryRequest = object  # type: ignore
 
+# Shared across clients so concurrent scans of one subscription issue each query once.
+_QUERY_CACHE = TieredCache(max_entries=256, ttl=300.0)
+
 
 @dataclass
 class AzureQueryResult:
@@ -26,10 +31,11 @@ class AzureQueryResult:
 class AzureClient:
     """Wrapper around Azure SDKs with sane defaults and async support."""
 
-    def __init__(self, subscription_id: str) -> None:
+    def __init__(self, subscription_id: str, query_cache: Optional[TieredCache] = None) -> None:
         if not subscription_id or not subscription_id.strip():
             raise ValueError("subscription_id cannot be empty")
         self.subscription_id = subscription_id
+        self._query_cache = query_cache if query_cache is not None else _QUERY_CACHE
         self._credential = None
         self._resource_graph = None
 
@@ -51,14 +57,18 @@ class AzureClient:
         if self._credential and hasattr(self._credential, "close"):
             await self._credential.close()
 
-    async def query(self, query: str) -> AzureQueryResult:
-        """Execute an Azure Resource Graph query."""
+    async def _fetch(self, query: str) -> List[Dict[str, Any]]:
         await self._ensure_clients()
         request = QueryRequest(subscriptions=[self.subscription_id], query=query)
         response = await self._resource_graph.resources(request)  # type: ignore[call-arg]
         data = response.data if hasattr(response, "data") else []
-        count = len(data) if data else 0
-        return AzureQueryResult(data=list(data), total_records=count)
+        return list(data) if data else []
+
+    async def query(self, query: str) -> AzureQueryResult:
+        """Execute an Azure Resource Graph query, memoized per subscription and query text."""
+        key = default_key((self.subscription_id, query), {})
+        data = await self._query_cache.aget_or_compute(key, lambda: self._fetch(query))
+        return AzureQueryResult(data=list(data), total_records=len(data))
 
     async def list_azure_ai_resources(self) -> AsyncIterator[Dict[str, Any]]:
         """Yield Azure AI resources relevant to the scanner."""
@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Iterable, List, Optional
 
+from performance.caching import memoize
+
 Severity = str
 Resource = Dict[str, Any]
 
@@ -178,16 +180,25 @@ def load_rules(extra_rules: Optional[Iterable[Rule]] = None) -> List[Rule]:
 def load_rules_from_files(paths: Iterable[Path]) -> List[Rule]:
     """Load declarative rule definitions from YAML files."""
     try:
-        import yaml  # type: ignore
+        import yaml  # type: ignore  # noqa: F401
     except ImportError as exc:  # pragma: no cover - optional dependency
         raise RuntimeError("Install PyYAML to load custom rules from disk") from exc
 
     loaded: List[Rule] = []
     for path in paths:
-        with Path(path).open("r", encoding="utf-8") as handle:
-            payload = yaml.safe_load(handle) or []
-            if isinstance(payload, dict):
-                payload = [payload]
-            for item in payload:
-                loaded.append(from_yaml_rule(item))
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+        loaded.extend(_compile_rule_file(str(resolved), stat.st_mtime_ns, stat.st_size))
     return loaded
+
+
+@memoize(max_entries=128)
+def _compile_rule_file(path: str, mtime_ns: int, size: int) -> List[Rule]:
+    """Parse and compile one rule file; keyed on path, mtime and size so edits recompile."""
+    import yaml  # type: ignore
+
+    with Path(path).open("r", encoding="utf-8") as handle:
+        payload = yaml.safe_load(handle) or []
+    if isinstance(payload, dict):
+        payload = [payload]
+    return [from_yaml_rule(item) for item in payload]
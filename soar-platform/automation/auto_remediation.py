@@ -1,6 +1,362 @@
-"""Automated remediation tasks."""
+"""Automated remediation tasks, from single actions to bulk plans built from scan findings."""
 from __future__ import annotations
 
+import asyncio
+import inspect
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import httpx
+
+from performance.azure_http import parse_retry_after
+
+ARM_ENDPOINT = "https://management.azure.com"
+
+# Scanner rule -> remediation action. Rules without an entry need a human (e.g. choosing a key).
+DEFAULT_ACTIONS: Dict[str, str] = {
+    "OPENAI-001": "disable_public_network_access",
+    "COG-003": "deny_public_network_access",
+}
+
+# Action -> (HTTP method, path suffix, api-version, body) against the resource's ARM id.
+ACTION_REQUESTS: Dict[str, Tuple[str, str, str, Dict[str, Any]]] = {
+    "disable_public_network_access": (
+        "PATCH",
+        "",
+        "2023-05-01",
+        {"properties": {"publicNetworkAccess": "Disabled"}},
+    ),
+    "deny_public_network_access": (
+        "PATCH",
+        "",
+        "2023-05-01",
+        {"properties": {"networkAcls": {"defaultAction": "Deny"}}},
+    ),
+    "rotate_keys": ("POST", "/regenerateKey", "2023-05-01", {"keyName": "Key1"}),
+}
+
+TokenProvider = Callable[[], Union[str, Awaitable[str]]]
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
 
 async def rotate_keys(resource_id: str) -> dict[str, str]:
     return {"resource_id": resource_id, "action": "rotate_keys", "status": "completed"}
+
+
+class RemediationError(Exception):
+    """A management API call failed; ``retry_after`` is set when the API throttled us."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in (408, 429, 500, 502, 503, 504)
+
+
+def subscription_of(resource_id: str) -> str:
+    parts = [part for part in resource_id.split("/") if part]
+    for index, part in enumerate(parts[:-1]):
+        if part.lower() == "subscriptions":
+            return parts[index + 1]
+    return "unknown"
+
+
+@dataclass
+class RemediationTask:
+    action: str
+    resource_id: str
+    subscription_id: str
+    rule_ids: List[str] = field(default_factory=list)
+
+    @property
+    def task_id(self) -> str:
+        return f"{self.action}:{self.resource_id}"
+
+
+@dataclass
+class RemediationPlan:
+    tasks: List[RemediationTask]
+    manual: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "tasks": len(self.tasks),
+            "manual_findings": len(self.manual),
+            "by_action": dict(Counter(task.action for task in self.tasks)),
+            "by_subscription": dict(Counter(task.subscription_id for task in self.tasks)),
+        }
+
+
+def load_findings(path: Path) -> List[Dict[str, Any]]:
+    """Read findings from a scanner JSON report (``{"findings": [...]}``) or an NDJSON file."""
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        report = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return list(report["findings"] if isinstance(report, dict) else report)
+
+
+def build_plan(
+    findings: Iterable[Dict[str, Any]], actions: Mapping[str, str] = DEFAULT_ACTIONS
+) -> RemediationPlan:
+    """Group findings into one task per (action, resource); unmapped rules stay manual."""
+    tasks: Dict[Tuple[str, str], RemediationTask] = {}
+    manual: List[Dict[str, Any]] = []
+    for finding in findings:
+        action = actions.get(finding.get("rule_id", ""))
+        resource_id = finding.get("resource_id")
+        if not action or not resource_id:
+            manual.append(finding)
+            continue
+        key = (action, resource_id)
+        task = tasks.get(key)
+        if task is None:
+            task = tasks[key] = RemediationTask(action, resource_id, subscription_of(resource_id))
+        if finding["rule_id"] not in task.rule_ids:
+            task.rule_ids.append(finding["rule_id"])
+    ordered = sorted(
+        tasks.values(), key=lambda task: (task.action, task.subscription_id, task.resource_id)
+    )
+    return RemediationPlan(ordered, manual)
+
+
+class ManagementClient:
+    """Applies remediation actions through Azure Resource Manager."""
+
+    def __init__(
+        self,
+        token_provider: Optional[TokenProvider] = None,
+        endpoint: str = ARM_ENDPOINT,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self.token_provider = token_provider
+        self.endpoint = endpoint.rstrip("/")
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+
+    async def apply(self, action: str, resource_id: str) -> Dict[str, Any]:
+        if action not in ACTION_REQUESTS:
+            raise ValueError(f"Unsupported remediation action: {action}")
+        method, suffix, api_version, body = ACTION_REQUESTS[action]
+        headers = {"Content-Type": "application/json"}
+        if self.token_provider is not None:
+            token = self.token_provider()
+            if inspect.isawaitable(token):
+                token = await token
+            headers["Authorization"] = f"Bearer {token}"
+        try:
+            response = await self._client.request(
+                method,
+                f"{self.endpoint}{resource_id}{suffix}",
+                params={"api-version": api_version},
+                json=body,
+                headers=headers,
+            )
+        except httpx.TransportError as exc:
+            raise RemediationError(503, f"{type(exc).__name__}: {exc}") from exc
+        if response.status_code >= 400:
+            raise RemediationError(
+                response.status_code, response.text[:500], parse_retry_after(response.headers)
+            )
+        return {"status_code": response.status_code}
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+
+class _SubscriptionLimiter:
+    """Token bucket of ``rate`` calls per second (bursting to ``burst``) that a 429 can pause."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RemediationExecutor:
+    """Runs a remediation plan concurrently within per-subscription rate limits.
+
+    Every finished task is appended to ``checkpoint_path`` (NDJSON), and a later
+    run with the same checkpoint skips tasks that already completed, so an
+    interrupted run resumes where it stopped. ``dry_run`` reports the plan
+    without calling the management API.
+    """
+
+    def __init__(
+        self,
+        client: Optional[ManagementClient] = None,
+        concurrency: int = 32,
+        rate_per_subscription: float = 10.0,
+        burst: int = 10,
+        max_attempts: int = 4,
+        backoff: float = 1.0,
+        checkpoint_path: Optional[Path] = None,
+        progress: Optional[ProgressCallback] = None,
+        progress_every: int = 100,
+    ) -> None:
+        if concurrency <= 0 or max_attempts <= 0 or burst <= 0 or progress_every <= 0:
+            raise ValueError(
+                "concurrency, max_attempts, burst and progress_every must be greater than 0"
+            )
+        if rate_per_subscription <= 0:
+            raise ValueError("rate_per_subscription must be greater than 0")
+        self.client = client
+        self.concurrency = concurrency
+        self.rate_per_subscription = rate_per_subscription
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def completed_tasks(self) -> Dict[str, Dict[str, Any]]:
+        """Tasks the checkpoint records as completed, keyed by task id."""
+        completed: Dict[str, Dict[str, Any]] = {}
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return completed
+        with self.checkpoint_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a torn final line from an interrupted run
+                if record.get("status") == "completed":
+                    completed[record["task_id"]] = record
+        return completed
+
+    async def run(self, plan: RemediationPlan, dry_run: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        completed = self.completed_tasks()
+        pending = [task for task in plan.tasks if task.task_id not in completed]
+        if dry_run:
+            return {
+                "dry_run": True,
+                "plan": plan.summary(),
+                "already_completed": len(plan.tasks) - len(pending),
+                "pending": [
+                    {
+                        "task_id": task.task_id,
+                        "subscription_id": task.subscription_id,
+                        "rule_ids": task.rule_ids,
+                    }
+                    for task in pending
+                ],
+            }
+        if self.client is None:
+            raise RuntimeError("A ManagementClient is required unless dry_run is set")
+
+        limiters: Dict[str, _SubscriptionLimiter] = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts: Counter = Counter(resumed=len(plan.tasks) - len(pending))
+        failures: List[Dict[str, Any]] = []
+        checkpoint = None
+        if self.checkpoint_path is not None:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint = self.checkpoint_path.open("a+", encoding="utf-8")
+            if checkpoint.tell():
+                checkpoint.seek(checkpoint.tell() - 1)
+                if checkpoint.read(1) != "\n":
+                    checkpoint.write("\n")  # terminate a torn line before appending
+
+        def report() -> Dict[str, Any]:
+            elapsed = time.perf_counter() - started
+            done = counts["completed"] + counts["failed"]
+            rate = done / elapsed if elapsed else 0.0
+            return {
+                "total": len(plan.tasks),
+                "resumed": counts["resumed"],
+                "completed": counts["completed"],
+                "failed": counts["failed"],
+                "remaining": len(pending) - done,
+                "throttled": counts["throttled"],
+                "elapsed_seconds": round(elapsed, 3),
+                "tasks_per_second": round(rate, 1),
+                "eta_seconds": round((len(pending) - done) / rate, 1) if rate else None,
+            }
+
+        async def execute(task: RemediationTask) -> None:
+            limiter = limiters.setdefault(
+                task.subscription_id, _SubscriptionLimiter(self.rate_per_subscription, self.burst)
+            )
+            async with semaphore:
+                attempts, error = 0, None
+                while attempts < self.max_attempts:
+                    attempts += 1
+                    await limiter.acquire()
+                    try:
+                        await self.client.apply(task.action, task.resource_id)
+                        error = None
+                        break
+                    except RemediationError as exc:
+                        error = exc
+                        if exc.status_code == 429:
+                            counts["throttled"] += 1
+                            limiter.pause(
+                                exc.retry_after if exc.retry_after is not None else self.backoff
+                            )
+                        if not exc.retryable or attempts >= self.max_attempts:
+                            break
+                        await asyncio.sleep(min(30.0, self.backoff * 2 ** (attempts - 1)))
+                    except Exception as exc:
+                        # A token or URL problem fails this task only; the others keep going.
+                        error = exc
+                        break
+            status = "completed" if error is None else "failed"
+            counts[status] += 1
+            record = {"task_id": task.task_id, "status": status, "attempts": attempts}
+            if isinstance(error, RemediationError):
+                record["error"] = f"HTTP {error.status_code}: {error.detail}"
+            elif error is not None:
+                record["error"] = f"{type(error).__name__}: {error}"
+            if error is not None:
+                failures.append(record)
+            if checkpoint is not None:
+                checkpoint.write(json.dumps(record) + "\n")
+                checkpoint.flush()
+            if (
+                self.progress is not None
+                and (counts["completed"] + counts["failed"]) % self.progress_every == 0
+            ):
+                self.progress(report())
+
+        try:
+            await asyncio.gather(*(execute(task) for task in pending))
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        result = {"dry_run": False, **report(), "failures": failures}
+        if self.progress is not None:
+            self.progress(report())
+        return result
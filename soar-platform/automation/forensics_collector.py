@@ -1,17 +1,303 @@
-"""Collect forensic telemetry for incidents."""
+"""Collect forensic evidence for incidents into a compressed, content-addressed store."""
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, UTC
 from pathlib import Path
-from typing import Dict
+from typing import Any, AsyncIterable, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# Context fields stored as their own artifacts rather than inline in the context record.
+ARTIFACT_FIELDS = ("prompt", "response", "completion", "transcript", "logs")
+INLINE_LIMIT = 4096
+
+EvidenceSource = Union[bytes, str, Path, Iterable[bytes], AsyncIterable[bytes]]
+
+
+class _ObjectWriter:
+    """Hashes, compresses and writes one object to a temporary file, chunk by chunk."""
+
+    def __init__(self, path: Path, compression: str, level: Optional[int]) -> None:
+        self.path = path
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._raw = path.open("wb")
+        self._stream: BinaryIO
+        if compression == "gzip":
+            self._stream = gzip.GzipFile(
+                fileobj=self._raw, mode="wb", compresslevel=level or 6, mtime=0
+            )
+        elif compression == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(
+                self._raw, closefd=False
+            )
+        else:
+            self._stream = self._raw
+
+    def write(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        self._stream.write(chunk)
+
+    def close(self) -> int:
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        stored = self._raw.tell()
+        self._raw.close()
+        return stored
+
+
+class EvidenceStore:
+    """Content-addressed evidence objects plus a SQLite manifest of what belongs to which incident.
+
+    Objects live under ``objects/<aa>/<sha256>`` keyed by the digest of their
+    uncompressed content, so evidence shared by many incidents is stored once.
+    Reading, hashing, compressing and writing happen in worker threads in
+    ``chunk_size`` pieces, so the event loop never blocks and memory stays flat
+    for large artifacts.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        compression: str = "gzip",
+        level: Optional[int] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported evidence compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("Install zstandard to use zstd evidence compression")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than 0")
+        self.root = Path(root)
+        self.compression = compression
+        self.level = level
+        self.chunk_size = chunk_size
+        self._objects = self.root / "objects"
+        self._tmp = self.root / "tmp"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.root / "manifest.sqlite", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, "
+                "size INTEGER NOT NULL, stored_size INTEGER NOT NULL, "
+                "compression TEXT NOT NULL, created_at TEXT NOT NULL)"
+            )
+            # Append-only: collecting the same name again adds a row and never replaces one.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS evidence (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "incident_id TEXT NOT NULL, name TEXT NOT NULL, "
+                "digest TEXT NOT NULL REFERENCES objects(digest), content_type TEXT, "
+                "collected_at TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS evidence_incident ON evidence(incident_id)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS evidence_digest ON evidence(digest)")
+        self.bytes_in = 0
+        self.bytes_stored = 0
+        self.objects_written = 0
+        self.deduplicated = 0
+        self.seconds = 0.0
+
+    def object_path(self, digest: str, compression: Optional[str] = None) -> Path:
+        suffix = COMPRESSIONS[compression or self.compression]
+        return self._objects / digest[:2] / f"{digest}{suffix}"
+
+    async def put(
+        self,
+        incident_id: str,
+        name: str,
+        source: EvidenceSource,
+        content_type: str = "application/octet-stream",
+    ) -> Dict[str, Any]:
+        """Store ``source`` as evidence ``name`` of ``incident_id``; return its manifest entry."""
+        started = time.perf_counter()
+        writer = _ObjectWriter(self._tmp / uuid.uuid4().hex, self.compression, self.level)
+        try:
+            if isinstance(source, (bytes, str, Path)):
+                await asyncio.to_thread(self._write_all, writer, source)
+            else:
+                if hasattr(source, "__aiter__"):
+                    async for chunk in source:
+                        await asyncio.to_thread(writer.write, chunk)
+                else:
+                    await asyncio.to_thread(self._write_all, writer, source)
+            entry = await asyncio.to_thread(self._commit, writer, incident_id, name, content_type)
+        except BaseException:
+            writer.path.unlink(missing_ok=True)
+            raise
+        self.seconds += time.perf_counter() - started
+        return entry
+
+    def _write_all(
+        self, writer: _ObjectWriter, source: Union[bytes, str, Path, Iterable[bytes]]
+    ) -> None:
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        if isinstance(source, bytes):
+            view = memoryview(source)
+            for offset in range(0, len(view), self.chunk_size):
+                writer.write(view[offset : offset + self.chunk_size])
+        elif isinstance(source, Path):
+            with source.open("rb") as handle:
+                for chunk in iter(lambda: handle.read(self.chunk_size), b""):
+                    writer.write(chunk)
+        else:
+            for chunk in source:
+                writer.write(chunk)
+
+    def _commit(
+        self, writer: _ObjectWriter, incident_id: str, name: str, content_type: str
+    ) -> Dict[str, Any]:
+        stored_size = writer.close()
+        digest = writer.digest.hexdigest()
+        target = self.object_path(digest)
+        now = datetime.now(UTC).isoformat()
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM objects WHERE digest = ?", (digest,)
+            ).fetchone()
+            if known is not None and target.exists():
+                writer.path.unlink()
+                self.deduplicated += 1
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(writer.path, target)
+                self.objects_written += 1
+                self.bytes_stored += stored_size
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO objects VALUES (?, ?, ?, ?, ?)",
+                    (digest, writer.size, stored_size, self.compression, now),
+                )
+                self._conn.execute(
+                    "INSERT INTO evidence (incident_id, name, digest, content_type, collected_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (incident_id, name, digest, content_type, now),
+                )
+        self.bytes_in += writer.size
+        return {"incident_id": incident_id, "name": name, "digest": digest, "size": writer.size}
+
+    def evidence(self, incident_id: str) -> List[Dict[str, Any]]:
+        """Manifest entries for an incident, in collection order, including re-collections."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.name, e.digest, e.content_type, e.collected_at, o.size, o.stored_size "
+                "FROM evidence e JOIN objects o USING (digest) "
+                "WHERE e.incident_id = ? ORDER BY e.id",
+                (incident_id,),
+            ).fetchall()
+        return [
+            {
+                "name": name,
+                "digest": digest,
+                "content_type": content_type,
+                "collected_at": collected_at,
+                "size": size,
+                "stored_size": stored_size,
+            }
+            for name, digest, content_type, collected_at, size, stored_size in rows
+        ]
+
+    def incidents_for(self, digest: str) -> List[str]:
+        """Incidents that reference an evidence object."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT incident_id FROM evidence WHERE digest = ?", (digest,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_object(self, digest: str) -> Iterator[bytes]:
+        """Yield an object's decompressed content in ``chunk_size`` pieces."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT compression FROM objects WHERE digest = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        compression = row[0]
+        with self.object_path(digest, compression).open("rb") as raw:
+            if compression == "gzip":
+                stream: BinaryIO = gzip.GzipFile(fileobj=raw, mode="rb")
+            elif compression == "zstd":
+                if zstandard is None:  # pragma: no cover - optional dependency
+                    raise RuntimeError("Install zstandard to read zstd evidence")
+                stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            else:
+                stream = raw
+            yield from iter(lambda: stream.read(self.chunk_size), b"")
+
+    async def read(self, digest: str) -> bytes:
+        return await asyncio.to_thread(lambda: b"".join(self.iter_object(digest)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_stored": self.bytes_stored,
+            "objects_written": self.objects_written,
+            "deduplicated": self.deduplicated,
+            "compression_ratio": self.bytes_in / self.bytes_stored if self.bytes_stored else 0.0,
+            "throughput_mb_s": self.bytes_in / self.seconds / 1e6 if self.seconds else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
 
 class ForensicsCollector:
-    def __init__(self, storage_dir: Path) -> None:
-        self.storage_dir = storage_dir
+    """Stores incident context as JSON evidence, with large fields as separate artifacts."""
+
+    def __init__(
+        self, storage_dir: Path, store: Optional[EvidenceStore] = None, compression: str = "gzip"
+    ) -> None:
+        self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.store = store or EvidenceStore(self.storage_dir, compression=compression)
+
+    async def collect(self, context: Dict[str, Any], incident_id: Optional[str] = None) -> str:
+        """Store the context and return an ``evidence://`` URI for its JSON record.
+
+        ``incident_id`` defaults to the context's own ``incident_id`` field.
+        """
+        incident_id = str(incident_id or context.get("incident_id", "unknown"))
+        record = dict(context)
+        for field, value in context.items():
+            text = value if isinstance(value, (str, bytes)) else None
+            if text is not None and (field in ARTIFACT_FIELDS or len(text) > INLINE_LIMIT):
+                entry = await self.store.put(incident_id, field, text, content_type="text/plain")
+                record[field] = {"evidence": entry["digest"], "size": entry["size"]}
+        body = json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+        entry = await self.store.put(incident_id, "context", body, content_type="application/json")
+        return f"evidence://{incident_id}/{entry['digest']}"
 
-    async def collect(self, context: Dict[str, str]) -> str:
-        incident_id = context.get("incident_id", "unknown")
-        path = self.storage_dir / f"{incident_id}-forensics.json"
-        path.write_text(str(context), encoding="utf-8")
-        return str(path)
+    async def collect_artifact(
+        self,
+        incident_id: str,
+        name: str,
+        source: EvidenceSource,
+        content_type: str = "application/octet-stream",
+    ) -> Dict[str, Any]:
+        """Stream a large artifact (a log export, a model response dump) into the store."""
+        return await self.store.put(incident_id, name, source, content_type)
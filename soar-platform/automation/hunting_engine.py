@@ -0,0 +1,349 @@
+"""Local engine for a KQL subset over exported NDJSON telemetry."""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<op>==|!=|=~|\||,|\(|\))
+      | (?P<word>!?[A-Za-z_][A-Za-z0-9_.\-]*|\d+)
+    )""",
+    re.VERBOSE,
+)
+
+OPERATORS = ("has", "!has", "contains", "!contains", "==", "!=", "=~")
+
+# Literals made only of these characters appear verbatim in any JSON encoding of a
+# string containing them, so they can be searched for in the raw bytes.
+_PUSHDOWN_SAFE = re.compile(r"[A-Za-z0-9 _.:@\-]+")
+
+
+@dataclass(frozen=True)
+class Predicate:
+    column: str
+    op: str
+    value: str
+
+    def matches(self, record: Mapping[str, Any]) -> bool:
+        raw = record.get(self.column)
+        if raw is None:
+            text = ""
+        elif isinstance(raw, str):
+            text = raw
+        else:
+            text = json.dumps(raw, default=str)
+        op = self.op.lstrip("!")
+        if op == "has":
+            found = _term_pattern(self.value).search(text) is not None
+        elif op == "contains":
+            found = self.value.lower() in text.lower()
+        elif op == "=~":
+            found = text.lower() == self.value.lower()
+        else:
+            found = text == self.value
+        return not found if self.op.startswith("!") or self.op == "!=" else found
+
+    @property
+    def needle(self) -> Optional[bytes]:
+        """Lower-cased bytes every matching line must contain, if the predicate allows push-down."""
+        if (
+            self.op in ("has", "contains", "==", "=~")
+            and self.value
+            and _PUSHDOWN_SAFE.fullmatch(self.value)
+        ):
+            return self.value.lower().encode("ascii")
+        return None
+
+
+_TERM_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+
+def _term_pattern(term: str) -> "re.Pattern[str]":
+    # ``has`` matches whole terms: the value must not be glued to other alphanumerics.
+    pattern = _TERM_PATTERNS.get(term)
+    if pattern is None:
+        pattern = re.compile(rf"(?<![0-9A-Za-z_]){re.escape(term)}(?![0-9A-Za-z_])", re.IGNORECASE)
+        _TERM_PATTERNS[term] = pattern
+    return pattern
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """A parsed query: ``Table | where ... | project ... | summarize count() by ... | take n``."""
+
+    table: str
+    predicates: Tuple[Predicate, ...] = ()
+    project: Tuple[str, ...] = ()
+    summarize_by: Optional[Tuple[str, ...]] = None
+    take: Optional[int] = None
+
+    @property
+    def needles(self) -> Tuple[bytes, ...]:
+        """Push-down needles, most selective (longest) first."""
+        found = {predicate.needle for predicate in self.predicates} - {None}
+        return tuple(sorted(found, key=len, reverse=True))
+
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected input at {position}: {query[position:position + 20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "string":
+            text = re.sub(r"\\(.)", r"\1", text[1:-1])
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+def _split_stages(tokens: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    stages: List[List[Tuple[str, str]]] = [[]]
+    for token in tokens:
+        if token == ("op", "|"):
+            stages.append([])
+        else:
+            stages[-1].append(token)
+    return stages
+
+
+def _columns(tokens: List[Tuple[str, str]], operator: str) -> Tuple[str, ...]:
+    names = [text for kind, text in tokens if kind == "word"]
+    if not names or any(text != "," for kind, text in tokens if kind == "op"):
+        raise ValueError(f"{operator} expects a comma-separated list of columns")
+    return tuple(names)
+
+
+def parse_query(query: str) -> QueryPlan:
+    """Parse the supported KQL subset, rejecting anything else with ``ValueError``."""
+    stages = _split_stages(_tokenize(query))
+    head = stages[0]
+    if len(head) != 1 or head[0][0] != "word":
+        raise ValueError("A query must start with a table name")
+    table = head[0][1]
+    predicates: List[Predicate] = []
+    project: Tuple[str, ...] = ()
+    summarize_by: Optional[Tuple[str, ...]] = None
+    take: Optional[int] = None
+    order = {"where": 0, "project": 1, "summarize": 2, "take": 3, "limit": 3}
+    last = 0
+    for stage in stages[1:]:
+        if not stage or stage[0][0] != "word" or stage[0][1] not in order:
+            raise ValueError(
+                f"Unsupported operator: {' '.join(text for _, text in stage) or '<empty>'}"
+            )
+        operator, rest = stage[0][1], stage[1:]
+        if order[operator] < last or (order[operator] == last and operator != "where" and last):
+            raise ValueError(f"{operator} cannot follow the earlier stages in this query")
+        last = order[operator]
+        if operator == "where":
+            clauses: List[List[Tuple[str, str]]] = [[]]
+            for token in rest:
+                if token == ("word", "and"):
+                    clauses.append([])
+                else:
+                    clauses[-1].append(token)
+            for clause in clauses:
+                if len(clause) != 3 or clause[0][0] != "word" or clause[2][0] != "string":
+                    raise ValueError("where expects `Column <op> 'value'` clauses joined by `and`")
+                if clause[1][1] not in OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {clause[1][1]}")
+                predicates.append(Predicate(clause[0][1], clause[1][1], clause[2][1]))
+        elif operator == "project":
+            project = _columns(rest, "project")
+        elif operator == "summarize":
+            words = [text for _, text in rest[:3]]
+            if words != ["count", "(", ")"]:
+                raise ValueError(
+                    "Only `summarize count()` and `summarize count() by ...` are supported"
+                )
+            by = rest[3:]
+            if by and by[0] == ("word", "by"):
+                summarize_by = _columns(by[1:], "summarize by")
+            elif by:
+                raise ValueError("summarize count() may only be followed by `by <columns>`")
+            else:
+                summarize_by = ()
+        else:
+            if len(rest) != 1 or not rest[0][1].isdigit():
+                raise ValueError(f"{operator} expects a row count")
+            take = int(rest[0][1])
+    return QueryPlan(table, tuple(predicates), project, summarize_by, take)
+
+
+@dataclass
+class HuntResult:
+    query: str
+    rows: List[Dict[str, Any]]
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+def _line_start(data: Any, start: int) -> int:
+    """First line that begins at or after ``start``; lines belong to the chunk they start in."""
+    if start == 0:
+        return 0
+    newline = data.find(b"\n", start - 1)
+    return len(data) if newline < 0 else newline + 1
+
+
+def _scan_range(path: str, start: int, end: int, plan: QueryPlan) -> Tuple[Any, Dict[str, int]]:
+    """Scan the lines starting in ``[start, end)`` of one file; runs in a worker process."""
+    stats = {"bytes": 0, "lines": 0, "parsed": 0, "matched": 0}
+    rows: List[Dict[str, Any]] = []
+    counts: Counter = Counter()
+    limit = plan.take if plan.summarize_by is None else None
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return (counts if plan.summarize_by is not None else rows), stats
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            first = _line_start(data, start)
+            if first >= end:
+                return (counts if plan.summarize_by is not None else rows), stats
+            stop = data.find(b"\n", end - 1)
+            stop = len(data) if stop < 0 else stop + 1
+            buffer = data[first:stop]
+    stats["bytes"] = len(buffer)
+    stats["lines"] = buffer.count(b"\n") + (0 if buffer.endswith(b"\n") else 1)
+
+    needles = plan.needles
+    if needles:
+        # Predicate push-down: only lines containing the most selective literal are parsed.
+        haystack = buffer.lower()
+        lead, others = needles[0], needles[1:]
+
+        def candidates() -> Iterable[bytes]:
+            index = haystack.find(lead)
+            while index >= 0:
+                line_start = buffer.rfind(b"\n", 0, index) + 1
+                line_end = buffer.find(b"\n", index)
+                line_end = len(buffer) if line_end < 0 else line_end
+                if all(needle in haystack[line_start:line_end] for needle in others):
+                    yield buffer[line_start:line_end]
+                index = haystack.find(lead, line_end)
+
+        lines: Iterable[bytes] = candidates()
+    else:
+        lines = buffer.split(b"\n")
+
+    for line in lines:
+        if not line.strip():
+            continue
+        stats["parsed"] += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict) or not all(p.matches(record) for p in plan.predicates):
+            continue
+        stats["matched"] += 1
+        if plan.summarize_by is not None:
+            counts[tuple(_group_value(record.get(column)) for column in plan.summarize_by)] += 1
+            continue
+        rows.append(
+            {column: record.get(column) for column in plan.project} if plan.project else record
+        )
+        if limit is not None and len(rows) >= limit:
+            break
+    return (counts if plan.summarize_by is not None else rows), stats
+
+
+def _group_value(value: Any) -> Any:
+    return (
+        json.dumps(value, sort_keys=True, default=str) if isinstance(value, (dict, list)) else value
+    )
+
+
+class HuntingEngine:
+    """Runs hunting queries over NDJSON exports, one table per set of files.
+
+    Files are split into ``chunk_bytes`` ranges scanned in parallel by a process
+    pool; inputs smaller than one chunk are scanned in-process. Literal ``has``,
+    ``contains`` and equality predicates are pushed down to a byte search over
+    each chunk, so only candidate lines are JSON-decoded.
+    """
+
+    def __init__(
+        self,
+        sources: Mapping[str, Sequence[Path]],
+        workers: Optional[int] = None,
+        chunk_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        if chunk_bytes <= 0:
+            raise ValueError("chunk_bytes must be greater than 0")
+        self.sources = {table: [Path(path) for path in paths] for table, paths in sources.items()}
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _ranges(self, table: str) -> List[Tuple[str, int, int]]:
+        if table not in self.sources:
+            raise ValueError(f"No exported data registered for table {table}")
+        ranges = []
+        for path in self.sources[table]:
+            size = path.stat().st_size
+            for start in range(0, max(size, 1), self.chunk_bytes):
+                ranges.append((str(path), start, min(start + self.chunk_bytes, size)))
+        return ranges
+
+    def run(self, query: str) -> HuntResult:
+        plan = parse_query(query)
+        ranges = self._ranges(plan.table)
+        started = time.perf_counter()
+        if self.workers > 1 and len(ranges) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [
+                self._pool.submit(_scan_range, path, start, end, plan)
+                for path, start, end in ranges
+            ]
+            partials = [future.result() for future in futures]
+        else:
+            partials = [_scan_range(path, start, end, plan) for path, start, end in ranges]
+
+        totals: Counter = Counter()
+        for _, stats in partials:
+            totals.update(stats)
+        if plan.summarize_by is not None:
+            counts: Counter = Counter()
+            for partial, _ in partials:
+                counts.update(partial)
+            rows = [
+                {**dict(zip(plan.summarize_by, key)), "count_": count}
+                for key, count in counts.most_common()
+            ]
+        else:
+            rows = [row for partial, _ in partials for row in partial]
+        if plan.take is not None:
+            rows = rows[: plan.take]
+        elapsed = time.perf_counter() - started
+        stats = {
+            **{key: totals.get(key, 0) for key in ("bytes", "lines", "parsed", "matched")},
+            "chunks": len(ranges),
+            "elapsed_seconds": round(elapsed, 4),
+            "mb_per_second": round(totals["bytes"] / elapsed / 1e6, 1) if elapsed else 0.0,
+        }
+        return HuntResult(query, rows, stats)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "HuntingEngine":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -1,11 +1,22 @@
 """Threat hunting routines for AI workloads."""
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
+
+from .hunting_engine import HuntingEngine, HuntResult
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
 
 def generate_hunting_queries(model_name: str) -> List[str]:
     return [
-        f"SecurityAlert | where Entities has '{model_name}'",
-        f"AzureDiagnostics | where ResourceId contains '{model_name}'",
+        f"SecurityAlert | where Entities has {_quote(model_name)}",
+        f"AzureDiagnostics | where ResourceId contains {_quote(model_name)}",
     ]
+
+
+def hunt(model_name: str, engine: HuntingEngine) -> Dict[str, HuntResult]:
+    """Run the generated queries for a model against locally exported telemetry."""
+    return {query: engine.run(query) for query in generate_hunting_queries(model_name)}
@@ -0,0 +1,336 @@
+"""Batched, retrying outbound delivery shared by the SOAR integrations."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set
+
+import httpx
+
+from performance.azure_http import parse_retry_after
+
+# Statuses after which the receiver did not accept the batch and a retry may succeed.
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+RequestBuilder = Callable[[List[Any]], Dict[str, Any]]
+
+
+class DeliveryError(Exception):
+    """Raised by :meth:`DeliveryService.deliver` when an item was dead-lettered."""
+
+
+@dataclass
+class Destination:
+    """Where and how a kind of notification is delivered.
+
+    ``build_request`` turns a batch of items into keyword arguments for
+    ``httpx.AsyncClient.post`` and is called again on every attempt, so
+    time-based signatures stay fresh. Items queue for ``batch_window`` seconds
+    and up to ``max_batch`` of them share a request. Items with the same
+    ``coalesce_key`` that are still queued collapse into the latest one.
+    """
+
+    name: str
+    url: str
+    build_request: RequestBuilder
+    batch_window: float = 0.0
+    max_batch: int = 1
+    coalesce_key: Optional[Callable[[Any], Hashable]] = None
+    rate_per_second: Optional[float] = None
+    concurrency: int = 4
+    max_attempts: int = 5
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    capacity: int = 10_000
+
+    def __post_init__(self) -> None:
+        if (
+            self.max_batch <= 0
+            or self.concurrency <= 0
+            or self.max_attempts <= 0
+            or self.capacity <= 0
+        ):
+            raise ValueError(
+                "max_batch, concurrency, max_attempts and capacity must be greater than 0"
+            )
+        if self.batch_window < 0:
+            raise ValueError("batch_window must not be negative")
+        if self.rate_per_second is not None and self.rate_per_second <= 0:
+            raise ValueError("rate_per_second must be greater than 0")
+
+
+@dataclass
+class _Entry:
+    item: Any
+    enqueued: float
+    key: Optional[Hashable]
+    futures: List[asyncio.Future] = field(default_factory=list)
+
+
+class _Lane:
+    """Queue, worker and counters for one destination."""
+
+    def __init__(self, destination: Destination) -> None:
+        self.destination = destination
+        self.queue: Deque[_Entry] = deque()
+        self.by_key: Dict[Hashable, _Entry] = {}
+        self.wakeup = asyncio.Event()
+        self.slots = asyncio.Semaphore(destination.concurrency)
+        self.worker: Optional[asyncio.Task] = None
+        self.in_flight: Set[asyncio.Task] = set()
+        self.paused_until = 0.0
+        self.next_slot = 0.0
+        self.latencies: Deque[float] = deque(maxlen=1024)
+        self.submitted = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.retries = 0
+        self.throttled = 0
+        self.dead_lettered = 0
+
+
+class DeliveryService:
+    """Delivers notifications through one pooled HTTP client.
+
+    Each registered :class:`Destination` gets its own queue and worker. Failed
+    requests are retried with exponential backoff; a 429 pauses the whole
+    destination for its ``Retry-After``. Batches that exhaust their attempts or
+    get a non-retryable status are dead-lettered: kept in :attr:`dead_letters`
+    and, with ``dead_letter_path``, appended to an NDJSON file.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        dead_letter_path: Optional[Path] = None,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+    ) -> None:
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=1000)
+        self._dead_letter_lock = threading.Lock()
+        self._dead_letter_writes: Set[asyncio.Task] = set()
+        self._lanes: Dict[str, _Lane] = {}
+        self._closing = False
+
+    def register(self, destination: Destination) -> str:
+        if destination.name in self._lanes:
+            raise ValueError(f"Destination {destination.name!r} is already registered")
+        self._lanes[destination.name] = _Lane(destination)
+        return destination.name
+
+    def submit(self, name: str, item: Any) -> asyncio.Future:
+        """Queue an item; the future resolves to True once delivered, False if dead-lettered."""
+        lane = self._lanes[name]
+        future = asyncio.get_running_loop().create_future()
+        lane.submitted += 1
+        destination = lane.destination
+        key = destination.coalesce_key(item) if destination.coalesce_key else None
+        entry = lane.by_key.get(key) if key is not None else None
+        if entry is not None:
+            entry.item = item
+            entry.futures.append(future)
+            lane.coalesced += 1
+            return future
+        if len(lane.queue) >= destination.capacity:
+            batch = [_Entry(item, time.monotonic(), key, [future])]
+            write = asyncio.create_task(self._dead_letter(lane, batch, "queue full", 0))
+            self._dead_letter_writes.add(write)
+            write.add_done_callback(self._dead_letter_writes.discard)
+            return future
+        entry = _Entry(item, time.monotonic(), key, [future])
+        lane.queue.append(entry)
+        if key is not None:
+            lane.by_key[key] = entry
+        if lane.worker is None:
+            lane.worker = asyncio.create_task(self._run(lane))
+        lane.wakeup.set()
+        return future
+
+    async def deliver(self, name: str, item: Any) -> None:
+        """Queue an item and wait for it, raising :class:`DeliveryError` if it is dead-lettered."""
+        if not await self.submit(name, item):
+            raise DeliveryError(f"Delivery to {name} failed; item was dead-lettered")
+
+    async def _run(self, lane: _Lane) -> None:
+        destination = lane.destination
+        try:
+            while True:
+                if not lane.queue:
+                    if self._closing:
+                        return
+                    await lane.wakeup.wait()
+                lane.wakeup.clear()
+                if destination.batch_window and not self._closing:
+                    # The window opens with the first queued item; later ones ride along.
+                    await asyncio.sleep(destination.batch_window)
+                while lane.queue:
+                    batch = [
+                        lane.queue.popleft()
+                        for _ in range(min(destination.max_batch, len(lane.queue)))
+                    ]
+                    for entry in batch:
+                        if entry.key is not None:
+                            lane.by_key.pop(entry.key, None)
+                    await lane.slots.acquire()
+                    task = asyncio.create_task(self._send(lane, batch))
+                    lane.in_flight.add(task)
+                    task.add_done_callback(lane.in_flight.discard)
+        finally:
+            lane.worker = None
+
+    async def _throttle(self, lane: _Lane) -> None:
+        rate = lane.destination.rate_per_second
+        while True:
+            now = time.monotonic()
+            wait = max(lane.paused_until, lane.next_slot) - now
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        if rate:
+            lane.next_slot = max(now, lane.next_slot) + 1.0 / rate
+
+    async def _send(self, lane: _Lane, batch: List[_Entry]) -> None:
+        destination = lane.destination
+        items = [entry.item for entry in batch]
+        attempts = 0
+        try:
+            while True:
+                attempts += 1
+                await self._throttle(lane)
+                lane.requests += 1
+                retry_after = None
+                try:
+                    response = await self._client.post(
+                        destination.url, **destination.build_request(items)
+                    )
+                except httpx.TransportError as exc:
+                    retryable, error = True, f"{type(exc).__name__}: {exc}"
+                except Exception as exc:
+                    # A bad URL, key or request builder fails the same way on every attempt.
+                    retryable, error = False, f"{type(exc).__name__}: {exc}"
+                else:
+                    status = response.status_code
+                    if status < 300:
+                        self._delivered(lane, batch)
+                        return
+                    retryable, error = (
+                        status in RETRYABLE_STATUS_CODES,
+                        f"HTTP {status}: {response.text[:200]}",
+                    )
+                    retry_after = parse_retry_after(response.headers)
+                    if status == 429:
+                        lane.throttled += 1
+                        pause = retry_after if retry_after is not None else destination.backoff
+                        lane.paused_until = max(lane.paused_until, time.monotonic() + pause)
+                if not retryable or attempts >= destination.max_attempts:
+                    await self._dead_letter(lane, batch, error, attempts)
+                    return
+                lane.retries += 1
+                delay = min(destination.max_backoff, destination.backoff * 2 ** (attempts - 1))
+                await asyncio.sleep(max(delay, retry_after or 0.0))
+        finally:
+            lane.slots.release()
+
+    def _delivered(self, lane: _Lane, batch: List[_Entry]) -> None:
+        now = time.monotonic()
+        lane.batches += 1
+        lane.delivered += len(batch)
+        lane.max_batch_seen = max(lane.max_batch_seen, len(batch))
+        for entry in batch:
+            lane.latencies.append(now - entry.enqueued)
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(True)
+
+    async def _dead_letter(
+        self, lane: _Lane, batch: List[_Entry], error: str, attempts: int
+    ) -> None:
+        record = {
+            "destination": lane.destination.name,
+            "items": [entry.item for entry in batch],
+            "error": error,
+            "attempts": attempts,
+            "timestamp": datetime.now(UTC).isoformat(),
+        }
+        lane.dead_lettered += len(batch)
+        self.dead_letters.append(record)
+        try:
+            if self.dead_letter_path is not None:
+                await asyncio.to_thread(
+                    self._append_dead_letter, json.dumps(record, default=str) + "\n"
+                )
+        finally:
+            # Resolved after the write, so a False result means the record is on disk.
+            for entry in batch:
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_result(False)
+
+    def _append_dead_letter(self, line: str) -> None:
+        with self._dead_letter_lock:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.dead_letter_path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+
+    async def flush(self) -> None:
+        """Send everything queued now, skipping batching windows, and wait for it."""
+        self._closing = True
+        try:
+            for lane in self._lanes.values():
+                worker = lane.worker
+                if worker is not None:
+                    lane.wakeup.set()
+                    await worker
+                if lane.in_flight:
+                    await asyncio.gather(*lane.in_flight)
+            if self._dead_letter_writes:
+                await asyncio.gather(*self._dead_letter_writes)
+        finally:
+            self._closing = False
+
+    async def aclose(self) -> None:
+        await self.flush()
+        if self._owns_client:
+            await self._client.aclose()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name, lane in self._lanes.items():
+            latencies = sorted(lane.latencies)
+            stats[name] = {
+                "queued": len(lane.queue),
+                "in_flight": len(lane.in_flight),
+                "submitted": lane.submitted,
+                "coalesced": lane.coalesced,
+                "delivered": lane.delivered,
+                "requests": lane.requests,
+                "batches": lane.batches,
+                "avg_batch_size": lane.delivered / lane.batches if lane.batches else 0.0,
+                "max_batch_size": lane.max_batch_seen,
+                "retries": lane.retries,
+                "throttled": lane.throttled,
+                "dead_lettered": lane.dead_lettered,
+                "latency_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+                "latency_p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+                * 1000
+                if latencies
+                else 0.0,
+            }
+        return stats
@@ -1,7 +1,66 @@
-"""PagerDuty integration stub."""
+"""PagerDuty Events API v2 integration."""
 from __future__ import annotations
 
+from typing import Any, Dict, List, Optional
+
+from .delivery import DeliveryService, Destination
+
+EVENTS_API_URL = "https://events.pagerduty.com/v2/enqueue"
+
+
+def _event(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # The Events API takes one event per request.
+    return {"json": events[0]}
+
 
 class PagerDutyConnector:
+    """Triggers PagerDuty incidents, deduplicated by subject.
+
+    Triggers for the same subject that arrive within ``coalesce_window`` seconds
+    share one request; PagerDuty folds later ones into the open incident through
+    the same ``dedup_key``. Without a ``routing_key`` triggers are only logged.
+    """
+
+    def __init__(
+        self,
+        routing_key: Optional[str] = None,
+        delivery: Optional[DeliveryService] = None,
+        url: str = EVENTS_API_URL,
+        source: str = "azure-ai-security-toolkit",
+        severity: str = "critical",
+        coalesce_window: float = 0.25,
+        destination: str = "pagerduty",
+    ) -> None:
+        self.routing_key = routing_key
+        self.source = source
+        self.severity = severity
+        self.delivery = delivery
+        self.destination = destination
+        if routing_key:
+            self.delivery = delivery or DeliveryService()
+            self.delivery.register(
+                Destination(
+                    name=destination,
+                    url=url,
+                    build_request=_event,
+                    batch_window=coalesce_window,
+                    coalesce_key=lambda event: event["dedup_key"],
+                )
+            )
+
     async def trigger_incident(self, subject: str) -> None:
-        print(f"[PagerDuty] Incident triggered for {subject}")
+        """Trigger an incident and wait until PagerDuty accepted it."""
+        if not self.routing_key:
+            print(f"[PagerDuty] Incident triggered for {subject}")
+            return
+        event = {
+            "routing_key": self.routing_key,
+            "event_action": "trigger",
+            "dedup_key": f"soar-{subject}",
+            "payload": {
+                "summary": f"AI security incident for {subject}",
+                "source": self.source,
+                "severity": self.severity,
+            },
+        }
+        await self.delivery.deliver(self.destination, event)
@@ -1,10 +1,47 @@
 """Slack notification helper."""
 from __future__ import annotations
 
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .delivery import DeliveryService, Destination
+
+
+def _digest(messages: List[str]) -> Dict[str, Any]:
+    """Fold a window of messages into one post, collapsing repeats into a count."""
+    counts = Counter(messages)
+    lines = [
+        message if count == 1 else f"{message} (x{count})" for message, count in counts.items()
+    ]
+    return {"json": {"text": "\n".join(lines)}}
+
 
 class SlackNotifier:
-    def __init__(self, webhook_url: str) -> None:
+    """Posts to an incoming webhook, one digest per ``digest_window`` seconds."""
+
+    def __init__(
+        self,
+        webhook_url: str,
+        delivery: Optional[DeliveryService] = None,
+        digest_window: float = 5.0,
+        max_messages: int = 50,
+        destination: str = "slack",
+    ) -> None:
         self.webhook_url = webhook_url
+        self.delivery = delivery or DeliveryService()
+        # Slack allows roughly one message per second per webhook.
+        self.destination = self.delivery.register(
+            Destination(
+                name=destination,
+                url=webhook_url,
+                build_request=_digest,
+                batch_window=digest_window,
+                max_batch=max_messages,
+                rate_per_second=1.0,
+                concurrency=1,
+            )
+        )
 
     async def send_message(self, message: str) -> None:
-        print(f"[Slack] {message}")
+        """Queue a message for the next digest without waiting for it to be posted."""
+        self.delivery.submit(self.destination, message)
@@ -0,0 +1,136 @@
+"""Sliding-window correlation of SOAR events onto open incidents."""
+from __future__ import annotations
+
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+DEFAULT_CORRELATION_KEYS = ("type", "user_id", "model_name")
+
+CorrelationKey = Tuple[Hashable, ...]
+
+
+@dataclass
+class _Group:
+    incident_id: str
+    first_seen: float
+    last_seen: float
+    suppressed: int = 0
+
+
+class CorrelationEngine:
+    """Group events sharing the same key values within a sliding time window.
+
+    Key fields are read from the event itself (``type``, ``severity``) or, failing
+    that, from its ``context``. A group stays open while events keep arriving
+    within ``window_seconds`` of the previous one, but never longer than
+    ``max_window_seconds`` (ten windows by default) after it opened, so a
+    steady stream still re-opens an incident now and then. Groups are kept in a
+    dict for O(1) matching and in last-seen order so expiry only inspects the oldest.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        keys: Iterable[str] = DEFAULT_CORRELATION_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+        max_window_seconds: Optional[float] = None,
+    ) -> None:
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be greater than 0")
+        if max_window_seconds is None:
+            max_window_seconds = window_seconds * 10
+        if max_window_seconds < window_seconds:
+            raise ValueError("max_window_seconds must not be shorter than window_seconds")
+        self.window_seconds = window_seconds
+        self.max_window_seconds = max_window_seconds
+        self.keys = tuple(keys)
+        if not self.keys:
+            raise ValueError("At least one correlation key is required")
+        self._clock = clock
+        self._groups: "OrderedDict[CorrelationKey, _Group]" = OrderedDict()
+        self._by_incident: Dict[str, CorrelationKey] = {}
+        self.suppressed_by_type: Counter = Counter()
+        self.groups_opened = 0
+
+    def key_for(self, event: Dict[str, Any]) -> CorrelationKey:
+        context = event.get("context") or {}
+        return tuple(_hashable(event.get(name, context.get(name))) for name in self.keys)
+
+    def _expire(self, now: float) -> None:
+        while self._groups:
+            key, group = next(iter(self._groups.items()))
+            if now - group.last_seen <= self.window_seconds:
+                break
+            del self._groups[key]
+            self._by_incident.pop(group.incident_id, None)
+
+    def _open_group(self, key: CorrelationKey, now: float) -> Optional[_Group]:
+        self._expire(now)
+        group = self._groups.get(key)
+        if group is not None and now - group.first_seen > self.max_window_seconds:
+            del self._groups[key]
+            self._by_incident.pop(group.incident_id, None)
+            return None
+        return group
+
+    def peek(self, event: Dict[str, Any]) -> Optional[str]:
+        """Return the open incident this event would fold into, without counting it."""
+        group = self._open_group(self.key_for(event), self._clock())
+        return group.incident_id if group is not None else None
+
+    def match(self, event: Dict[str, Any]) -> Optional[str]:
+        """Return the open incident this event folds into (counting it as suppressed)."""
+        now = self._clock()
+        key = self.key_for(event)
+        group = self._open_group(key, now)
+        if group is None:
+            return None
+        group.last_seen = now
+        group.suppressed += 1
+        self._groups.move_to_end(key)
+        self.suppressed_by_type[event.get("type", "UNKNOWN")] += 1
+        return group.incident_id
+
+    def register(self, event: Dict[str, Any], incident_id: str) -> None:
+        """Open a group for a newly created incident."""
+        now = self._clock()
+        key = self.key_for(event)
+        previous = self._groups.pop(key, None)
+        if previous is not None:
+            self._by_incident.pop(previous.incident_id, None)
+        self._groups[key] = _Group(incident_id, now, now)
+        self._by_incident[incident_id] = key
+        self.groups_opened += 1
+
+    def release(self, incident_id: str) -> None:
+        """Close an incident's group early so the next matching event opens a new incident."""
+        key = self._by_incident.pop(incident_id, None)
+        if key is not None:
+            self._groups.pop(key, None)
+
+    def suppressed_for(self, incident_id: str) -> int:
+        key = self._by_incident.get(incident_id)
+        return self._groups[key].suppressed if key is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire(self._clock())
+        suppressed = sum(self.suppressed_by_type.values())
+        return {
+            "open_groups": len(self._groups),
+            "groups_opened": self.groups_opened,
+            "suppressed": suppressed,
+            "suppressed_by_type": dict(self.suppressed_by_type),
+            "suppression_ratio": suppressed / (suppressed + self.groups_opened)
+            if suppressed + self.groups_opened
+            else 0.0,
+        }
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, set, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
@@ -0,0 +1,356 @@
+"""Bounded in-memory incident store with secondary indexes and a persistent archive."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .models import AISecurityIncident, IncidentSeverity
+
+IndexKeys = Tuple[str, str, str, Optional[str]]
+
+_INDEXES = ("status", "severity", "incident_type", "user_id")
+
+# Statuses set once the incident's playbook has finished: no step will touch it again.
+# IN_PROGRESS marks a finished playbook that did not resolve the incident.
+CLOSED_STATUSES = frozenset({"RESOLVED", "IN_PROGRESS", "NO_PLAYBOOK"})
+
+
+def _index_keys(incident: AISecurityIncident) -> IndexKeys:
+    user_id = incident.context.get("user_id")
+    user_key = str(user_id) if user_id else None
+    return (incident.status, incident.severity.name, incident.incident_type, user_key)
+
+
+def _matches(
+    payload: Dict[str, Any],
+    status: Optional[str],
+    severity: Optional[str],
+    incident_type: Optional[str],
+    user_id: Optional[str],
+    since: Optional[datetime],
+) -> bool:
+    return (
+        (status is None or payload["status"] == status)
+        and (severity is None or payload["severity"] == severity)
+        and (incident_type is None or payload["incident_type"] == incident_type)
+        and (user_id is None or str((payload.get("context") or {}).get("user_id")) == user_id)
+        and (since is None or datetime.fromisoformat(payload["timestamp"]) >= since)
+    )
+
+
+class SQLiteIncidentArchive:
+    """Archive of evicted incidents in SQLite, indexed on the store's query fields."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS incidents (id TEXT PRIMARY KEY, status TEXT, "
+                "severity TEXT, incident_type TEXT, user_id TEXT, timestamp TEXT, "
+                "payload TEXT NOT NULL)"
+            )
+            for column in ("status", "severity", "incident_type", "user_id", "timestamp"):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS incidents_{column} ON incidents({column})"
+                )
+
+    def write_many(self, incidents: List[AISecurityIncident]) -> None:
+        rows = []
+        for incident in incidents:
+            status, severity, incident_type, user_id = _index_keys(incident)
+            payload = incident.to_dict()
+            rows.append(
+                (
+                    incident.id,
+                    status,
+                    severity,
+                    incident_type,
+                    user_id,
+                    payload["timestamp"],
+                    json.dumps(payload),
+                )
+            )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO incidents VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def get(self, incident_id: str) -> Optional[AISecurityIncident]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM incidents WHERE id = ?", (incident_id,)
+            ).fetchone()
+        return AISecurityIncident.from_dict(json.loads(row[0])) if row else None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[str] = None,
+        incident_type: Optional[str] = None,
+        user_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[AISecurityIncident]:
+        clauses, params = [], []
+        for column, value in (
+            ("status", status),
+            ("severity", severity),
+            ("incident_type", incident_type),
+            ("user_id", user_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.isoformat())
+        sql = "SELECT payload FROM incidents"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [AISecurityIncident.from_dict(json.loads(row[0])) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM incidents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class NDJSONIncidentArchive:
+    """Append-only NDJSON archive; lookups and queries scan the file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write_many(self, incidents: List[AISecurityIncident]) -> None:
+        lines = "".join(json.dumps(incident.to_dict()) + "\n" for incident in incidents)
+        with self._lock, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+    def _scan(self) -> Iterator[Dict[str, Any]]:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+    def get(self, incident_id: str) -> Optional[AISecurityIncident]:
+        found = None
+        for payload in self._scan():
+            if payload["id"] == incident_id:
+                found = payload  # later lines supersede earlier ones
+        return AISecurityIncident.from_dict(found) if found else None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[str] = None,
+        incident_type: Optional[str] = None,
+        user_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[AISecurityIncident]:
+        latest = {payload["id"]: payload for payload in self._scan()}
+        matched = [
+            payload
+            for payload in latest.values()
+            if _matches(payload, status, severity, incident_type, user_id, since)
+        ]
+        matched.sort(key=lambda payload: payload["timestamp"], reverse=True)
+        return [AISecurityIncident.from_dict(payload) for payload in matched[:limit]]
+
+    def count(self) -> int:
+        return len({payload["id"] for payload in self._scan()})
+
+    def close(self) -> None:
+        return None
+
+
+class IncidentStore:
+    """Holds live incidents with indexes by status, severity, type and user.
+
+    The most recent ``retain_resolved`` closed incidents (RESOLVED, IN_PROGRESS or
+    NO_PLAYBOOK, i.e. every incident whose playbook has finished) stay in memory;
+    older ones are evicted in batches of ``eviction_batch`` to the archive, if one
+    is configured, so memory stays bounded on long-running orchestrators. Call
+    :meth:`update` after mutating an incident's status, severity, type or user so
+    the indexes follow.
+    """
+
+    def __init__(
+        self,
+        archive: Optional[Any] = None,
+        retain_resolved: int = 1000,
+        eviction_batch: int = 100,
+    ) -> None:
+        if retain_resolved < 0:
+            raise ValueError("retain_resolved must not be negative")
+        if eviction_batch <= 0:
+            raise ValueError("eviction_batch must be greater than 0")
+        self.archive = archive
+        self.retain_resolved = retain_resolved
+        self.eviction_batch = eviction_batch
+        self._incidents: Dict[str, AISecurityIncident] = {}
+        self._keys: Dict[str, IndexKeys] = {}
+        self._indexes: Tuple[Dict[Any, Set[str]], ...] = tuple({} for _ in _INDEXES)
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        self.evicted = 0
+
+    # Mapping-style access keeps ``SOAROrchestrator.active_incidents`` call sites working.
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def __contains__(self, incident_id: object) -> bool:
+        return incident_id in self._incidents
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._incidents)
+
+    def __getitem__(self, incident_id: str) -> AISecurityIncident:
+        return self._incidents[incident_id]
+
+    def __setitem__(self, incident_id: str, incident: AISecurityIncident) -> None:
+        if incident_id != incident.id:
+            raise ValueError("Incident must be stored under its own id")
+        self.add(incident)
+
+    def values(self) -> List[AISecurityIncident]:
+        return list(self._incidents.values())
+
+    def get(
+        self, incident_id: str, default: Optional[AISecurityIncident] = None
+    ) -> Optional[AISecurityIncident]:
+        """Return a live incident; use :meth:`lookup` to fall back to the archive."""
+        return self._incidents.get(incident_id, default)
+
+    def lookup(self, incident_id: str) -> Optional[AISecurityIncident]:
+        incident = self._incidents.get(incident_id)
+        if incident is None and self.archive is not None:
+            incident = self.archive.get(incident_id)
+        return incident
+
+    def add(self, incident: AISecurityIncident) -> None:
+        if incident.id in self._incidents:
+            raise ValueError(f"Duplicate incident id {incident.id}")
+        self._incidents[incident.id] = incident
+        self._index(incident.id, _index_keys(incident))
+        self._track_resolution(incident)
+
+    def update(self, incident: AISecurityIncident) -> None:
+        previous = self._keys.get(incident.id)
+        if previous is None:
+            raise KeyError(incident.id)
+        current = _index_keys(incident)
+        if current != previous:
+            self._unindex(incident.id, previous)
+            self._index(incident.id, current)
+        self._track_resolution(incident)
+
+    def _index(self, incident_id: str, keys: IndexKeys) -> None:
+        self._keys[incident_id] = keys
+        for index, key in zip(self._indexes, keys):
+            if key is not None:
+                index.setdefault(key, set()).add(incident_id)
+
+    def _unindex(self, incident_id: str, keys: IndexKeys) -> None:
+        for index, key in zip(self._indexes, keys):
+            members = index.get(key)
+            if members is not None:
+                members.discard(incident_id)
+                if not members:
+                    del index[key]
+
+    def _track_resolution(self, incident: AISecurityIncident) -> None:
+        if incident.status not in CLOSED_STATUSES:
+            self._closed.pop(incident.id, None)
+            return
+        self._closed[incident.id] = None
+        if len(self._closed) >= self.retain_resolved + self.eviction_batch:
+            self._evict(len(self._closed) - self.retain_resolved)
+
+    def _evict(self, count: int) -> None:
+        batch = []
+        for _ in range(count):
+            incident_id, _ = self._closed.popitem(last=False)
+            incident = self._incidents.pop(incident_id)
+            self._unindex(incident_id, self._keys.pop(incident_id))
+            batch.append(incident)
+        if self.archive is not None:
+            self.archive.write_many(batch)
+        self.evicted += len(batch)
+
+    def flush(self) -> None:
+        """Archive every resolved incident still held in memory (e.g. at shutdown)."""
+        if self._closed:
+            self._evict(len(self._closed))
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[str | IncidentSeverity] = None,
+        incident_type: Optional[str] = None,
+        user_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        include_archived: bool = False,
+    ) -> List[AISecurityIncident]:
+        """Return matching incidents, newest first, intersecting the smallest index first."""
+        if isinstance(severity, IncidentSeverity):
+            severity = severity.name
+        filters = [
+            index.get(value, set())
+            for index, value in zip(self._indexes, (status, severity, incident_type, user_id))
+            if value is not None
+        ]
+        if filters:
+            filters.sort(key=len)
+            candidates = set(filters[0]).intersection(*filters[1:])
+            matched = [self._incidents[incident_id] for incident_id in candidates]
+        else:
+            matched = list(self._incidents.values())
+        if since is not None:
+            matched = [incident for incident in matched if incident.timestamp >= since]
+        matched.sort(key=lambda incident: incident.timestamp, reverse=True)
+
+        if include_archived and self.archive is not None:
+            seen = {incident.id for incident in matched}
+            archived = self.archive.query(status, severity, incident_type, user_id, since, limit)
+            matched.extend(incident for incident in archived if incident.id not in seen)
+            matched.sort(key=lambda incident: incident.timestamp, reverse=True)
+        return matched[:limit] if limit is not None else matched
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {str(key): len(members) for key, members in index.items()}
+            for name, index in zip(_INDEXES, self._indexes)
+            if name != "user_id"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live": len(self._incidents),
+            "closed_in_memory": len(self._closed),
+            "evicted": self.evicted,
+            "archived": self.archive.count() if self.archive is not None else 0,
+            "by_status": self.counts()["status"],
+        }
@@ -0,0 +1,211 @@
+"""Bounded, severity-prioritised event ingestion for the SOAR orchestrator."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .workflow_engine import IncidentSeverity, SOAROrchestrator, parse_severity
+
+logger = logging.getLogger(__name__)
+
+_LEVELS = sorted(IncidentSeverity, key=lambda severity: severity.value, reverse=True)
+
+QueuedEvent = Tuple[Dict[str, Any], float]
+
+
+def _percentiles(samples: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    last = len(ordered) - 1
+    return {f"p{pct}": round(ordered[min(last, int(last * pct / 100))], 3) for pct in (50, 95, 99)}
+
+
+class SeverityQueue:
+    """Bounded queue with one FIFO lane per severity; higher lanes always drain first.
+
+    When full, an event displaces the newest event of a strictly lower severity, so
+    a burst of LOW events can never keep a CRITICAL one out.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than 0")
+        self.capacity = capacity
+        self._lanes: Dict[IncidentSeverity, Deque[QueuedEvent]] = {
+            level: deque() for level in _LEVELS
+        }
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def depth(self) -> Dict[str, int]:
+        return {level.name: len(lane) for level, lane in self._lanes.items()}
+
+    def push(
+        self, severity: IncidentSeverity, item: QueuedEvent
+    ) -> Tuple[bool, Optional[IncidentSeverity]]:
+        """Queue ``item``; return ``(accepted, severity_of_displaced_event)``."""
+        displaced = None
+        if self._size >= self.capacity:
+            for level in reversed(_LEVELS):
+                if level.value >= severity.value:
+                    return False, None
+                if self._lanes[level]:
+                    self._lanes[level].pop()
+                    self._size -= 1
+                    displaced = level
+                    break
+        self._lanes[severity].append(item)
+        self._size += 1
+        return True, displaced
+
+    def pop(self) -> QueuedEvent:
+        for level in _LEVELS:
+            lane = self._lanes[level]
+            if lane:
+                self._size -= 1
+                return lane.popleft()
+        raise IndexError("pop from an empty SeverityQueue")
+
+
+class EventIngestor:
+    """Feed events to :meth:`SOAROrchestrator.handle_event` from ``workers`` tasks.
+
+    ``submit`` applies backpressure by waiting for space (or fails fast with
+    ``wait=False``); ``offer`` never waits and reports drops instead.
+    """
+
+    def __init__(
+        self,
+        orchestrator: SOAROrchestrator,
+        workers: int = 8,
+        capacity: int = 10_000,
+        sample_size: int = 4096,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be greater than 0")
+        self.orchestrator = orchestrator
+        self.workers = workers
+        self._queue = SeverityQueue(capacity)
+        self._changed = asyncio.Condition()
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self._busy = 0
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped: Dict[str, int] = {level.name: 0 for level in _LEVELS}
+        self._wait_ms: Deque[float] = deque(maxlen=sample_size)
+        self._process_ms: Deque[float] = deque(maxlen=sample_size)
+        self._started_at: Optional[float] = None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._closing = False
+        self._started_at = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers, first processing everything queued when ``drain`` is set."""
+        if drain:
+            await self.join()
+        async with self._changed:
+            self._closing = True
+            self._changed.notify_all()
+        for task in self._tasks:
+            if not drain:
+                task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: not self._queue and not self._busy)
+
+    def _push(self, event: Dict[str, Any]) -> bool:
+        severity = parse_severity(event.get("severity"))
+        accepted, displaced = self._queue.push(severity, (event, time.perf_counter()))
+        if displaced is not None:
+            self.dropped[displaced.name] += 1
+        if not accepted:
+            self.dropped[severity.name] += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def offer(self, event: Dict[str, Any]) -> bool:
+        async with self._changed:
+            accepted = self._push(event)
+            if accepted:
+                self._changed.notify_all()
+            return accepted
+
+    async def submit(
+        self, event: Dict[str, Any], wait: bool = True, timeout: Optional[float] = None
+    ) -> bool:
+        async with self._changed:
+            if wait and len(self._queue) >= self._queue.capacity:
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: len(self._queue) < self._queue.capacity),
+                        timeout,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            accepted = self._push(event)
+            if accepted:
+                self._changed.notify_all()
+            return accepted
+
+    async def submit_many(self, events: Iterable[Dict[str, Any]], wait: bool = True) -> int:
+        """Queue a batch; returns how many events were accepted."""
+        accepted = 0
+        for event in events:
+            accepted += await self.submit(event, wait=wait)
+        return accepted
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._queue or self._closing)
+                if not self._queue:
+                    return
+                event, enqueued_at = self._queue.pop()
+                self._busy += 1
+                self._changed.notify_all()
+            started = time.perf_counter()
+            self._wait_ms.append((started - enqueued_at) * 1000)
+            try:
+                await self.orchestrator.handle_event(event)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Failed to handle event %s", event.get("type"))
+            finally:
+                self._process_ms.append((time.perf_counter() - started) * 1000)
+                async with self._changed:
+                    self._busy -= 1
+                    self._changed.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "queue_depth": len(self._queue),
+            "queue_depth_by_severity": self._queue.depth(),
+            "capacity": self._queue.capacity,
+            "workers": self.workers,
+            "in_flight": self._busy,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": dict(self.dropped),
+            "events_per_second": round(self.processed / elapsed, 1) if elapsed else 0.0,
+            "queue_wait_ms": _percentiles(self._wait_ms),
+            "processing_ms": _percentiles(self._process_ms),
+        }
@@ -0,0 +1,255 @@
+"""Write-ahead journal of playbook step transitions with group commit."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record kinds. ``incident_opened`` carries the incident snapshot and
+# ``playbook_finished`` retires it; records for unknown incidents are ignored.
+OPENED = "incident_opened"
+UPDATED = "incident_updated"
+STEP_STARTED = "step_started"
+STEP_FINISHED = "step_finished"
+FINISHED = "playbook_finished"
+
+
+@dataclass
+class RecoveredIncident:
+    """An incident whose playbook had not finished when the journal was last written."""
+
+    incident: Dict[str, Any]
+    finished_steps: List[Dict[str, Any]] = field(default_factory=list)
+    started_steps: List[str] = field(default_factory=list)
+
+
+class PlaybookJournal:
+    """Append-only NDJSON journal, fsynced in batches.
+
+    Appends from any number of coroutines accumulate while the previous batch is
+    being fsynced (plus an optional ``flush_interval`` delay) and up to
+    ``max_batch`` of them are committed with one write and one ``fsync``, so
+    throughput is bounded by batches, not records.
+    :meth:`append` returns once its record is durable; :meth:`record` queues one
+    without waiting. If a commit fails, ``append`` raises and queued records are
+    retried with the next commit. Records of finished playbooks are dropped by
+    compaction, which rewrites the file atomically on replay and whenever it grows
+    past ``compact_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_interval: float = 0.0,
+        max_batch: int = 1024,
+        fsync: bool = True,
+        compact_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        if flush_interval < 0:
+            raise ValueError("flush_interval must not be negative")
+        if max_batch <= 0:
+            raise ValueError("max_batch must be greater than 0")
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self._pending: List[Tuple[bytes, str, str, Optional[asyncio.Future]]] = []
+        self._retry: List[Tuple[bytes, str, str, Optional[asyncio.Future]]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._handle: Optional[BinaryIO] = None
+        self._closing = False
+        self._torn = False
+        # Lines of incidents that are still open; exactly what compaction keeps.
+        self._live: Dict[str, List[bytes]] = {}
+        self.records = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.compactions = 0
+        self.commit_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._writer is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("ab")
+        self.bytes_written = self.path.stat().st_size
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._writer = asyncio.create_task(self._run())
+
+    def record(
+        self, kind: str, incident_id: str, durable: bool = False, **data: Any
+    ) -> Optional[asyncio.Future]:
+        """Queue a record; with ``durable`` return a future resolved once it is fsynced."""
+        self._ensure_started()
+        entry = {"kind": kind, "incident_id": incident_id, "ts": time.time(), **data}
+        line = json.dumps(entry, default=str, separators=(",", ":")).encode("utf-8") + b"\n"
+        future = asyncio.get_running_loop().create_future() if durable else None
+        self._pending.append((line, kind, incident_id, future))
+        self._wakeup.set()
+        return future
+
+    async def append(self, kind: str, incident_id: str, **data: Any) -> None:
+        await self.record(kind, incident_id, durable=True, **data)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.flush_interval and len(self._pending) < self.max_batch and not self._closing:
+                # Optional commit delay: trade latency for larger batches.
+                await asyncio.sleep(self.flush_interval)
+            self._pending[:0], self._retry = self._retry, []
+            while self._pending:
+                batch, self._pending = (
+                    self._pending[: self.max_batch],
+                    self._pending[self.max_batch :],
+                )
+                await self._commit(batch)
+            if self.bytes_written > self.compact_bytes:
+                await self._compact()
+            if self._closing and not self._pending:
+                if self._retry:
+                    logger.error(
+                        "Journal %s closed with %d records that could not be written",
+                        self.path,
+                        len(self._retry),
+                    )
+                    self._retry = []
+                return
+
+    async def _commit(self, batch: List[Tuple[bytes, str, str, Optional[asyncio.Future]]]) -> None:
+        data = b"".join(line for line, _, _, _ in batch)
+        if self._torn:
+            # End whatever partial line the failed write left so replay skips it.
+            data = b"\n" + data
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as exc:
+            self._torn = True
+            # Waiters see the error; records nobody waits on (playbook_finished among
+            # them) are retried ahead of the next group commit.
+            retry = [entry for entry in batch if entry[3] is None]
+            for _, _, _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            self._retry.extend(retry)
+            logger.warning(
+                "Journal commit to %s failed (%s); %d queued records will be retried",
+                self.path,
+                exc,
+                len(retry),
+            )
+            return
+        self._torn = False
+        self.commit_seconds += time.perf_counter() - started
+        self.records += len(batch)
+        self.batches += 1
+        self.bytes_written += len(data)
+        for line, kind, incident_id, future in batch:
+            if kind == OPENED:
+                self._live[incident_id] = [line]
+            elif kind == FINISHED:
+                self._live.pop(incident_id, None)
+            elif incident_id in self._live:
+                self._live[incident_id].append(line)
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        self._handle.write(data)
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+
+    async def _compact(self) -> None:
+        # Only the writer task compacts, so no batch can be mid-write to the old file.
+        data = b"".join(line for lines in self._live.values() for line in lines)
+        self._handle.close()
+        await asyncio.to_thread(self._rewrite, data)
+        self._handle = self.path.open("ab")
+
+    def _rewrite(self, data: bytes) -> None:
+        tmp = self.path.with_name(self.path.name + ".compact")
+        with tmp.open("wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, self.path)
+        self.bytes_written = len(data)
+        self.compactions += 1
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._writer
+        self._writer = None
+        self._handle.close()
+        self._handle = None
+
+    def replay(self) -> List[RecoveredIncident]:
+        """Rebuild incidents whose playbook had not finished, in the order they opened.
+
+        A torn final line (a crash mid-write) is ignored; everything before it was
+        committed. The journal is compacted down to the returned incidents, so call
+        this before anything is appended.
+        """
+        if self._writer is not None:
+            raise RuntimeError("replay() must run before the journal is appended to")
+        open_incidents: Dict[str, RecoveredIncident] = {}
+        lines: Dict[str, List[bytes]] = {}
+        if not self.path.exists():
+            return []
+        with self.path.open("rb") as handle:
+            for raw in handle:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                incident_id = record.get("incident_id")
+                kind = record.get("kind")
+                if kind == OPENED:
+                    open_incidents[incident_id] = RecoveredIncident(incident=record["incident"])
+                    lines[incident_id] = []
+                elif incident_id not in open_incidents:
+                    continue
+                elif kind == FINISHED:
+                    del open_incidents[incident_id]
+                    lines.pop(incident_id, None)
+                    continue
+                elif kind == UPDATED:
+                    open_incidents[incident_id].incident.update(record.get("fields", {}))
+                elif kind == STEP_STARTED:
+                    open_incidents[incident_id].started_steps.append(record["step_id"])
+                elif kind == STEP_FINISHED:
+                    open_incidents[incident_id].finished_steps.append(record["record"])
+                lines.setdefault(incident_id, []).append(
+                    raw if raw.endswith(b"\n") else raw + b"\n"
+                )
+        self._live = {incident_id: lines[incident_id] for incident_id in open_incidents}
+        self._rewrite(b"".join(line for entries in self._live.values() for line in entries))
+        return list(open_incidents.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "batches": self.batches,
+            "avg_batch": self.records / self.batches if self.batches else 0.0,
+            "avg_commit_ms": self.commit_seconds / self.batches * 1000 if self.batches else 0.0,
+            "pending": len(self._pending) + len(self._retry),
+            "open_incidents": len(self._live),
+            "bytes": self.bytes_written,
+            "compactions": self.compactions,
+        }
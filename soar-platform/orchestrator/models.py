@@ -0,0 +1,72 @@
+"""Incident records shared by the SOAR orchestrator, store, and journal."""
+from __future__ import annotations
+
+import itertools
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from enum import Enum
+from typing import Any, Dict, List
+
+# Timestamp alone collides within a microsecond; pid and a per-process sequence make ids unique.
+_SEQUENCE = itertools.count(1)
+
+
+def new_incident_id() -> str:
+    now = datetime.now(UTC).strftime("INC%Y%m%d%H%M%S%f")
+    return f"{now}-{os.getpid():x}-{next(_SEQUENCE):06d}"
+
+
+class IncidentSeverity(Enum):
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+def parse_severity(value: Any) -> IncidentSeverity:
+    """Map an event's severity name onto ``IncidentSeverity``, defaulting to LOW."""
+    try:
+        return IncidentSeverity[str(value or "LOW").upper()]
+    except KeyError:
+        return IncidentSeverity.LOW
+
+
+@dataclass(slots=True)
+class AISecurityIncident:
+    incident_type: str
+    severity: IncidentSeverity
+    context: Dict[str, Any]
+    id: str = field(default_factory=new_incident_id)
+    timestamp: datetime = field(default_factory=lambda: datetime.now(UTC))
+    status: str = "NEW"
+    actions_taken: List[Dict[str, Any]] = field(default_factory=list)
+    resolved: bool = False
+    suppressed_events: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "incident_type": self.incident_type,
+            "severity": self.severity.name,
+            "context": self.context,
+            "timestamp": self.timestamp.isoformat(),
+            "status": self.status,
+            "actions_taken": self.actions_taken,
+            "resolved": self.resolved,
+            "suppressed_events": self.suppressed_events,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "AISecurityIncident":
+        return cls(
+            incident_type=payload["incident_type"],
+            severity=parse_severity(payload.get("severity")),
+            context=payload.get("context") or {},
+            id=payload["id"],
+            timestamp=datetime.fromisoformat(payload["timestamp"]),
+            status=payload.get("status", "NEW"),
+            actions_taken=list(payload.get("actions_taken") or []),
+            resolved=bool(payload.get("resolved", False)),
+            suppressed_events=int(payload.get("suppressed_events", 0)),
+        )
@@ -2,74 +2,346 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass
 from datetime import datetime, UTC
-from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set
 
+from .correlation import CorrelationEngine
+from .incident_store import IncidentStore
+from .journal import FINISHED, OPENED, STEP_FINISHED, STEP_STARTED, UPDATED, PlaybookJournal
+from .models import AISecurityIncident, IncidentSeverity, parse_severity
 
-class IncidentSeverity(Enum):
-    LOW = 1
-    MEDIUM = 2
-    HIGH = 3
-    CRITICAL = 4
+__all__ = [
+    "AISecurityIncident",
+    "IncidentSeverity",
+    "IncidentStore",
+    "PlaybookJournal",
+    "SOAROrchestrator",
+    "compile_playbook",
+    "parse_severity",
+]
 
 
 @dataclass
-class AISecurityIncident:
-    incident_type: str
-    severity: IncidentSeverity
-    context: Dict[str, Any]
-    id: str = field(default_factory=lambda: datetime.now(UTC).strftime("INC%Y%m%d%H%M%S%f"))
-    timestamp: datetime = field(default_factory=lambda: datetime.now(UTC))
-    status: str = "NEW"
-    actions_taken: List[Dict[str, Any]] = field(default_factory=list)
-    resolved: bool = False
+class PlaybookStep:
+    """A playbook step resolved into a DAG node."""
+
+    step_id: str
+    name: str
+    action: str
+    config: Dict[str, Any]
+    depends_on: List[str]
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_backoff: float = 0.5
+
+
+def compile_playbook(playbook: Dict[str, Any]) -> List[PlaybookStep]:
+    """Resolve playbook steps into a validated dependency graph.
+
+    Steps may declare ``id`` (defaulting to ``name`` then ``action``), ``depends_on``,
+    ``timeout`` and ``retries``. A playbook in which no step declares ``depends_on``
+    keeps the original sequential semantics: each step depends on the one before it.
+    """
+    raw_steps = [step for step in playbook.get("steps", []) if step.get("action")]
+    explicit = any("depends_on" in step for step in raw_steps)
+    steps: List[PlaybookStep] = []
+    for index, step in enumerate(raw_steps):
+        step_id = str(step.get("id") or step.get("name") or step["action"])
+        if explicit:
+            depends_on = step.get("depends_on") or []
+            depends_on = [depends_on] if isinstance(depends_on, str) else list(depends_on)
+        else:
+            depends_on = [steps[index - 1].step_id] if index else []
+        timeout = step.get("timeout", playbook.get("step_timeout"))
+        steps.append(
+            PlaybookStep(
+                step_id=step_id,
+                name=step.get("name", step["action"]),
+                action=step["action"],
+                config=step,
+                depends_on=depends_on,
+                timeout=float(timeout) if timeout is not None else None,
+                retries=int(step.get("retries", 0)),
+                retry_backoff=float(step.get("retry_backoff", 0.5)),
+            )
+        )
+
+    ids = [step.step_id for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate step ids in playbook: {ids}")
+    known = set(ids)
+    for step in steps:
+        missing = [dep for dep in step.depends_on if dep not in known]
+        if missing:
+            raise ValueError(f"Step {step.step_id!r} depends on unknown steps: {missing}")
+
+    # Kahn's algorithm purely to reject cycles up front.
+    remaining = {step.step_id: set(step.depends_on) for step in steps}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Playbook has a dependency cycle among: {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return steps
 
 
 class SOAROrchestrator:
-    """Coordinates incident response playbooks."""
+    """Coordinates incident response playbooks.
+
+    With a ``journal`` every incident and step transition is written ahead to a
+    :class:`PlaybookJournal`; a step's dependents only start once its completion
+    is durable, so after a crash :meth:`recover` resumes each unfinished playbook
+    without re-running completed steps.
+    """
 
-    def __init__(self, playbooks: Dict[str, Dict[str, Any]], integrations: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        playbooks: Dict[str, Dict[str, Any]],
+        integrations: Dict[str, Any],
+        correlation: Optional[CorrelationEngine] = None,
+        store: Optional[IncidentStore] = None,
+        journal: Optional[PlaybookJournal] = None,
+    ) -> None:
         self.playbooks = playbooks
         self.integrations = integrations
-        self.active_incidents: Dict[str, AISecurityIncident] = {}
+        self.correlation = correlation
+        self.journal = journal
+        self.incidents = store if store is not None else IncidentStore()
+        # Historical name; the store supports the same mapping-style access.
+        self.active_incidents = self.incidents
+        # Compile eagerly so a malformed playbook fails at startup, not mid-incident.
+        self._plans = {
+            name: (playbook, compile_playbook(playbook)) for name, playbook in playbooks.items()
+        }
 
     async def handle_event(self, event: Dict[str, Any]) -> AISecurityIncident:
-        severity_str = event.get("severity", "LOW")
-        try:
-            severity = IncidentSeverity[severity_str]
-        except KeyError:
-            severity = IncidentSeverity.LOW
-        
+        if self.correlation is not None:
+            existing = self._correlate(event)
+            if existing is not None:
+                return existing
+
         incident = AISecurityIncident(
             incident_type=event.get("type", "UNKNOWN"),
-            severity=severity,
+            severity=parse_severity(event.get("severity")),
             context=event.get("context", {}),
         )
-        self.active_incidents[incident.id] = incident
+        self.incidents.add(incident)
+        if self.correlation is not None:
+            # Register before running the playbook so events arriving mid-playbook fold in.
+            self.correlation.register(event, incident.id)
         playbook = self.playbooks.get(incident.incident_type)
         if not playbook:
             incident.status = "NO_PLAYBOOK"
+            self.incidents.update(incident)
             return incident
-        await self._execute_playbook(incident, playbook)
-        incident.status = "RESOLVED" if incident.resolved else "IN_PROGRESS"
+        if self.journal is not None:
+            await self.journal.append(OPENED, incident.id, incident=incident.to_dict())
+        await self._run_playbook(incident, playbook)
         return incident
 
-    async def _execute_playbook(self, incident: AISecurityIncident, playbook: Dict[str, Any]) -> None:
-        for step in playbook.get("steps", []):
-            handler_name = step.get("action")
-            if not handler_name:
-                continue
-            handler = getattr(self, f"_action_{handler_name}", None)
-            if not handler:
+    async def _run_playbook(
+        self,
+        incident: AISecurityIncident,
+        playbook: Dict[str, Any],
+        completed: Collection[str] = (),
+        interrupted: Collection[str] = (),
+    ) -> None:
+        await self._execute_playbook(incident, playbook, completed, interrupted)
+        incident.status = "RESOLVED" if incident.resolved else "IN_PROGRESS"
+        self.incidents.update(incident)
+        if self.journal is not None:
+            self.journal.record(FINISHED, incident.id, status=incident.status)
+
+    async def recover(self) -> List[AISecurityIncident]:
+        """Rebuild incidents left mid-playbook in the journal and finish their playbooks.
+
+        Steps whose completion was committed are not run again. Steps that had
+        started without a committed completion are run again, so actions should
+        tolerate being repeated after a crash. Call before handling new events.
+        """
+        if self.journal is None:
+            raise RuntimeError("recover() requires a journal")
+        resumed = []
+        for entry in self.journal.replay():
+            incident = AISecurityIncident.from_dict(entry.incident)
+            incident.actions_taken = list(entry.finished_steps)
+            incident.resolved = any(
+                record["result"].get("resolved") for record in entry.finished_steps
+            )
+            if incident.id in self.incidents:
                 continue
-            result = await handler(step, incident)
-            step_name = step.get("name", handler_name)
-            incident.actions_taken.append({"step": step_name, "result": result})
-            if result.get("resolved"):
+            self.incidents.add(incident)
+            if self.correlation is not None:
+                event = {"type": incident.incident_type, "context": incident.context}
+                self.correlation.register(event, incident.id)
+            completed = {record["step_id"] for record in entry.finished_steps}
+            resumed.append((incident, completed, set(entry.started_steps) - completed))
+
+        async def resume(
+            incident: AISecurityIncident, completed: Set[str], interrupted: Set[str]
+        ) -> None:
+            playbook = self.playbooks.get(incident.incident_type)
+            if not playbook:
+                incident.status = "NO_PLAYBOOK"
+                self.incidents.update(incident)
+                self.journal.record(FINISHED, incident.id, status=incident.status)
+                return
+            await self._run_playbook(incident, playbook, completed, interrupted)
+
+        await asyncio.gather(*(resume(*entry) for entry in resumed))
+        return [incident for incident, _, _ in resumed]
+
+    def _correlate(self, event: Dict[str, Any]) -> Optional[AISecurityIncident]:
+        """Fold a duplicate event into its open incident instead of re-running the playbook.
+
+        An event that raises the severity is not folded: the group is released so the
+        event opens a new incident whose playbook runs at the higher severity.
+        """
+        incident_id = self.correlation.peek(event)
+        incident = self.incidents.get(incident_id) if incident_id else None
+        if (
+            incident is None
+            or parse_severity(event.get("severity")).value > incident.severity.value
+        ):
+            if incident_id:
+                self.correlation.release(incident_id)
+            return None
+        self.correlation.match(event)
+        incident.suppressed_events += 1
+        if self.journal is not None:
+            fields = {
+                "suppressed_events": incident.suppressed_events,
+                "severity": incident.severity.name,
+            }
+            self.journal.record(UPDATED, incident.id, fields=fields)
+        return incident
+
+    async def handle_events(
+        self, events: Iterable[Dict[str, Any]], concurrency: int = 64
+    ) -> List[AISecurityIncident]:
+        """Handle a batch of events concurrently, returning incidents in input order."""
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(event: Dict[str, Any]) -> AISecurityIncident:
+            async with semaphore:
+                return await self.handle_event(event)
+
+        return await asyncio.gather(*(bounded(event) for event in events))
+
+    async def _execute_playbook(
+        self,
+        incident: AISecurityIncident,
+        playbook: Dict[str, Any],
+        completed: Collection[str] = (),
+        interrupted: Collection[str] = (),
+    ) -> None:
+        """Run steps as a DAG: each step starts once its dependencies finish.
+
+        Once a step reports ``resolved`` no further steps are started; steps already
+        running are allowed to finish so their results are still recorded. When
+        resuming, ``completed`` steps are treated as done and ``interrupted`` ones
+        (started but unfinished) are re-run even if the incident is resolved.
+        """
+        cached = self._plans.get(incident.incident_type)
+        if cached is not None and cached[0] is playbook:
+            steps = cached[1]
+        else:
+            steps = compile_playbook(playbook)
+            self._plans[incident.incident_type] = (playbook, steps)
+        dependents: Dict[str, List[PlaybookStep]] = {step.step_id: [] for step in steps}
+        waiting: Dict[str, Set[str]] = {}
+        for step in steps:
+            waiting[step.step_id] = set(step.depends_on).difference(completed)
+            for dependency in step.depends_on:
+                dependents[dependency].append(step)
+
+        if incident.resolved:
+            ready = [step for step in steps if step.step_id in interrupted]
+        else:
+            ready = [
+                step
+                for step in steps
+                if step.step_id not in completed and not waiting[step.step_id]
+            ]
+        running: Dict[asyncio.Task, PlaybookStep] = {}
+
+        def finish(step: PlaybookStep, record: Dict[str, Any]) -> None:
+            incident.actions_taken.append(record)
+            if record["result"].get("resolved"):
                 incident.resolved = True
-                break
+            if incident.resolved:
+                return
+            for dependent in dependents[step.step_id]:
+                pending = waiting[dependent.step_id]
+                pending.discard(step.step_id)
+                if not pending:
+                    ready.append(dependent)
+
+        try:
+            while ready or running:
+                if len(ready) == 1 and not running:
+                    # A lone runnable step (e.g. a sequential playbook) needs no task of its own.
+                    step = ready.pop()
+                    finish(step, await self._run_step(step, incident))
+                    continue
+                for step in ready:
+                    running[asyncio.create_task(self._run_step(step, incident))] = step
+                ready.clear()
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finish(running.pop(task), task.result())
+                if incident.resolved:
+                    ready.clear()
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _run_step(self, step: PlaybookStep, incident: AISecurityIncident) -> Dict[str, Any]:
+        """Run one step with its timeout and retry policy and return its timing record."""
+        started_at = datetime.now(UTC)
+        started = time.perf_counter()
+        if self.journal is not None:
+            self.journal.record(STEP_STARTED, incident.id, step_id=step.step_id)
+        handler = getattr(self, f"_action_{step.action}", None)
+        attempts = 0
+        if handler is None:
+            status, result = "skipped", {
+                "resolved": False,
+                "message": f"Unknown action {step.action}",
+            }
+        else:
+            while True:
+                attempts += 1
+                try:
+                    async with asyncio.timeout(step.timeout):
+                        result = await handler(step.config, incident)
+                    status = "failed" if result.get("failed") else "completed"
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    message = f"Step timed out after {step.timeout}s"
+                    result = {"resolved": False, "failed": True, "message": message}
+                if status == "completed" or attempts > step.retries:
+                    break
+                await asyncio.sleep(step.retry_backoff * 2 ** (attempts - 1))
+        record = {
+            "step": step.name,
+            "step_id": step.step_id,
+            "result": result,
+            "status": status,
+            "attempts": attempts,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        if self.journal is not None:
+            await self.journal.append(STEP_FINISHED, incident.id, record=record)
+        return record
 
     async def _action_block_user(self, step: Dict[str, Any], incident: AISecurityIncident) -> Dict[str, Any]:
         user_id = incident.context.get("user_id")
@@ -83,7 +355,7 @@ class SOAROrchestrator:
         try:
             await integration.trigger_incident(user_id)
         except Exception as exc:
-            return {"resolved": False, "message": f"Failed to block user: {exc}"}
+            return {"resolved": False, "failed": True, "message": f"Failed to block user: {exc}"}
         return {"resolved": False, "message": f"User {user_id} blocked"}
 
     async def _action_collect_forensics(self, step: Dict[str, Any], incident: AISecurityIncident) -> Dict[str, Any]:
@@ -93,9 +365,13 @@ class SOAROrchestrator:
         if not hasattr(collector, "collect"):
             return {"resolved": False, "message": "Forensics integration missing collect method"}
         try:
-            blob_url = await collector.collect(incident.context)
+            blob_url = await collector.collect(incident.context, incident_id=incident.id)
         except Exception as exc:
-            return {"resolved": False, "message": f"Failed to collect forensics: {exc}"}
+            return {
+                "resolved": False,
+                "failed": True,
+                "message": f"Failed to collect forensics: {exc}",
+            }
         return {"resolved": False, "forensics_url": blob_url}
 
     async def _action_quarantine_model(self, step: Dict[str, Any], incident: AISecurityIncident) -> Dict[str, Any]:
@@ -110,5 +386,9 @@ class SOAROrchestrator:
         try:
             await integration.quarantine_model(model_name)
         except Exception as exc:
-            return {"resolved": False, "message": f"Failed to quarantine model: {exc}"}
+            return {
+                "resolved": False,
+                "failed": True,
+                "message": f"Failed to quarantine model: {exc}",
+            }
         return {"resolved": True, "message": f"Model {model_name} quarantined"}
@@ -3,7 +3,48 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
+from typing import Callable
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+# soar-platform is not an importable package name; expose its subpackages directly.
+SOAR_ROOT = ROOT / "soar-platform"
+if str(SOAR_ROOT) not in sys.path:
+    sys.path.insert(0, str(SOAR_ROOT))
+# The MLOps scripts run as standalone CLIs in CI; import them by module name.
+MLOPS_SCRIPTS = ROOT / "mlops-templates" / "scripts"
+if str(MLOPS_SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(MLOPS_SCRIPTS))
+
+import httpx
+import pytest
+
+from tests.fake_arm import FakeManagementAPI
+from tests.fake_http import FakeService
+from tests.fake_openai import FakeAzureOpenAI
+from tests.fake_receiver import FakeReceiver
+
+
+def _fake_fixtures(name: str, factory: Callable[[], FakeService], base_url: str = ""):
+    """Build the ``<name>`` fixture and a ``<name>_client`` routed to its app in-process."""
+
+    @pytest.fixture(name=name)
+    def fake() -> FakeService:
+        return factory()
+
+    @pytest.fixture(name=f"{name}_client")
+    async def client(request):
+        service = request.getfixturevalue(name)
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url=base_url) as http:
+            yield http
+
+    return fake, client
+
+
+fake_openai, fake_openai_client = _fake_fixtures("fake_openai", FakeAzureOpenAI)
+fake_receiver, fake_receiver_client = _fake_fixtures(
+    "fake_receiver", FakeReceiver, "http://receiver"
+)
+fake_arm, fake_arm_client = _fake_fixtures("fake_arm", FakeManagementAPI, "http://arm")
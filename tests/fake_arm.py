@@ -0,0 +1,27 @@
+"""Local stub of the Azure Resource Manager endpoints used by bulk remediation.
+
+Accepts PATCH/POST on any resource id, records the calls, and returns scripted
+throttling or errors keyed by resource id. Mount it behind
+``httpx.ASGITransport`` like the other fakes.
+"""
+from __future__ import annotations
+
+from fastapi.responses import JSONResponse
+
+from tests.fake_http import FakeService, ReceivedRequest
+
+
+class FakeManagementAPI(FakeService):
+    """Applies every change; actions such as ``/regenerateKey`` share their resource's key."""
+
+    title = "Fake Azure Resource Manager"
+    methods = ("PATCH", "POST")
+
+    def key(self, request: ReceivedRequest) -> str:
+        return request.path.removesuffix("/regenerateKey")
+
+    def respond(self, request: ReceivedRequest) -> JSONResponse:
+        return JSONResponse({"id": self.key(request)})
+
+
+app = FakeManagementAPI().app
@@ -0,0 +1,84 @@
+"""Scriptable local HTTP service that the test and benchmark fakes build on.
+
+A subclass says which key a request is scripted and recorded under (``key``) and
+what a successful reply looks like (``respond``).  Every request is counted per
+key, successful ones are recorded, and ``fail`` queues error responses for a key.
+Mount ``app`` behind ``httpx.ASGITransport`` or run it with uvicorn.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class ReceivedRequest:
+    method: str
+    host: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class FakeService:
+    """Counts every request per key, records successes, and replays queued failures."""
+
+    title = "Fake service"
+    methods: Tuple[str, ...] = ("POST",)
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.requests: List[ReceivedRequest] = []
+        self._failures: Dict[Hashable, Deque[Tuple[int, Dict[str, str]]]] = defaultdict(deque)
+        self.app = FastAPI(title=self.title)
+        self.app.get("/healthz")(self._healthcheck)
+        self.app.api_route("/{path:path}", methods=list(self.methods))(self._handle)
+
+    def key(self, request: ReceivedRequest) -> Hashable:
+        return request.path
+
+    def respond(self, request: ReceivedRequest) -> JSONResponse:
+        return JSONResponse({"status": "success"})
+
+    def fail(
+        self, key: Hashable, status: int, times: int = 1, retry_after: Optional[float] = None
+    ) -> None:
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        for _ in range(times):
+            self._failures[key].append((status, headers))
+
+    def received(self, key: Hashable) -> List[ReceivedRequest]:
+        return [request for request in self.requests if self.key(request) == key]
+
+    async def _healthcheck(self) -> Dict[str, str]:
+        return {"status": "ok"}
+
+    async def _handle(self, path: str, request: Request) -> JSONResponse:
+        received = ReceivedRequest(
+            request.method,
+            request.headers.get("host", ""),
+            "/" + path,
+            dict(request.headers),
+            await request.body(),
+        )
+        key = self.key(received)
+        self.calls[key] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._failures[key]:
+            status, headers = self._failures[key].popleft()
+            return JSONResponse(
+                {"error": {"code": str(status)}}, status_code=status, headers=headers
+            )
+        self.requests.append(received)
+        return self.respond(received)
@@ -0,0 +1,64 @@
+"""Local fake of the Azure OpenAI chat completions API for tests and benchmarks.
+
+Backends are keyed by ``(host, deployment)`` so a single app can stand in for
+several endpoints when mounted behind ``httpx.ASGITransport``.  Run it as a real
+server with ``uvicorn tests.fake_openai:app``.
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, Tuple
+
+from fastapi.responses import JSONResponse
+
+from tests.fake_http import FakeService, ReceivedRequest
+
+BackendKey = Tuple[str, str]
+
+
+class FakeAzureOpenAI(FakeService):
+    """Fake upstream keyed by ``(host, deployment)`` that can report remaining quota."""
+
+    title = "Fake Azure OpenAI"
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(latency)
+        self._remaining: Dict[BackendKey, int] = {}
+
+    def key(self, request: ReceivedRequest) -> BackendKey:
+        # /openai/deployments/{deployment}/chat/completions
+        return (request.host, request.path.split("/")[3])
+
+    def set_remaining_requests(self, key: BackendKey, remaining: int) -> None:
+        self._remaining[key] = remaining
+
+    def respond(self, request: ReceivedRequest) -> JSONResponse:
+        key = self.key(request)
+        messages = request.json().get("messages") or [{}]
+        headers = {}
+        if key in self._remaining:
+            self._remaining[key] = max(0, self._remaining[key] - 1)
+            headers["x-ratelimit-remaining-requests"] = str(self._remaining[key])
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{self.calls[key]}",
+                "object": "chat.completion",
+                "model": key[1],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": f"echo: {messages[-1].get('content', '')}",
+                        },
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                "served_by": f"{key[0]}/{key[1]}",
+            },
+            headers=headers,
+        )
+
+
+app = FakeAzureOpenAI(latency=float(os.getenv("FAKE_OPENAI_LATENCY", "0"))).app
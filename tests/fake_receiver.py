@@ -0,0 +1,26 @@
+"""Local fake HTTP receiver for outbound SOAR notifications (Slack, PagerDuty, Sentinel).
+
+Accepts POSTs on any path and records them, with scriptable failures keyed by the
+path without its leading slash.  Mount it behind ``httpx.ASGITransport`` or run it
+with ``uvicorn tests.fake_receiver:app``.
+"""
+from __future__ import annotations
+
+from fastapi.responses import JSONResponse
+
+from tests.fake_http import FakeService, ReceivedRequest
+
+
+class FakeReceiver(FakeService):
+    """Accepts every notification with a 202."""
+
+    title = "Fake notification receiver"
+
+    def key(self, request: ReceivedRequest) -> str:
+        return request.path.lstrip("/")
+
+    def respond(self, request: ReceivedRequest) -> JSONResponse:
+        return JSONResponse({"status": "success"}, status_code=202)
+
+
+app = FakeReceiver().app
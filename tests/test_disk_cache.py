@@ -0,0 +1,87 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from performance.caching import DiskCache, disk_cache
+
+
+def _store_range(path: str, start: int) -> None:
+    cache = DiskCache(Path(path))
+    for index in range(start, start + 50):
+        cache.set(f"k{index}", index)
+
+
+def test_decorator_caches_and_reports_stats(tmp_path: Path) -> None:
+    calls = []
+
+    @disk_cache(tmp_path / "cache.sqlite")
+    def square(value: int) -> int:
+        calls.append(value)
+        return value * value
+
+    assert [square(3), square(3), square(4)] == [9, 9, 16]
+    assert calls == [3, 4]
+    info = square.cache_info()
+    assert (info["l1_hits"], info["misses"], info["disk"]["entries"]) == (1, 2, 2)
+    assert info["disk"]["avg_lookup_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_decorator_supports_async_functions(tmp_path: Path) -> None:
+    calls = []
+
+    @disk_cache(tmp_path / "cache.sqlite")
+    async def fetch(name: str) -> dict:
+        calls.append(name)
+        await asyncio.sleep(0)
+        return {"name": name}
+
+    assert await fetch("a") == await fetch("a") == {"name": "a"}
+    assert calls == ["a"]
+
+
+def test_ttl_and_lru_eviction(tmp_path: Path) -> None:
+    now = [0.0]
+    cache = DiskCache(tmp_path / "cache.sqlite", ttl=10, max_entries=2, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 2.0
+    cache.set("b", 2)
+    now[0] = 4.0
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+    now[0] = 20.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["entries"] == 1
+
+
+def test_max_bytes_bounds_the_store(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache.sqlite", max_bytes=100)
+    for index in range(20):
+        cache.set(f"k{index}", "x" * 20)
+    assert cache.stats()["bytes"] <= 100
+    assert cache.get("k19")[0]
+
+
+def test_concurrent_processes_do_not_lose_writes(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    DiskCache(path)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_store_range, [str(path)] * 4, [0, 50, 100, 150]))
+    assert DiskCache(path).stats()["entries"] == 200
+
+
+def test_legacy_json_cache_file_is_moved_aside(tmp_path: Path) -> None:
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"old": 1}), encoding="utf-8")
+    cache = DiskCache(path)
+    cache.set("new", 2)
+    assert (tmp_path / "cache.json.legacy").exists()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM entries").fetchone() == (1,)
@@ -0,0 +1,193 @@
+import json
+
+import numpy as np
+import pytest
+
+from governance import fairness_pipeline
+from governance.fairness_pipeline import (
+    FairnessPipeline,
+    NpyColumns,
+    ParquetColumns,
+    bootstrap_metrics,
+)
+
+
+def _loop_rates(labels, predictions, groups):
+    selection, fpr, tpr, precision = {}, {}, {}, {}
+    for group in np.unique(groups):
+        mask = groups == group
+        y, p = labels[mask], predictions[mask]
+        selection[group] = p.mean()
+        fpr[group] = ((p == 1) & (y == 0)).sum() / max((y == 0).sum(), 1)
+        tpr[group] = ((p == 1) & (y == 1)).sum() / max((y == 1).sum(), 1)
+        precision[group] = ((p == 1) & (y == 1)).sum() / max((p == 1).sum(), 1)
+    gap = lambda rates: max(rates.values()) - min(rates.values())  # noqa: E731
+    return {
+        "demographic_parity": min(selection.values()) / max(selection.values()),
+        "false_positive_rate_gap": 1 - gap(fpr),
+        "true_positive_rate_gap": 1 - gap(tpr),
+        "equalized_odds": 1 - max(gap(fpr), gap(tpr)),
+        "predictive_parity": 1 - gap(precision),
+    }
+
+
+@pytest.fixture
+def scored():
+    rng = np.random.default_rng(3)
+    size = 20_000
+    groups = rng.choice(np.array(["female", "male", "nonbinary"]), size, p=[0.45, 0.45, 0.1])
+    scores = rng.random(size) * np.where(groups == "male", 1.0, 0.8)
+    labels = (rng.random(size) < scores).astype(int)
+    return labels, (scores >= 0.5).astype(int), groups, scores
+
+
+def test_vectorized_metrics_match_per_group_loops(scored) -> None:
+    labels, predictions, groups, scores = scored
+
+    metrics = FairnessPipeline().evaluate(labels, predictions, groups, scores=scores)
+
+    values = {metric.name: metric.value for metric in metrics}
+    for name, expected in _loop_rates(labels, predictions, groups).items():
+        assert values[name] == pytest.approx(expected)
+    assert 0.9 < values["calibration"] <= 1.0
+    assert values["demographic_parity"] < 0.8 and not metrics[0].compliant()
+
+
+def test_intersectional_groups_accept_mappings_and_matrices(scored) -> None:
+    labels, predictions, groups, _ = scored
+    age = np.where(np.arange(len(labels)) % 3 == 0, "18-25", "26+")
+    combined = np.char.add(np.char.add(groups, "|"), age)
+    pipeline = FairnessPipeline(["gender", "age"])
+
+    from_mapping = pipeline.statistics(labels, predictions, {"gender": groups, "age": age})
+    from_matrix = pipeline.evaluate(labels, predictions, np.column_stack([groups, age]))
+
+    assert sorted(from_mapping.groups) == sorted(np.unique(combined))
+    assert dict(zip(from_mapping.groups, from_mapping.counts)) == {
+        value: int((combined == value).sum()) for value in np.unique(combined)
+    }
+    expected = _loop_rates(labels, predictions, combined)
+    assert {metric.name: metric.value for metric in from_matrix} == pytest.approx(expected)
+
+
+def test_edge_cases_and_report(tmp_path) -> None:
+    pipeline = FairnessPipeline()
+    assert pipeline.evaluate(np.array([]), np.array([]), np.array([])) == []
+    with pytest.raises(ValueError):
+        pipeline.evaluate(np.array([1, 0]), np.array([1]), np.array(["a", "b"]))
+
+    metrics = pipeline.evaluate(
+        np.array([0, 0, 1, 1]), np.array([0, 0, 0, 0]), np.array([1, 2, 1, 2])
+    )
+    assert metrics[0].value == 1.0  # nobody selected: parity holds
+    # Unthresholded scores must not be read as "nobody selected".
+    with pytest.raises(ValueError, match="predictions must be binary"):
+        pipeline.evaluate(np.array([0, 1]), np.array([0.2, 0.9]), np.array(["a", "b"]))
+    with pytest.raises(ValueError, match="labels must be binary"):
+        pipeline.evaluate(np.array([0, 2]), np.array([0, 1]), np.array(["a", "b"]))
+    binary = pipeline.evaluate(np.array([False, True]), np.array([1.0, 0.0]), np.array(["a", "b"]))
+    assert binary[0].value == 0.0
+
+    report = json.loads(pipeline.generate_report(metrics, tmp_path / "fairness.json").read_text())
+    assert report["protected_attribute"] == "gender" and len(report["metrics"]) == 5
+
+
+def _chunks(labels, predictions, groups, scores, size):
+    for start in range(0, len(labels), size):
+        window = slice(start, start + size)
+        yield labels[window], predictions[window], groups[window], scores[window]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_streamed_chunks_match_in_memory_evaluation(scored, workers) -> None:
+    labels, predictions, groups, scores = scored
+    pipeline = FairnessPipeline()
+
+    expected = pipeline.evaluate(labels, predictions, groups, scores=scores)
+    streamed = pipeline.evaluate_stream(
+        _chunks(labels, predictions, groups, scores, 3_000), workers=workers
+    )
+
+    assert [metric.name for metric in streamed] == [metric.name for metric in expected]
+    assert [metric.value for metric in streamed] == pytest.approx(
+        [metric.value for metric in expected]
+    )
+
+
+def test_memory_mapped_npy_columns_across_a_process_pool(scored, tmp_path) -> None:
+    labels, predictions, groups, scores = scored
+    age = (np.arange(len(labels)) % 4).astype(np.int8)
+    paths = {}
+    for name, column in {
+        "labels": labels,
+        "predictions": predictions,
+        "gender": groups,
+        "age": age,
+    }.items():
+        paths[name] = tmp_path / f"{name}.npy"
+        np.save(paths[name], column)
+    pipeline = FairnessPipeline(["gender", "age"])
+    source = NpyColumns(
+        paths["labels"],
+        paths["predictions"],
+        {"gender": paths["gender"], "age": paths["age"]},
+        chunk_rows=4_096,
+    )
+
+    streamed = pipeline.stream_statistics(source, workers=2)
+    in_memory = pipeline.statistics(labels, predictions, {"gender": groups, "age": age})
+
+    order = [streamed.groups.index(group) for group in in_memory.groups]
+    assert np.array_equal(streamed.confusion[order], in_memory.confusion)
+    assert pipeline.evaluate_stream(source) == pipeline.evaluate(labels, predictions, [groups, age])
+
+
+def test_parquet_requires_pyarrow_and_merge_rejects_mixed_scores(scored, monkeypatch) -> None:
+    monkeypatch.setattr(fairness_pipeline, "pq", None)
+    pipeline = FairnessPipeline()
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        pipeline.evaluate_stream(ParquetColumns(["scores.parquet"]))
+
+    labels, predictions, groups, scores = scored
+    with pytest.raises(ValueError):
+        pipeline.statistics(labels, predictions, groups, scores).merge(
+            pipeline.statistics(labels, predictions, groups)
+        )
+
+
+def test_bootstrap_intervals_are_deterministic_and_reported(scored, tmp_path) -> None:
+    labels, predictions, groups, scores = scored
+    serial = FairnessPipeline(bootstrap_samples=2_000, seed=11)
+    pooled = FairnessPipeline(bootstrap_samples=2_000, seed=11, bootstrap_workers=2)
+
+    metrics = serial.evaluate(labels, predictions, groups, scores=scores)
+
+    assert metrics == pooled.evaluate(labels, predictions, groups, scores=scores)
+    for metric in metrics:
+        assert metric.lower <= metric.upper and 0.0 <= metric.compliance_probability <= 1.0
+        assert metric.upper - metric.lower < 0.2
+    parity = metrics[0]
+    assert parity.upper < parity.threshold and parity.compliance_probability == 0.0
+
+    report = json.loads(serial.generate_report(metrics, tmp_path / "fairness.json").read_text())
+    assert report["bootstrap"] == {"samples": 2_000, "confidence": 0.95, "seed": 11}
+    assert report["metrics"][0]["confidence_interval"] == [parity.lower, parity.upper]
+
+
+def test_small_groups_get_wide_intervals() -> None:
+    rng = np.random.default_rng(5)
+    groups = np.array(["large"] * 50_000 + ["small"] * 20)
+    labels = rng.integers(0, 2, len(groups))
+    predictions = rng.integers(0, 2, len(groups))
+
+    metrics = bootstrap_metrics(
+        FairnessPipeline().statistics(labels, predictions, groups), samples=1_000
+    )
+
+    parity = metrics[0]
+    assert parity.upper - parity.lower > 0.3
+    assert 0.0 < parity.compliance_probability < 1.0
+    with pytest.raises(ValueError):
+        bootstrap_metrics(
+            FairnessPipeline().statistics(labels, predictions, groups), confidence=1.5
+        )
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pytest
+import yaml
+
+from governance.model_card import (
+    MANIFEST_NAME,
+    create_model_card,
+    generate_catalog,
+    main,
+    validate_entry,
+)
+
+
+def _entry(index: int, **overrides):
+    entry = {
+        "model_name": f"fraud-detector-{index % 50}",
+        "version": f"1.{index // 50}.0",
+        "owners": ["ml-platform@contoso.com"],
+        "intended_use": "Transaction risk scoring",
+        "security_review_date": "2024-05-01",
+        "threat_model_summary": "Evasion via crafted <transactions> & data poisoning",
+        "mitigations": [
+            {"category": "Robustness", "description": "Adversarial training", "status": "Done"}
+        ],
+        "evaluation_data": {"dataset": "transactions-2024Q1", "auc": "0.94"},
+    }
+    entry.update(overrides)
+    return entry
+
+
+def _write_registry(path, entries):
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+    return path
+
+
+def test_renders_formats_and_skips_unchanged_cards(tmp_path) -> None:
+    entries = [_entry(index) for index in range(600)]
+    registry = _write_registry(tmp_path / "registry.ndjson", entries)
+    output = tmp_path / "cards"
+    formats = ["markdown", "html", "json"]
+
+    first = generate_catalog(registry, output, formats, workers=2, batch_size=100)
+    assert (first["entries"], first["rendered"], first["unchanged"], first["invalid"]) == (
+        600,
+        600,
+        0,
+        [],
+    )
+
+    card = output / "fraud-detector-7"
+    markdown = (card / "1.0.0.md").read_text()
+    assert markdown.startswith("# Model Card: fraud-detector-7 (1.0.0)")
+    assert "- **Robustness** (Done): Adversarial training" in markdown
+    assert "&lt;transactions&gt; &amp; data poisoning" in (card / "1.0.0.html").read_text()
+    assert json.loads((card / "1.0.0.json").read_text())["evaluation_data"]["auc"] == "0.94"
+
+    entries[7] = _entry(7, intended_use="Chargeback triage")
+    _write_registry(registry, entries)
+    second = generate_catalog(registry, output, formats)
+    assert (second["rendered"], second["unchanged"]) == (1, 599)
+    assert "Chargeback triage" in (card / "1.0.0.md").read_text()
+
+    (card / "1.0.0.html").unlink()
+    assert generate_catalog(registry, output, formats)["rendered"] == 1
+    assert (
+        generate_catalog(registry, output, ["markdown"])["rendered"] == 600
+    )  # format set is part of the hash
+    assert len(json.loads((output / MANIFEST_NAME).read_text())) == 600
+
+
+def test_colliding_paths_are_invalid_and_cards_follow_the_umask(tmp_path) -> None:
+    entries = [_entry(0, model_name="gpt 4"), _entry(0, model_name="gpt-4")]
+    entries.append(_entry(0, model_name="GPT-4"))
+    registry = _write_registry(tmp_path / "registry.ndjson", entries)
+    output = tmp_path / "cards"
+
+    summary = generate_catalog(registry, output)
+
+    assert summary["rendered"] == 1
+    assert [error["errors"] for error in summary["invalid"]] == [
+        ["card gpt-4@1.0.0 would overwrite gpt 4@1.0.0 at gpt-4/1.0.0"],
+        ["card GPT-4@1.0.0 would overwrite gpt 4@1.0.0 at GPT-4/1.0.0"],
+    ]
+    assert "gpt 4 (1.0.0)" in (output / "gpt-4" / "1.0.0.md").read_text()
+    umask = os.umask(0)
+    os.umask(umask)
+    assert (output / "gpt-4" / "1.0.0.md").stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_yaml_directory_with_validation_errors(tmp_path, capsys) -> None:
+    registry = tmp_path / "registry"
+    (registry / "team-a").mkdir(parents=True)
+    (registry / "team-a" / "detector.yaml").write_text(yaml.safe_dump(_entry(1)), encoding="utf-8")
+    (registry / "team-a" / "batch.yml").write_text(
+        yaml.safe_dump([_entry(2), _entry(1), _entry(3, owners="nobody")]), encoding="utf-8"
+    )
+
+    assert (
+        main(["--registry", str(registry), "--output", str(tmp_path / "cards"), "--workers", "1"])
+        == 1
+    )
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["rendered"] == 2
+    assert [error["errors"][0] for error in summary["invalid"]] == [
+        "'owners' must be a non-empty list of strings",
+        "duplicate card fraud-detector-1@1.0.0",
+    ]
+
+
+def test_validate_entry_reports_everything_create_model_card_tolerates() -> None:
+    entry = _entry(0, mitigations=[{"category": "Privacy"}], evaluation_data=[])
+    del entry["intended_use"]
+    assert validate_entry(entry) == [
+        "missing required field: intended_use",
+        "mitigation 0 needs category, description, status",
+        "'evaluation_data' must be a mapping",
+    ]
+    with pytest.raises(ValueError):
+        create_model_card(entry)
+    with pytest.raises(ValueError):
+        create_model_card(_entry(0)).render("pdf")
@@ -0,0 +1,166 @@
+import json
+import time
+
+import pytest
+import yaml
+
+from governance.policy_check import PolicyEngine, PolicyViolation, evaluate_policy, main
+
+POLICIES = [
+    {
+        "id": "RAI-001",
+        "field": "openai.publicNetworkAccess",
+        "equals": "Disabled",
+        "severity": "CRITICAL",
+    },
+    {"id": "RAI-003", "field": "openai.sku", "in": ["S0", "Standard"]},
+    {"id": "RAI-004", "field": "model.version", "regex": r"^\d+\.\d+\.\d+$"},
+    {"id": "RAI-005", "field": "model.evaluation.accuracy", "gte": 0.9},
+    {
+        "id": "RAI-006",
+        "field": "registry",
+        "all": [
+            {"field": "registry.quarantinePolicy", "equals": "enabled"},
+            {
+                "any": [
+                    {"field": "registry.signing", "equals": True},
+                    {"field": "registry.scanners.0", "exists": True},
+                ]
+            },
+        ],
+    },
+]
+
+
+def _context(**overrides):
+    context = {
+        "id": "deployment-1",
+        "openai": {"publicNetworkAccess": "Disabled", "sku": "S0"},
+        "model": {"version": "1.4.2", "evaluation": {"accuracy": "0.93"}},
+        "registry": {"quarantinePolicy": "enabled", "signing": False, "scanners": ["modelscan"]},
+    }
+    for dotted, value in overrides.items():
+        target = context
+        *parents, leaf = dotted.split("__")
+        for key in parents:
+            target = target[key]
+        target[leaf] = value
+    return context
+
+
+def test_operators_and_shared_field_extraction() -> None:
+    engine = PolicyEngine(POLICIES)
+    assert all(result["compliant"] for result in engine.evaluate(_context()))
+
+    failing = _context(
+        openai__sku="F0", model__version="latest", model__evaluation={"accuracy": 0.5}
+    )
+    failing["registry"]["scanners"] = []
+    results = {result["policy_id"]: result for result in engine.evaluate(failing)}
+
+    assert [policy for policy, result in results.items() if not result["compliant"]] == [
+        "RAI-003",
+        "RAI-004",
+        "RAI-005",
+        "RAI-006",
+    ]
+    assert results["RAI-003"]["actual"] == "F0" and results["RAI-003"]["expected"] == {
+        "in": ["S0", "Standard"]
+    }
+    assert len(engine.paths) == len(set(engine.paths)) == 8  # each distinct path is extracted once
+
+
+def test_legacy_evaluate_policy_and_compile_errors() -> None:
+    result = evaluate_policy({"id": "RAI-002", "field": "a.b", "equals": 1}, {"a": {"b": 1}})
+    assert result == {
+        "policy_id": "RAI-002",
+        "description": "",
+        "severity": "MEDIUM",
+        "compliant": True,
+        "actual": 1,
+        "expected": 1,
+    }
+    for broken in (
+        {"field": "a", "equals": 1, "in": [1]},
+        {"equals": 1},
+        {"field": "a", "gte": "high"},
+        {"field": "a", "regex": "("},
+        {"field": "a", "in": "S0"},
+    ):
+        with pytest.raises(ValueError):
+            PolicyEngine([broken])
+
+
+def test_contexts_mode_streams_ndjson(tmp_path, capsys) -> None:
+    config = tmp_path / "policies.yaml"
+    config.write_text(yaml.safe_dump(POLICIES), encoding="utf-8")
+    contexts = tmp_path / "fleet.ndjson"
+    lines = [_context(id=f"deployment-{index}") for index in range(5_000)]
+    lines[42] = _context(id="deployment-42", openai__publicNetworkAccess="Enabled")
+    contexts.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding="utf-8")
+
+    started = time.perf_counter()
+    with pytest.raises(PolicyViolation, match="1 of 5000"):
+        main(["--config", str(config), "--contexts", str(contexts), "--no-cache"])
+    assert time.perf_counter() - started < 5
+
+    violation, summary = (json.loads(line) for line in capsys.readouterr().out.splitlines())
+    assert violation["context"] == "deployment-42"
+    assert [failure["policy_id"] for failure in violation["violations"]] == ["RAI-001"]
+    assert summary == {"contexts": 5000, "noncompliant_contexts": 1, "violations": {"RAI-001": 1}}
+
+
+def _run(argv, capsys):
+    try:
+        main(argv)
+    except PolicyViolation:
+        pass
+    captured = capsys.readouterr()
+    return json.loads(captured.err.strip().splitlines()[-1])["cache"] if captured.err else None
+
+
+def test_result_cache_hits_and_reports_invalidation(tmp_path, capsys, monkeypatch) -> None:
+    config = tmp_path / "policies.yaml"
+    config.write_text(yaml.safe_dump(POLICIES), encoding="utf-8")
+    contexts = tmp_path / "fleet.ndjson"
+    contexts.write_text(
+        "".join(json.dumps(_context(id=f"d-{index}")) + "\n" for index in range(20)),
+        encoding="utf-8",
+    )
+    cache_dir = tmp_path / "shared-cache"
+    argv = ["--config", str(config), "--contexts", str(contexts), "--cache-dir", str(cache_dir)]
+
+    first = _run(argv, capsys)
+    assert (first["hits"], first["misses"], first["writes"]) == (0, 20, 20)
+
+    monkeypatch.setattr(
+        PolicyEngine, "from_file", lambda path: pytest.fail("policies were re-parsed")
+    )
+    second = _run(argv, capsys)
+    assert (second["hits"], second["misses"]) == (20, 0)
+    monkeypatch.undo()
+
+    lines = contexts.read_text().splitlines()
+    lines[3] = json.dumps(_context(id="d-3", openai__sku="F0"))
+    contexts.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    third = _run(argv, capsys)
+    assert third["invalidations"] == {"policy_changed": 0, "context_changed": 1}
+    assert third["invalidated"] == [{"source": f"{contexts}#d-3", "reason": "context_changed"}]
+
+    config.write_text(yaml.safe_dump(POLICIES[:2]), encoding="utf-8")
+    fourth = _run(argv, capsys)
+    assert fourth["invalidations"]["policy_changed"] == 20 and fourth["hits"] == 0
+    assert not list(cache_dir.rglob(".tmp-*"))
+
+
+def test_no_cache_leaves_no_files(tmp_path, capsys, monkeypatch) -> None:
+    monkeypatch.setenv("GOVERNANCE_CACHE_DIR", str(tmp_path / "cache"))
+    config = tmp_path / "policies.yaml"
+    config.write_text(yaml.safe_dump(POLICIES[:1]), encoding="utf-8")
+    context = tmp_path / "context.json"
+    context.write_text(json.dumps(_context()), encoding="utf-8")
+
+    assert _run(["--config", str(config), "--context", str(context), "--no-cache"], capsys) is None
+    assert not (tmp_path / "cache").exists()
+    stats = _run(["--config", str(config), "--context", str(context)], capsys)
+    assert stats["directory"] == str(tmp_path / "cache") and stats["writes"] == 1
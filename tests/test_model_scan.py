@@ -0,0 +1,153 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import struct
+import zipfile
+from collections import OrderedDict
+
+from model_scan import main, scan_artifact, scan_model, sha256_file, walk_pickle
+
+
+class _Exploit:
+    def __reduce__(self):
+        return (os.system, ("echo pwned",))
+
+
+def _payload(exploit, protocol):
+    return pickle.dumps({"weights": [1.0, 2.0], "hook": exploit}, protocol=protocol)
+
+
+def test_walker_flags_called_unsafe_globals_in_every_protocol() -> None:
+    benign = pickle.dumps(OrderedDict(layer=bytes(4096), name="x" * 1000), protocol=4)
+    walked = walk_pickle(io.BytesIO(benign))
+    assert walked["findings"] == [] and walked["imports"] == {"collections.OrderedDict": 1}
+
+    for protocol in (0, 2, 4, 5):
+        findings = walk_pickle(io.BytesIO(_payload(_Exploit(), protocol)))["findings"]
+        assert [(finding["severity"], finding["global"]) for finding in findings] == [
+            ("critical", f"{os.system.__module__}.system")
+        ], protocol
+
+    # Operands separated by a popped decoy still resolve to os.system, as they would when unpickled.
+    decoy = b"\x80\x04\x8c\x02os\x8c\x06system\x8c\x04junk0\x93\x8c\x02id\x85R."
+    findings = walk_pickle(io.BytesIO(decoy))["findings"]
+    assert [(finding["severity"], finding["global"]) for finding in findings] == [
+        ("critical", "os.system")
+    ]
+    marked = b"\x80\x04\x8c\x02os(\x8c\x04junk1\x8c\x06system\x93)R."
+    assert walk_pickle(io.BytesIO(marked))["findings"][0]["global"] == "os.system"
+
+    # A module name computed at load time (rot13 of "bf") cannot be vetted; calling it is critical.
+    computed = (
+        b"\x80\x04\x8c\x06codecs\x8c\x06decode\x93\x8c\x02bf\x8c\x05rot13\x86R"
+        b"\x8c\x06system\x93\x8c\x02id\x85R."
+    )
+    findings = walk_pickle(io.BytesIO(computed))["findings"]
+    assert [(finding["severity"], finding["issue"]) for finding in findings] == [
+        ("critical", "unresolved_global")
+    ]
+
+    # A reference without a call is still reported, at a lower severity.
+    referenced = walk_pickle(io.BytesIO(pickle.dumps(os.system, protocol=4)))["findings"]
+    assert [finding["severity"] for finding in referenced] == ["high"]
+
+
+def test_legacy_torch_layout_and_zip_checkpoint(tmp_path) -> None:
+    # Legacy torch.save: several pickles followed by raw storage bytes.
+    legacy = tmp_path / "model.pt"
+    legacy.write_bytes(
+        pickle.dumps(119547037146038801333356, 2) + _payload(_Exploit(), 2) + bytes(1 << 20)
+    )
+    result = scan_artifact(legacy)
+    assert result["format"] == "pickle"
+    assert [finding["issue"] for finding in result["findings"]] == ["unsafe_global"]
+
+    checkpoint = tmp_path / "checkpoint.pth"
+    with zipfile.ZipFile(checkpoint, "w") as archive:
+        archive.writestr("archive/data.pkl", _payload(_Exploit(), 2))
+        archive.writestr("archive/data/0", os.urandom(4096))
+    result = scan_artifact(checkpoint)
+    assert result["format"] == "zip" and result["pickled_members"] == 1
+    assert result["findings"][0]["source"] == "archive/data.pkl"
+
+    # The suffix is not trusted: protocol 0 pickles and renamed zip members are still walked.
+    renamed = tmp_path / "evil.dat"
+    renamed.write_bytes(b"cos\nsystem\n(S'echo hi'\ntR.")
+    result = scan_artifact(renamed)
+    assert result["format"] == "pickle" and result["findings"][0]["severity"] == "critical"
+    with zipfile.ZipFile(checkpoint, "w") as archive:
+        archive.writestr("archive/constants", _payload(_Exploit(), 0))
+        archive.writestr("archive/version", "3\n")
+    result = scan_artifact(checkpoint)
+    assert result["pickled_members"] == 1
+    assert result["findings"][0]["source"] == "archive/constants"
+    readme = tmp_path / "README.md"
+    readme.write_text("# Model\n\nIntroduction (see notes).\n")
+    assert scan_artifact(readme)["format"] == "unknown"
+
+
+def test_directory_scan_hashes_validates_and_fails_ci(tmp_path, capsys) -> None:
+    shards = tmp_path / "model"
+    shards.mkdir()
+    header = json.dumps({"w": {"dtype": "F32", "shape": [4], "data_offsets": [0, 16]}}).encode()
+    (shards / "model-00001.safetensors").write_bytes(
+        struct.pack("<Q", len(header)) + header + bytes(16)
+    )
+    broken = json.dumps({"w": {"dtype": "F32", "shape": [4], "data_offsets": [0, 999]}}).encode()
+    (shards / "model-00002.safetensors").write_bytes(
+        struct.pack("<Q", len(broken)) + broken + bytes(16)
+    )
+    large = shards / "model.onnx"
+    large.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+    (shards / "model.onnx.sha256").write_text(
+        hashlib.sha256(large.read_bytes()).hexdigest() + "  model.onnx\n"
+    )
+
+    assert (
+        sha256_file(large, chunk_size=1024 * 1024) == hashlib.sha256(large.read_bytes()).hexdigest()
+    )
+    scan = scan_model(shards, workers=3, chunk_size=1024 * 1024)
+    artifacts = {os.path.basename(artifact["path"]): artifact for artifact in scan["artifacts"]}
+    assert scan["files"] == 3 and scan["throughput_mb_s"] > 0
+    assert artifacts["model-00001.safetensors"]["tensors"] == 1
+    assert artifacts["model-00002.safetensors"]["findings"][0]["issue"] == "malformed_safetensors"
+    assert artifacts["model.onnx"]["provenance_verified"] is True
+
+    (shards / "model-00003.safetensors").write_bytes(struct.pack("<Q", 2) + b"[]")
+    (shards / "model-00004.safetensors").write_bytes(struct.pack("<Q", 8) + b'{"w": 1}')
+    unsupported = shards / "unsupported.pt"
+    with zipfile.ZipFile(unsupported, "w") as archive:
+        archive.writestr("archive/data.pkl", b"\x80\x02N.")
+    data = bytearray(unsupported.read_bytes())
+    central = data.index(b"PK\x01\x02")
+    data[8:10] = data[central + 10 : central + 12] = (99).to_bytes(
+        2, "little"
+    )  # unknown compression method
+    unsupported.write_bytes(bytes(data))
+    issues = {
+        os.path.basename(artifact["path"]): [finding["issue"] for finding in artifact["findings"]]
+        for artifact in scan_model(shards, workers=2)["artifacts"]
+    }
+    assert (
+        issues["model-00003.safetensors"]
+        == issues["model-00004.safetensors"]
+        == ["malformed_safetensors"]
+    )
+    assert issues["unsupported.pt"] == ["malformed_zip"]
+    for name in ("model-00003.safetensors", "model-00004.safetensors", "unsupported.pt"):
+        (shards / name).unlink()
+
+    output = tmp_path / "report.json"
+    assert main(["--model-path", str(shards), "--output", str(output)]) == 0
+    assert main(["--model-path", str(shards), "--output", str(output), "--fail-on", "medium"]) == 1
+    (shards / "exploit.pkl").write_bytes(_payload(_Exploit(), 4))
+    assert main(["--model-path", str(shards), "--output", str(output)]) == 1
+    report = json.loads(output.read_text())
+    assert report["vulnerabilities"] == {
+        "unsafe_deserialization": True,
+        "malformed_artifacts": True,
+        "provenance_verified": True,
+    }
+    capsys.readouterr()
@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from ai_firewall import server
+from ai_firewall.response_cache import ResponseCache, cache_key, is_cacheable, parse_cache_control
+from ai_firewall.runtime import FirewallRuntime
+
+ENV = {
+    "AZURE_OPENAI_ENDPOINT": "http://east",
+    "AZURE_OPENAI_DEPLOYMENT": "chat",
+    "AZURE_OPENAI_API_KEY": "key",
+}
+
+
+def test_cache_key_is_canonical_and_tenant_scoped() -> None:
+    first = {"temperature": 0, "messages": [{"role": "user", "content": "hi"}]}
+    second = {"messages": [{"content": "hi", "role": "user"}], "temperature": 0, "user": "alice"}
+    key = cache_key(first, "a", ["chat"], "Bearer one")
+    assert key == cache_key(second, "a", ["chat"], "Bearer one")
+    assert key != cache_key(first, "b", ["chat"], "Bearer one")
+    assert key != cache_key(first, "a", ["gpt-4"], "Bearer one")
+    assert key != cache_key(first, "a", ["chat"], "Bearer two")
+
+
+def test_only_deterministic_requests_are_cacheable() -> None:
+    assert is_cacheable({"temperature": 0})
+    assert not is_cacheable({})
+    assert not is_cacheable({"temperature": 0.7})
+    assert not is_cacheable({"temperature": 0, "stream": True})
+    assert parse_cache_control("no-cache") == (False, True)
+    assert parse_cache_control("no-store") == (False, False)
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_lru_and_expires(tmp_path: Path) -> None:
+    now = [0.0]
+    cache = ResponseCache(max_bytes=40, ttl=10, clock=lambda: now[0])
+    await cache.put("a", {"v": "x" * 10})
+    await cache.put("b", {"v": "y" * 10})
+    assert await cache.get("a") is not None
+    await cache.put("c", {"v": "z" * 10})
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+
+    now[0] = 11.0
+    assert await cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=tmp_path)
+    await cache.put("key", {"choices": []})
+
+    restarted = ResponseCache(disk_dir=tmp_path)
+    assert await restarted.get("key") == {"choices": []}
+    assert restarted.stats()["disk_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_proxy_serves_hits_and_rescans_them(
+    tmp_path: Path, monkeypatch, fake_openai, fake_openai_client
+) -> None:
+    config_file = tmp_path / "firewall.json"
+    config_file.write_text(
+        json.dumps({"response_cache_enabled": True, "telemetry_sinks": []}), encoding="utf-8"
+    )
+    runtime = FirewallRuntime(config_file, ENV, pool_client=fake_openai_client)
+    monkeypatch.setattr(server, "_runtime", runtime)
+    payload = {"temperature": 0, "messages": [{"role": "user", "content": "quarterly report"}]}
+
+    transport = httpx.ASGITransport(app=server.app)
+    headers = {"Authorization": "Bearer tenant-one"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://fw", headers=headers
+    ) as client:
+        miss = await client.post("/v1/chat/completions", json=payload)
+        hit = await client.post("/v1/chat/completions", json=payload)
+        other_tenant = await client.post(
+            "/v1/chat/completions", json=payload, headers={"x-tenant-id": "t2"}
+        )
+        bypass = await client.post(
+            "/v1/chat/completions", json=payload, headers={"cache-control": "no-cache"}
+        )
+
+        # A reload that tightens output scanning applies to entries already cached.
+        config_file.write_text(
+            json.dumps(
+                {
+                    "response_cache_enabled": True,
+                    "telemetry_sinks": [],
+                    "enable_output_scanning": True,
+                    "sensitive_keywords": ["echo"],
+                }
+            ),
+            encoding="utf-8",
+        )
+        await runtime.reload()
+        rescanned = await client.post(
+            "/v1/chat/completions", json=payload, headers={"x-tenant-id": "t2"}
+        )
+
+    assert [miss.headers["x-cache"], hit.headers["x-cache"]] == ["MISS", "HIT"]
+    assert hit.json() == miss.json()
+    assert other_tenant.headers["x-cache"] == "MISS"
+    assert bypass.headers["x-cache"] == "BYPASS"
+    assert fake_openai.calls[("east", "chat")] == 3
+    assert rescanned.status_code == 403
+    assert fake_openai.calls[("east", "chat")] == 3
+    assert runtime.state.response_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_is_scoped_to_the_callers_credential(
+    tmp_path: Path, monkeypatch, fake_openai_client
+) -> None:
+    config_file = tmp_path / "firewall.json"
+    config_file.write_text(
+        json.dumps({"response_cache_enabled": True, "telemetry_sinks": []}), encoding="utf-8"
+    )
+    monkeypatch.setattr(
+        server, "_runtime", FirewallRuntime(config_file, ENV, pool_client=fake_openai_client)
+    )
+    payload = {"temperature": 0, "messages": [{"role": "user", "content": "quarterly report"}]}
+
+    async def post(headers):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url="http://fw"
+        ) as client:
+            response = await client.post("/v1/chat/completions", json=payload, headers=headers)
+        return response.headers["x-cache"]
+
+    victim = {"x-tenant-id": "contoso", "Authorization": "Bearer contoso-key"}
+    assert [await post(victim), await post(victim)] == ["MISS", "HIT"]
+    assert await post({"x-tenant-id": "contoso", "Authorization": "Bearer attacker-key"}) == "MISS"
+    assert await post({"x-tenant-id": "contoso"}) == "BYPASS"
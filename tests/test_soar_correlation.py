@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from orchestrator.correlation import CorrelationEngine
+from orchestrator.workflow_engine import IncidentSeverity, SOAROrchestrator
+
+
+class CountingIntegration:
+    def __init__(self) -> None:
+        self.pages = 0
+
+    async def trigger_incident(self, user_id: str) -> None:
+        self.pages += 1
+        await asyncio.sleep(0.01)
+
+
+PLAYBOOK = {
+    "incident_type": "PROMPT_INJECTION",
+    "steps": [{"name": "Page", "action": "block_user"}],
+}
+
+
+def _event(user: str, severity: str = "HIGH") -> dict:
+    return {
+        "type": "PROMPT_INJECTION",
+        "severity": severity,
+        "context": {"user_id": user, "model_name": "gpt-4o"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_burst_from_one_user_pages_once() -> None:
+    pager = CountingIntegration()
+    orchestrator = SOAROrchestrator(
+        {"PROMPT_INJECTION": PLAYBOOK}, {"pagerduty": pager}, correlation=CorrelationEngine(60)
+    )
+    incidents = await orchestrator.handle_events(
+        [_event("mallory") for _ in range(499)] + [_event("mallory", "CRITICAL"), _event("eve")]
+    )
+
+    # The escalation to CRITICAL is not folded in: it opens its own incident and pages again.
+    assert pager.pages == 3
+    assert len({incident.id for incident in incidents}) == 3
+    assert incidents[0].suppressed_events == 498
+    assert incidents[0].severity is IncidentSeverity.HIGH
+    assert incidents[499].severity is IncidentSeverity.CRITICAL
+    stats = orchestrator.correlation.stats()
+    assert (stats["suppressed"], stats["groups_opened"]) == (498, 3)
+
+
+@pytest.mark.asyncio
+async def test_duplicates_after_the_playbook_finishes_are_still_folded() -> None:
+    pager = CountingIntegration()
+    orchestrator = SOAROrchestrator(
+        {"PROMPT_INJECTION": PLAYBOOK}, {"pagerduty": pager}, correlation=CorrelationEngine(60)
+    )
+    first = await orchestrator.handle_event(_event("mallory"))
+    second = await orchestrator.handle_event(_event("mallory"))
+
+    assert first.status == "IN_PROGRESS"
+    assert second.id == first.id and first.suppressed_events == 1
+    assert pager.pages == 1
+    assert orchestrator.correlation.stats()["open_groups"] == 1
+
+
+def test_window_slides_with_each_event_and_expires() -> None:
+    now = [0.0]
+    engine = CorrelationEngine(window_seconds=10, clock=lambda: now[0])
+    engine.register(_event("u"), "INC-1")
+    for tick in (5.0, 12.0, 21.0):
+        now[0] = tick
+        assert engine.match(_event("u")) == "INC-1"
+    assert engine.suppressed_for("INC-1") == 3
+
+    now[0] = 40.0
+    assert engine.match(_event("u")) is None
+    assert engine.stats()["open_groups"] == 0
+
+
+def test_steady_stream_reopens_after_the_max_window() -> None:
+    now = [0.0]
+    engine = CorrelationEngine(window_seconds=10, clock=lambda: now[0], max_window_seconds=30)
+    engine.register(_event("u"), "INC-1")
+    for tick in range(5, 31, 5):
+        now[0] = float(tick)
+        assert engine.match(_event("u")) == "INC-1"
+
+    now[0] = 35.0
+    assert engine.peek(_event("u")) is None
+    engine.register(_event("u"), "INC-2")
+    assert engine.match(_event("u")) == "INC-2"
+    assert engine.suppressed_for("INC-1") == 0
+
+
+def test_keys_are_configurable() -> None:
+    engine = CorrelationEngine(keys=("type",))
+    engine.register(_event("a"), "INC-1")
+    assert engine.match(_event("b")) == "INC-1"
+    engine.release("INC-1")
+    assert engine.match(_event("b")) is None
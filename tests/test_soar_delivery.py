@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import json
+import threading
+
+import pytest
+
+from integrations.delivery import DeliveryError, DeliveryService, Destination
+from integrations.pagerduty_connector import PagerDutyConnector
+from integrations.sentinel_connector import SentinelConnector
+from integrations.slack_notifier import SlackNotifier
+
+SHARED_KEY = base64.b64encode(b"workspace-key").decode("ascii")
+
+
+def _json(items):
+    return {"json": items}
+
+
+@pytest.mark.asyncio
+async def test_slack_messages_are_folded_into_one_digest(
+    fake_receiver, fake_receiver_client
+) -> None:
+    delivery = DeliveryService(client=fake_receiver_client)
+    slack = SlackNotifier("http://receiver/hooks/slack", delivery=delivery, digest_window=0.05)
+    for message in ("blocked u1", "quarantined m1", "blocked u1"):
+        await slack.send_message(message)
+    await asyncio.sleep(0.1)
+    await delivery.aclose()
+
+    [request] = fake_receiver.received("hooks/slack")
+    assert request.json() == {"text": "blocked u1 (x2)\nquarantined m1"}
+    stats = delivery.stats()["slack"]
+    assert stats["batches"] == 1 and stats["max_batch_size"] == 3
+    assert stats["latency_p95_ms"] >= 40
+
+
+@pytest.mark.asyncio
+async def test_sentinel_records_are_batched_and_signed(fake_receiver, fake_receiver_client) -> None:
+    delivery = DeliveryService(client=fake_receiver_client)
+    sentinel = SentinelConnector(
+        "ws",
+        SHARED_KEY,
+        delivery=delivery,
+        endpoint="http://receiver",
+        batch_window=0.05,
+        max_batch=2,
+    )
+    for index in range(3):
+        await sentinel.send_incident({"id": f"INC{index}"})
+    await delivery.flush()
+
+    requests = fake_receiver.received("api/logs")
+    assert [len(request.json()) for request in requests] == [2, 1]
+    assert requests[0].headers["authorization"].startswith("SharedKey ws:")
+    assert requests[0].headers["log-type"] == "SOARIncident"
+
+
+@pytest.mark.asyncio
+async def test_pagerduty_triggers_coalesce_by_subject(fake_receiver, fake_receiver_client) -> None:
+    delivery = DeliveryService(client=fake_receiver_client)
+    pagerduty = PagerDutyConnector("routing", delivery=delivery, url="http://receiver/v2/enqueue")
+    await asyncio.gather(
+        pagerduty.trigger_incident("u1"),
+        pagerduty.trigger_incident("u1"),
+        pagerduty.trigger_incident("u2"),
+    )
+
+    dedup_keys = sorted(
+        request.json()["dedup_key"] for request in fake_receiver.received("v2/enqueue")
+    )
+    assert dedup_keys == ["soar-u1", "soar-u2"]
+    assert delivery.stats()["pagerduty"]["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_and_honours_retry_after(fake_receiver, fake_receiver_client) -> None:
+    delivery = DeliveryService(client=fake_receiver_client)
+    delivery.register(Destination("hook", "http://receiver/hook", _json, backoff=0.01))
+    fake_receiver.fail("hook", 503)
+    fake_receiver.fail("hook", 429, retry_after=0.1)
+    started = asyncio.get_running_loop().time()
+    await delivery.deliver("hook", {"id": 1})
+
+    assert asyncio.get_running_loop().time() - started >= 0.1
+    assert len(fake_receiver.received("hook")) == 1
+    stats = delivery.stats()["hook"]
+    assert (stats["requests"], stats["retries"], stats["throttled"]) == (3, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_rejected_batches_are_dead_lettered(
+    fake_receiver, fake_receiver_client, tmp_path
+) -> None:
+    dead_letters = tmp_path / "dead.ndjson"
+    delivery = DeliveryService(client=fake_receiver_client, dead_letter_path=dead_letters)
+    pagerduty = PagerDutyConnector("routing", delivery=delivery, url="http://receiver/v2/enqueue")
+    fake_receiver.fail("v2/enqueue", 400)
+
+    with pytest.raises(DeliveryError):
+        await pagerduty.trigger_incident("u1")
+
+    [record] = [json.loads(line) for line in dead_letters.read_text().splitlines()]
+    assert record["destination"] == "pagerduty"
+    assert record["attempts"] == 1 and record["error"].startswith("HTTP 400")
+    assert delivery.stats()["pagerduty"]["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_is_dead_lettered_off_the_loop(
+    fake_receiver_client, tmp_path, monkeypatch
+) -> None:
+    dead_letters = tmp_path / "dead.ndjson"
+    delivery = DeliveryService(client=fake_receiver_client, dead_letter_path=dead_letters)
+    delivery.register(
+        Destination("hook", "http://receiver/hook", _json, batch_window=0.05, capacity=1)
+    )
+    threads = []
+    append = delivery._append_dead_letter
+    monkeypatch.setattr(
+        delivery,
+        "_append_dead_letter",
+        lambda line: (threads.append(threading.get_ident()), append(line)),
+    )
+
+    accepted, overflow = delivery.submit("hook", {"n": 1}), delivery.submit("hook", {"n": 2})
+    assert await overflow is False
+    assert json.loads(dead_letters.read_text())["error"] == "queue full"
+    assert len(threads) == 1 and threads[0] != threading.get_ident()
+    await delivery.aclose()
+    assert await accepted is True
+
+
+@pytest.mark.asyncio
+async def test_request_errors_dead_letter_instead_of_hanging(fake_receiver_client) -> None:
+    def broken(items):
+        raise ValueError("bad shared key")
+
+    delivery = DeliveryService(client=fake_receiver_client)
+    delivery.register(Destination("broken", "http://receiver/hook", broken))
+    delivery.register(Destination("invalid", "http://receiver:bad/hook", _json))
+
+    for name in ("broken", "invalid"):
+        with pytest.raises(DeliveryError):
+            await asyncio.wait_for(delivery.deliver(name, {"n": 1}), timeout=1)
+    assert [record["attempts"] for record in delivery.dead_letters] == [1, 1]
+    assert delivery.dead_letters[0]["error"] == "ValueError: bad shared key"
+    await delivery.aclose()
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from automation.hunting_engine import HuntingEngine, parse_query
+from automation.threat_hunting import generate_hunting_queries, hunt
+
+
+def _write_ndjson(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def exports(tmp_path):
+    diagnostics = [
+        {
+            "ResourceId": f"/SUBSCRIPTIONS/S1/ACCOUNTS/AOAI/DEPLOYMENTS/{model}",
+            "OperationName": operation,
+            "ResultType": result,
+        }
+        for index in range(3000)
+        for model, operation, result in [
+            (
+                ("GPT-4O", "GPT-35-TURBO", "EMBEDDINGS")[index % 3],
+                ("ChatCompletions", "Embeddings")[index % 2],
+                ("Blocked", "Success")[index % 5 == 0],
+            )
+        ]
+    ]
+    alerts = [
+        {
+            "AlertName": "Prompt injection",
+            "Entities": json.dumps([{"model": "gpt-4o"}]),
+            "Severity": "High",
+        },
+        {
+            "AlertName": "Jailbreak",
+            "Entities": json.dumps([{"model": "gpt-4o-mini"}]),
+            "Severity": "Medium",
+        },
+        {"AlertName": "Data exfiltration", "Entities": "gpt-4o", "Severity": "High"},
+        {"AlertName": "Consumer app", "Entities": "chatgpt-4o", "Severity": "Low"},
+    ]
+    return {
+        "AzureDiagnostics": [_write_ndjson(tmp_path / "diagnostics.ndjson", diagnostics)],
+        "SecurityAlert": [_write_ndjson(tmp_path / "alerts.ndjson", alerts)],
+    }
+
+
+def test_generated_queries_run_locally(exports) -> None:
+    with HuntingEngine(exports, workers=1) as engine:
+        results = hunt("gpt-4o", engine)
+
+    alerts, diagnostics = (results[query] for query in generate_hunting_queries("gpt-4o"))
+    # ``has`` matches whole terms: chatgpt-4o is not a hit; ``contains`` is case-insensitive.
+    assert [row["AlertName"] for row in alerts.rows] == [
+        "Prompt injection",
+        "Jailbreak",
+        "Data exfiltration",
+    ]
+    assert len(diagnostics.rows) == 1000
+    assert diagnostics.stats["parsed"] == 1000  # push-down skipped the other 2000 lines
+
+
+@pytest.mark.parametrize("workers, chunk_bytes", [(1, 64 * 1024 * 1024), (3, 8 * 1024)])
+def test_summarize_and_project_match_across_chunks(exports, workers, chunk_bytes) -> None:
+    with HuntingEngine(exports, workers=workers, chunk_bytes=chunk_bytes) as engine:
+        summary = engine.run(
+            "AzureDiagnostics | where ResourceId contains 'gpt' and ResultType != 'Success' "
+            "| summarize count() by ResourceId, OperationName"
+        )
+        projected = engine.run(
+            "AzureDiagnostics | where OperationName == 'Embeddings' | project ResourceId | take 5"
+        )
+
+    assert summary.stats["lines"] == 3000
+    assert sum(row["count_"] for row in summary.rows) == 1600
+    assert {row["OperationName"] for row in summary.rows} == {"ChatCompletions", "Embeddings"}
+    assert len(projected.rows) == 5 and set(projected.rows[0]) == {"ResourceId"}
+    if workers > 1:
+        assert summary.stats["chunks"] > 1
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "AzureDiagnostics | sort by TimeGenerated",
+        "AzureDiagnostics | where ResourceId startswith 'x'",
+        "AzureDiagnostics | summarize dcount(ResourceId)",
+        "AzureDiagnostics | project ResourceId | where ResourceId has 'x'",
+    ],
+)
+def test_unsupported_kql_is_rejected(query) -> None:
+    with pytest.raises(ValueError):
+        parse_query(query)
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from orchestrator.incident_store import IncidentStore, NDJSONIncidentArchive, SQLiteIncidentArchive
+from orchestrator.models import AISecurityIncident, IncidentSeverity, new_incident_id
+from orchestrator.workflow_engine import SOAROrchestrator
+
+
+def _incident(user: str, severity: IncidentSeverity = IncidentSeverity.HIGH) -> AISecurityIncident:
+    return AISecurityIncident("PROMPT_INJECTION", severity, {"user_id": user})
+
+
+def test_ids_are_unique_and_records_are_slotted() -> None:
+    assert len({new_incident_id() for _ in range(10_000)}) == 10_000
+    assert not hasattr(_incident("u"), "__dict__")
+
+
+def test_indexes_follow_updates() -> None:
+    store = IncidentStore()
+    first, second = _incident("alice"), _incident("bob", IncidentSeverity.CRITICAL)
+    store.add(first)
+    store.add(second)
+
+    first.status = "IN_PROGRESS"
+    store.update(first)
+    assert store.query(status="IN_PROGRESS") == [first]
+    assert store.query(status="NEW", severity=IncidentSeverity.CRITICAL) == [second]
+    assert store.query(user_id="alice", incident_type="PROMPT_INJECTION") == [first]
+    assert store.query(user_id="carol") == []
+    with pytest.raises(ValueError):
+        store.add(first)
+
+
+@pytest.mark.parametrize("archive_cls", [SQLiteIncidentArchive, NDJSONIncidentArchive])
+def test_closed_incidents_are_evicted_to_the_archive(tmp_path: Path, archive_cls) -> None:
+    archive = archive_cls(tmp_path / "archive")
+    store = IncidentStore(archive=archive, retain_resolved=2, eviction_batch=3)
+    incidents = [_incident(f"user-{index}") for index in range(6)]
+    for incident in incidents:
+        store.add(incident)
+        incident.status = "RESOLVED"
+        store.update(incident)
+
+    assert len(store) == 3
+    assert store.stats()["archived"] == 3
+    assert incidents[0].id not in store
+    assert store.lookup(incidents[0].id).context == {"user_id": "user-0"}
+    resolved = store.query(status="RESOLVED", include_archived=True)
+    assert sorted(incident.id for incident in resolved) == sorted(
+        incident.id for incident in incidents
+    )
+    assert len(store.query(status="RESOLVED", include_archived=True, limit=4)) == 4
+    assert store.query(user_id="user-1", include_archived=True)[0].id == incidents[1].id
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_memory_stays_bounded(tmp_path: Path) -> None:
+    store = IncidentStore(
+        archive=SQLiteIncidentArchive(tmp_path / "incidents.db"), retain_resolved=10
+    )
+    orchestrator = SOAROrchestrator({}, {}, store=store)
+    await orchestrator.handle_events(
+        {"type": "UNMAPPED", "context": {"user_id": str(i)}} for i in range(500)
+    )
+    assert len(orchestrator.active_incidents) <= 10 + store.eviction_batch
+    assert store.stats()["archived"] + len(store) == 500
+
+
+@pytest.mark.asyncio
+async def test_unresolved_playbooks_are_evicted_too(tmp_path: Path) -> None:
+    store = IncidentStore(
+        archive=NDJSONIncidentArchive(tmp_path / "incidents.ndjson"), retain_resolved=10
+    )
+    playbooks = {
+        "PROMPT_INJECTION": {"steps": [{"action": "quarantine_model"}]}
+    }  # no model_name: unresolved
+    orchestrator = SOAROrchestrator(playbooks, {}, store=store)
+    incidents = await orchestrator.handle_events(
+        {"type": "PROMPT_INJECTION", "context": {"user_id": str(i)}} for i in range(300)
+    )
+    assert {incident.status for incident in incidents} == {"IN_PROGRESS"}
+    assert len(store) <= 10 + store.eviction_batch
+    assert store.lookup(incidents[0].id).status == "IN_PROGRESS"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from orchestrator.ingestion import EventIngestor, SeverityQueue
+from orchestrator.workflow_engine import IncidentSeverity, SOAROrchestrator
+
+
+class RecordingOrchestrator(SOAROrchestrator):
+    def __init__(self) -> None:
+        super().__init__({}, {})
+        self.seen = []
+
+    async def handle_event(self, event):
+        self.seen.append(event["id"])
+        if event.get("explode"):
+            raise RuntimeError("boom")
+        return await super().handle_event(event)
+
+
+def test_full_queue_displaces_lower_severity_only() -> None:
+    queue = SeverityQueue(capacity=2)
+    assert queue.push(IncidentSeverity.LOW, ({"id": 1}, 0.0)) == (True, None)
+    assert queue.push(IncidentSeverity.MEDIUM, ({"id": 2}, 0.0)) == (True, None)
+    assert queue.push(IncidentSeverity.CRITICAL, ({"id": 3}, 0.0)) == (True, IncidentSeverity.LOW)
+    assert queue.push(IncidentSeverity.MEDIUM, ({"id": 4}, 0.0)) == (False, None)
+    assert [queue.pop()[0]["id"] for _ in range(2)] == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_critical_events_are_processed_first() -> None:
+    orchestrator = RecordingOrchestrator()
+    ingestor = EventIngestor(orchestrator, workers=1, capacity=10)
+    for index, severity in enumerate(["LOW", "LOW", "HIGH", "CRITICAL"]):
+        assert await ingestor.offer({"id": index, "severity": severity})
+    ingestor.start()
+    await ingestor.stop()
+    assert orchestrator.seen == [3, 2, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_metrics_track_drops_failures_and_latency(caplog) -> None:
+    orchestrator = RecordingOrchestrator()
+    ingestor = EventIngestor(orchestrator, workers=2, capacity=2)
+    accepted = await ingestor.submit_many(
+        [{"id": 0, "severity": "LOW"}, {"id": 1, "severity": "LOW", "explode": True}, {"id": 2}],
+        wait=False,
+    )
+    assert accepted == 2
+    ingestor.start()
+    await ingestor.stop()
+    metrics = ingestor.metrics()
+    assert (metrics["processed"], metrics["failed"], metrics["dropped"]["LOW"]) == (1, 1, 1)
+    assert metrics["queue_depth"] == 0
+    assert metrics["processing_ms"]["p50"] >= 0
+    assert "Failed to handle event" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_submit_waits_for_space() -> None:
+    orchestrator = RecordingOrchestrator()
+    ingestor = EventIngestor(orchestrator, workers=1, capacity=1)
+    await ingestor.submit({"id": 0})
+    blocked = asyncio.create_task(ingestor.submit({"id": 1}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    ingestor.start()
+    assert await blocked
+    await ingestor.stop()
+    assert orchestrator.seen == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_handle_events_preserves_order() -> None:
+    orchestrator = SOAROrchestrator({}, {})
+    incidents = await orchestrator.handle_events(
+        [{"type": "A", "severity": "high"}, {"type": "B", "severity": "bogus"}], concurrency=2
+    )
+    assert [(incident.incident_type, incident.severity) for incident in incidents] == [
+        ("A", IncidentSeverity.HIGH),
+        ("B", IncidentSeverity.LOW),
+    ]
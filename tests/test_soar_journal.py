@@ -0,0 +1,168 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from orchestrator.journal import FINISHED, OPENED, STEP_FINISHED, PlaybookJournal
+from orchestrator.workflow_engine import SOAROrchestrator
+
+PLAYBOOK = yaml.safe_load(
+    (
+        Path(__file__).resolve().parents[1]
+        / "soar-platform"
+        / "playbooks"
+        / "prompt_injection_response.yaml"
+    ).read_text()
+)
+EVENT = {
+    "type": "PROMPT_INJECTION",
+    "severity": "HIGH",
+    "context": {"user_id": "u1", "model_name": "m1"},
+}
+
+
+class Integrations:
+    """Counts calls; ``collect`` blocks until ``release`` is set, if one is given."""
+
+    def __init__(self, release: asyncio.Event | None = None) -> None:
+        self.release = release
+        self.calls = []
+
+    async def trigger_incident(self, user_id: str) -> None:
+        self.calls.append("block_user")
+
+    async def collect(self, context, incident_id=None):
+        self.calls.append("collect_forensics")
+        if self.release is not None:
+            await self.release.wait()
+        return "blob://evidence"
+
+    async def quarantine_model(self, model_name: str) -> None:
+        self.calls.append("quarantine_model")
+
+
+def _orchestrator(stub: Integrations, journal: PlaybookJournal) -> SOAROrchestrator:
+    integrations = {"pagerduty": stub, "forensics": stub, "ml": stub}
+    return SOAROrchestrator({PLAYBOOK["incident_type"]: PLAYBOOK}, integrations, journal=journal)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_share_commits(tmp_path) -> None:
+    journal = PlaybookJournal(tmp_path / "wal.ndjson", flush_interval=0.01)
+    await asyncio.gather(
+        *(journal.append(OPENED, f"INC{i}", incident={"id": f"INC{i}"}) for i in range(200))
+    )
+    stats = journal.stats()
+    await journal.close()
+
+    assert stats["records"] == 200
+    assert stats["batches"] < 20
+    lines = (tmp_path / "wal.ndjson").read_text().splitlines()
+    assert len(lines) == 200
+
+
+@pytest.mark.asyncio
+async def test_recover_resumes_without_rerunning_completed_steps(tmp_path) -> None:
+    path = tmp_path / "wal.ndjson"
+    crashed = Integrations(release=asyncio.Event())
+    journal = PlaybookJournal(path)
+    task = asyncio.create_task(_orchestrator(crashed, journal).handle_event(EVENT))
+    # Wait until quarantine_model's completion is durable while the transcript collection hangs.
+    while journal.stats()["records"] < 6:
+        await asyncio.sleep(0.005)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await journal.close()
+    assert crashed.calls.count("quarantine_model") == 1
+
+    restarted = Integrations()
+    journal = PlaybookJournal(path)
+    orchestrator = _orchestrator(restarted, journal)
+    recovered = await orchestrator.recover()
+    await journal.close()
+
+    assert len(recovered) == 1
+    incident = recovered[0]
+    assert incident.status == "RESOLVED"
+    assert restarted.calls == ["collect_forensics"]
+    assert [record["step_id"] for record in incident.actions_taken] == [
+        "block_user",
+        "quarantine_model",
+        "collect_transcript",
+    ]
+    assert orchestrator.active_incidents[incident.id] is incident
+    assert PlaybookJournal(path).replay() == []
+
+
+@pytest.mark.asyncio
+async def test_finished_playbooks_are_compacted_away(tmp_path) -> None:
+    path = tmp_path / "wal.ndjson"
+    journal = PlaybookJournal(path, compact_bytes=4096)
+    orchestrator = _orchestrator(Integrations(), journal)
+    for index in range(20):
+        await orchestrator.handle_event(
+            {**EVENT, "context": {"user_id": f"u{index}", "model_name": "m1"}}
+        )
+    await journal.close()
+
+    assert journal.stats()["compactions"] > 0
+    assert path.stat().st_size < 4096
+    assert PlaybookJournal(path).replay() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_commit_retries_records_nobody_waits_on(tmp_path, caplog) -> None:
+    path = tmp_path / "wal.ndjson"
+    journal = PlaybookJournal(path)
+    await journal.append(OPENED, "INC1", incident={"id": "INC1"})
+    write = journal._write
+
+    def torn_write(data: bytes) -> None:
+        write(data[:10])
+        journal._write = write
+        raise OSError("disk full")
+
+    journal._write = torn_write
+    journal.record(FINISHED, "INC1", status="RESOLVED")
+    with pytest.raises(OSError):
+        await journal.append(OPENED, "INC2", incident={"id": "INC2"})
+    assert journal.stats()["pending"] == 1
+    await journal.close()
+
+    # The caller of append() saw the failure; the finished record was written on retry.
+    assert PlaybookJournal(path).replay() == []
+
+    def failing_write(data: bytes) -> None:
+        raise OSError("disk full")
+
+    journal = PlaybookJournal(path)
+    journal._write = failing_write
+    journal.record(OPENED, "INC3", incident={"id": "INC3"})
+    await journal.close()
+    assert "1 records that could not be written" in caplog.text
+
+
+def test_replay_ignores_torn_tail_and_finished_incidents(tmp_path) -> None:
+    path = tmp_path / "wal.ndjson"
+    record = {"id": "INC1", "incident_type": "PROMPT_INJECTION", "severity": "LOW", "context": {}}
+    step = {"step_id": "block_user", "result": {"resolved": False}}
+    lines = [
+        {
+            "kind": OPENED,
+            "incident_id": "INC1",
+            "incident": {**record, "timestamp": "2024-01-01T00:00:00+00:00"},
+        },
+        {"kind": STEP_FINISHED, "incident_id": "INC1", "record": step},
+        {"kind": OPENED, "incident_id": "INC2", "incident": {**record, "id": "INC2"}},
+        {"kind": "playbook_finished", "incident_id": "INC2", "status": "RESOLVED"},
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"kind": "step_fin')
+
+    recovered = PlaybookJournal(path).replay()
+
+    assert [entry.incident["id"] for entry in recovered] == ["INC1"]
+    assert recovered[0].finished_steps == [step]
+    assert len(path.read_text().splitlines()) == 2
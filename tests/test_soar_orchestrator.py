@@ -0,0 +1,114 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+import yaml
+
+from orchestrator.workflow_engine import SOAROrchestrator, compile_playbook
+
+PLAYBOOK_DIR = Path(__file__).resolve().parents[1] / "soar-platform" / "playbooks"
+
+
+class SlowIntegrations:
+    """Stub integrations that each take ``delay`` seconds."""
+
+    def __init__(self, delay: float = 0.05, failures: int = 0) -> None:
+        self.delay = delay
+        self.failures = failures
+        self.calls = []
+
+    async def trigger_incident(self, user_id: str) -> None:
+        self.calls.append("block_user")
+        await asyncio.sleep(self.delay)
+
+    async def collect(self, context, incident_id=None):
+        self.calls.append("collect_forensics")
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("storage unavailable")
+        await asyncio.sleep(self.delay)
+        return "blob://evidence"
+
+    async def quarantine_model(self, model_name: str) -> None:
+        self.calls.append("quarantine_model")
+        await asyncio.sleep(self.delay)
+
+
+def _orchestrator(playbook, stub: SlowIntegrations) -> SOAROrchestrator:
+    integrations = {"pagerduty": stub, "forensics": stub, "ml": stub}
+    return SOAROrchestrator({playbook["incident_type"]: playbook}, integrations)
+
+
+EVENT = {
+    "type": "PROMPT_INJECTION",
+    "severity": "HIGH",
+    "context": {"user_id": "u1", "model_name": "m1"},
+}
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently() -> None:
+    playbook = yaml.safe_load((PLAYBOOK_DIR / "prompt_injection_response.yaml").read_text())
+    stub = SlowIntegrations(delay=0.1)
+    started = asyncio.get_running_loop().time()
+    incident = await _orchestrator(playbook, stub).handle_event(EVENT)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert incident.status == "RESOLVED"
+    assert elapsed < 0.28  # two levels of the DAG, not three sequential steps
+    assert {record["step_id"] for record in incident.actions_taken} == {
+        "block_user",
+        "collect_transcript",
+        "quarantine_model",
+    }
+    assert all(record["duration_ms"] >= 90 for record in incident.actions_taken)
+
+
+@pytest.mark.asyncio
+async def test_legacy_playbooks_stay_sequential_and_stop_when_resolved() -> None:
+    playbook = {
+        "incident_type": "PROMPT_INJECTION",
+        "steps": [
+            {"name": "Quarantine", "action": "quarantine_model"},
+            {"name": "Block", "action": "block_user"},
+        ],
+    }
+    stub = SlowIntegrations(delay=0)
+    incident = await _orchestrator(playbook, stub).handle_event(EVENT)
+    assert stub.calls == ["quarantine_model"]
+    assert [record["step"] for record in incident.actions_taken] == ["Quarantine"]
+
+
+@pytest.mark.asyncio
+async def test_steps_retry_and_time_out() -> None:
+    playbook = {
+        "incident_type": "PROMPT_INJECTION",
+        "steps": [
+            {"id": "collect", "action": "collect_forensics", "retries": 2, "retry_backoff": 0},
+            {"id": "slow", "action": "block_user", "timeout": 0.01, "depends_on": []},
+        ],
+    }
+    stub = SlowIntegrations(delay=0.2, failures=1)
+    incident = await _orchestrator(playbook, stub).handle_event(EVENT)
+    records = {record["step_id"]: record for record in incident.actions_taken}
+    assert records["collect"]["status"] == "completed"
+    assert records["collect"]["attempts"] == 2
+    assert records["slow"]["status"] == "timeout"
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([{"id": "a", "action": "block_user", "depends_on": ["missing"]}], "unknown steps"),
+        (
+            [
+                {"id": "a", "action": "block_user", "depends_on": ["b"]},
+                {"id": "b", "action": "block_user", "depends_on": ["a"]},
+            ],
+            "cycle",
+        ),
+    ],
+)
+def test_invalid_graphs_are_rejected(steps, message) -> None:
+    with pytest.raises(ValueError, match=message):
+        compile_playbook({"steps": steps})
@@ -0,0 +1,177 @@
+import json
+import time
+
+import pytest
+
+from automation.auto_remediation import (
+    ManagementClient,
+    RemediationExecutor,
+    build_plan,
+    load_findings,
+    subscription_of,
+)
+
+
+def _resource(subscription: str, name: str) -> str:
+    return (
+        f"/subscriptions/{subscription}/resourceGroups/rg/providers/"
+        f"Microsoft.CognitiveServices/accounts/{name}"
+    )
+
+
+def _findings(subscriptions=("sub-a", "sub-b"), per_subscription=10):
+    findings = []
+    for subscription in subscriptions:
+        for index in range(per_subscription):
+            resource_id = _resource(subscription, f"aoai-{index}")
+            findings.append(
+                {"rule_id": "OPENAI-001", "resource_id": resource_id, "severity": "high"}
+            )
+            findings.append(
+                {"rule_id": "COG-003", "resource_id": resource_id, "severity": "medium"}
+            )
+    return findings
+
+
+def test_build_plan_groups_and_deduplicates_findings() -> None:
+    resource_id = _resource("sub-a", "aoai")
+    findings = _findings(per_subscription=2) + [
+        {"rule_id": "OPENAI-001", "resource_id": resource_id},
+        {"rule_id": "OPENAI-001", "resource_id": resource_id},
+        {"rule_id": "ML-001", "resource_id": "/subscriptions/sub-a/.../workspaces/ml"},
+    ]
+
+    plan = build_plan(findings)
+
+    assert subscription_of(resource_id) == "sub-a"
+    assert plan.summary() == {
+        "tasks": 9,
+        "manual_findings": 1,
+        "by_action": {"deny_public_network_access": 4, "disable_public_network_access": 5},
+        "by_subscription": {"sub-a": 5, "sub-b": 4},
+    }
+
+
+@pytest.mark.asyncio
+async def test_executes_plan_and_dry_run_does_not_call_the_api(
+    fake_arm, fake_arm_client, tmp_path
+) -> None:
+    plan = build_plan(_findings())
+    progress = []
+    executor = RemediationExecutor(
+        ManagementClient(endpoint="http://arm", client=fake_arm_client),
+        rate_per_subscription=1000,
+        checkpoint_path=tmp_path / "checkpoint.ndjson",
+        progress=progress.append,
+        progress_every=10,
+    )
+
+    preview = await executor.run(plan, dry_run=True)
+    assert preview["plan"]["tasks"] == 40 and len(preview["pending"]) == 40
+    assert fake_arm.requests == []
+
+    summary = await executor.run(plan)
+
+    assert summary["completed"] == 40 and summary["failed"] == 0 and summary["tasks_per_second"] > 0
+    assert [update["completed"] for update in progress] == [10, 20, 30, 40, 40]
+    request = fake_arm.received(_resource("sub-b", "aoai-3"))[0]
+    assert request.method == "PATCH"
+    assert request.json()["properties"]["networkAcls"]["defaultAction"] == "Deny"
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint_after_failures(fake_arm, fake_arm_client, tmp_path) -> None:
+    plan = build_plan(_findings(subscriptions=("sub-a",), per_subscription=5))
+    checkpoint = tmp_path / "checkpoint.ndjson"
+    failing = _resource("sub-a", "aoai-2")
+    fake_arm.fail(failing, 403, times=2)
+    fake_arm.fail(_resource("sub-a", "aoai-4"), 429, retry_after=0.01)
+    client = ManagementClient(endpoint="http://arm", client=fake_arm_client)
+
+    first = await RemediationExecutor(client, backoff=0.01, checkpoint_path=checkpoint).run(plan)
+    assert (first["completed"], first["failed"], first["throttled"]) == (8, 2, 1)
+    assert {failure["task_id"].split(":", 1)[1] for failure in first["failures"]} == {failing}
+
+    with checkpoint.open("a", encoding="utf-8") as handle:
+        handle.write('{"task_id": "torn')  # simulate a run killed mid-write
+    fake_arm.requests.clear()
+    second = await RemediationExecutor(client, checkpoint_path=checkpoint).run(plan)
+
+    assert (second["resumed"], second["completed"], second["failed"]) == (8, 2, 0)
+    assert {request.path for request in fake_arm.requests} == {failing}
+    completed = [
+        json.loads(line) for line in checkpoint.read_text().splitlines() if line.endswith("}")
+    ]
+    assert sum(record["status"] == "completed" for record in completed) == 10
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_applies_per_subscription(fake_arm, fake_arm_client) -> None:
+    plan = build_plan(_findings(per_subscription=10))
+    executor = RemediationExecutor(
+        ManagementClient(endpoint="http://arm", client=fake_arm_client),
+        rate_per_subscription=200,
+        burst=1,
+    )
+
+    started = time.perf_counter()
+    summary = await executor.run(plan)
+
+    assert summary["completed"] == 40
+    # 20 calls per subscription at 200/s take ~0.1s; the two subscriptions run side by side.
+    assert 0.09 <= time.perf_counter() - started < 0.5
+
+
+def test_load_findings_reads_scanner_reports_and_ndjson(tmp_path) -> None:
+    findings = _findings(subscriptions=("sub-a",), per_subscription=2)
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps({"summary": {}, "findings": findings}), encoding="utf-8")
+    stream = tmp_path / "findings.ndjson"
+    stream.write_text("".join(json.dumps(finding) + "\n" for finding in findings), encoding="utf-8")
+
+    assert load_findings(report) == load_findings(stream) == findings
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_fail_only_their_task(fake_arm, fake_arm_client, tmp_path) -> None:
+    findings = _findings(subscriptions=("sub-a",), per_subscription=2)
+    findings.append({"rule_id": "OPENAI-001", "resource_id": _resource("sub-a", "bad\x00name")})
+    checkpoint = tmp_path / "checkpoint.ndjson"
+    client = ManagementClient(endpoint="http://arm", client=fake_arm_client)
+    executor = RemediationExecutor(client, checkpoint_path=checkpoint)
+
+    summary = await executor.run(build_plan(findings))
+
+    assert (summary["completed"], summary["failed"]) == (4, 1)
+    assert summary["failures"][0]["error"].startswith("InvalidURL")
+    assert len(checkpoint.read_text().splitlines()) == 5
+
+    def expired() -> str:
+        raise RuntimeError("credential expired")
+
+    client = ManagementClient(expired, endpoint="http://arm", client=fake_arm_client)
+    summary = await RemediationExecutor(client).run(build_plan(findings))
+    assert summary["failed"] == 5
+    assert summary["failures"][0] == {
+        "task_id": summary["failures"][0]["task_id"],
+        "status": "failed",
+        "attempts": 1,
+        "error": "RuntimeError: credential expired",
+    }
+
+
+@pytest.mark.asyncio
+async def test_no_backoff_after_the_final_attempt(fake_arm, fake_arm_client) -> None:
+    plan = build_plan(_findings(subscriptions=("sub-a",), per_subscription=1))
+    for task in plan.tasks:
+        fake_arm.fail(task.resource_id, 503, times=2)
+    executor = RemediationExecutor(
+        ManagementClient(endpoint="http://arm", client=fake_arm_client),
+        max_attempts=1,
+        backoff=5.0,
+    )
+
+    started = time.perf_counter()
+    summary = await executor.run(plan)
+
+    assert summary["failed"] == 2 and time.perf_counter() - started < 1.0
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from integrations.threat_intelligence import (
+    BloomFilter,
+    IndicatorCache,
+    LocalIndicatorIndex,
+    ThreatIntelFeed,
+)
+
+
+class FakeFeed:
+    """Bulk lookup that knows one bad user and records every batch it was asked for."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.batches = []
+
+    async def __call__(self, indicators):
+        self.batches.append(list(indicators))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("feed unavailable")
+        return {"user:mallory": {"indicator": "user:mallory", "label": "credential-stuffing"}}
+
+
+def _incident(user: str, ip: str = "198.51.100.1") -> dict:
+    return {"incident_type": "PROMPT_INJECTION", "context": {"user_id": user, "source_ip": ip}}
+
+
+@pytest.mark.asyncio
+async def test_bulk_enrichment_deduplicates_and_caches() -> None:
+    feed = FakeFeed()
+    intel = ThreatIntelFeed(lookup=feed, batch_size=2)
+    incidents = [_incident("mallory"), _incident("alice"), _incident("mallory")] * 100
+
+    enriched = await intel.enrich_many(incidents)
+    again = await intel.enrich(_incident("alice"))
+
+    assert sorted(sum(feed.batches, [])) == ["ip:198.51.100.1", "user:alice", "user:mallory"]
+    assert [len(batch) for batch in feed.batches] == [2, 1]
+    assert enriched[0]["confidence"] == 0.95
+    assert enriched[0]["indicators"][0]["label"] == "credential-stuffing"
+    assert enriched[1] == {"attack_family": "PromptInjection", "confidence": 0.7, "indicators": []}
+    assert again["indicators"] == []
+    assert intel.stats()["negative_cache_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_upstream_call() -> None:
+    feed = FakeFeed()
+    intel = ThreatIntelFeed(lookup=feed)
+    await asyncio.gather(*(intel.enrich(_incident("mallory")) for _ in range(10)))
+    assert len(feed.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_failures_are_not_cached() -> None:
+    feed = FakeFeed(fail=True)
+    intel = ThreatIntelFeed(lookup=feed)
+    assert (await intel.enrich(_incident("mallory")))["indicators"] == []
+    feed.fail = False
+    assert (await intel.enrich(_incident("mallory")))["confidence"] == 0.95
+    assert intel.stats()["upstream_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_lookup_releases_shared_indicators() -> None:
+    started = asyncio.Event()
+
+    async def hanging(indicators):
+        started.set()
+        await asyncio.sleep(3600)
+
+    intel = ThreatIntelFeed(lookup=hanging)
+    first = asyncio.ensure_future(intel.lookup_indicators(["ip:1.2.3.4"]))
+    await started.wait()
+    waiter = asyncio.ensure_future(intel.lookup_indicators(["ip:1.2.3.4"]))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await asyncio.wait_for(waiter, 1) == {"ip:1.2.3.4": None}
+    assert intel._inflight == {}
+    intel.lookup = FakeFeed()
+    assert await asyncio.wait_for(intel.lookup_indicators(["ip:1.2.3.4"]), 1) == {
+        "ip:1.2.3.4": None
+    }
+
+
+def test_cache_expires_negative_entries_sooner() -> None:
+    now = [0.0]
+    cache = IndicatorCache(ttl=100, negative_ttl=10, clock=lambda: now[0])
+    cache.set("ip:a", {"label": "botnet"})
+    cache.set("ip:b", None)
+    now[0] = 50
+    assert cache.get("ip:a") == (True, {"label": "botnet"})
+    assert cache.get("ip:b") == (False, None)
+    now[0] = 5
+    cache.set("ip:b", None)
+    assert cache.get("ip:b") == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_local_index_matches_offline(tmp_path) -> None:
+    known = {f"ip:10.0.{i // 256}.{i % 256}": "scanner" for i in range(5000)}
+    known["user:mallory"] = "credential-stuffing"
+    index = LocalIndicatorIndex(LocalIndicatorIndex.build(tmp_path / "bad.tsv", known))
+    intel = ThreatIntelFeed(index=index)
+
+    assert index.count == 5001
+    assert all(
+        index.lookup(indicator)["label"] == label for indicator, label in list(known.items())[::97]
+    )
+    assert index.lookup("ip:10.0.200.1") is None
+    enriched = await intel.enrich(_incident("mallory", ip="10.0.0.7"))
+    assert {match["label"] for match in enriched["indicators"]} == {
+        "scanner",
+        "credential-stuffing",
+    }
+    index.close()
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"ip:{i}".encode())
+    assert all(f"ip:{i}".encode() in bloom for i in range(1000))
+    false_positives = sum(f"user:{i}".encode() in bloom for i in range(10_000))
+    assert false_positives < 300
@@ -0,0 +1,134 @@
+import asyncio
+import gzip
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from ai_firewall.middleware import log_request
+from ai_firewall.telemetry import (
+    NDJSONFileSink,
+    SentinelSink,
+    TelemetryPipeline,
+    TelemetrySink,
+    make_event,
+)
+
+
+class MemorySink(TelemetrySink):
+    name = "memory"
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.batches: list[list[dict]] = []
+        self.delay = delay
+
+    async def write(self, batch):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.batches.append(list(batch))
+
+
+def test_emit_drops_oldest_when_full() -> None:
+    pipeline = TelemetryPipeline([], capacity=3, overflow="drop_oldest")
+    for index in range(5):
+        assert pipeline.emit({"n": index})
+    assert [event["n"] for event in pipeline._buffer] == [2, 3, 4]
+    assert pipeline.stats()["dropped"] == 2
+
+
+def test_emit_drops_newest_when_full() -> None:
+    pipeline = TelemetryPipeline([], capacity=2, overflow="drop_newest")
+    results = [pipeline.emit({"n": index}) for index in range(3)]
+    assert results == [True, True, False]
+    assert [event["n"] for event in pipeline._buffer] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_background_flush_batches_to_compressed_file(tmp_path: Path) -> None:
+    path = tmp_path / "events.ndjson.gz"
+    pipeline = TelemetryPipeline(
+        [NDJSONFileSink(path, compress=True)], batch_size=2, flush_interval=0.01
+    )
+    pipeline.start()
+    for index in range(5):
+        pipeline.emit(make_event("verdict", n=index))
+    await pipeline.stop()
+
+    lines = gzip.decompress(path.read_bytes()).decode("utf-8").splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [0, 1, 2, 3, 4]
+    stats = pipeline.stats()
+    assert stats["flushed"] == 5
+    assert stats["batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_backpressure_put_waits_for_flush() -> None:
+    sink = MemorySink(delay=0.01)
+    pipeline = TelemetryPipeline(
+        [sink], capacity=2, batch_size=2, flush_interval=0.01, overflow="backpressure"
+    )
+    pipeline.start()
+    for index in range(6):
+        assert await pipeline.put({"n": index}, timeout=1.0)
+    await pipeline.stop()
+
+    assert [event["n"] for batch in sink.batches for event in batch] == list(range(6))
+    assert pipeline.stats()["dropped"] == 0
+
+
+class GatedSink(TelemetrySink):
+    name = "gated"
+
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+        self.gate = asyncio.Event()
+
+    async def write(self, batch):
+        await self.gate.wait()
+        self.events.extend(batch)
+
+
+@pytest.mark.asyncio
+async def test_backpressure_holds_firewall_requests_instead_of_dropping() -> None:
+    sink = GatedSink()
+    pipeline = TelemetryPipeline(
+        [sink], capacity=1, batch_size=1, flush_interval=0.01, overflow="backpressure"
+    )
+    pipeline.start()
+    pipeline.emit({"n": 0})
+    await asyncio.sleep(0.01)  # the flusher is now stuck writing the first batch
+    pipeline.emit({"n": 1})
+    request = Request({"type": "http", "method": "POST", "path": "/v1/chat", "headers": []})
+
+    logged = asyncio.create_task(log_request(request, {"tenant": "t"}, pipeline))
+    await asyncio.sleep(0.02)
+    assert not logged.done()
+    sink.gate.set()
+    await asyncio.wait_for(logged, 1.0)
+    await pipeline.stop()
+
+    assert [event.get("event_type") for event in sink.events] == [None, None, "request"]
+    assert pipeline.stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sentinel_sink_signs_batches() -> None:
+    received: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request)
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        sink = SentinelSink(
+            "workspace", "c2VjcmV0", endpoint="http://collector", compress=True, client=client
+        )
+        await sink.write([make_event("request", path="/v1/chat/completions")])
+
+    request = received[0]
+    assert request.url.path == "/api/logs"
+    assert request.headers["Authorization"].startswith("SharedKey workspace:")
+    assert request.headers["Log-Type"] == "AIFirewall"
+    assert json.loads(gzip.decompress(request.content))[0]["event_type"] == "request"
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from performance.caching import DiskCache, TieredCache, default_key, memoize
+from scanner.client import AzureClient
+from scanner.rules import load_rules_from_files
+
+
+def test_default_key_distinguishes_types() -> None:
+    keys = {
+        default_key((1,), {}),
+        default_key(("1",), {}),
+        default_key((True,), {}),
+        default_key(((1, 2),), {}),
+        default_key(([1, 2],), {}),
+        default_key(({1: "a"},), {}),
+        default_key(({"1": "a"},), {}),
+        default_key((Path("a"),), {}),
+        default_key(("a",), {}),
+    }
+    assert len(keys) == 9
+    assert default_key((), {"a": 1, "b": 2}) == default_key((), {"b": 2, "a": 1})
+    with pytest.raises(TypeError):
+        default_key((object(),), {})
+
+
+def test_l2_hits_are_promoted_to_memory(tmp_path: Path) -> None:
+    TieredCache(disk=DiskCache(tmp_path / "l2.sqlite")).set("k", [1, 2])
+    cache = TieredCache(disk=DiskCache(tmp_path / "l2.sqlite"))
+    assert cache.get_or_compute("k", lambda: pytest.fail("should not compute")) == [1, 2]
+    assert cache.get_or_compute("k", lambda: pytest.fail("should not compute")) == [1, 2]
+    stats = cache.stats()
+    assert (stats["l2_hits"], stats["l1_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_concurrent_threads_compute_once() -> None:
+    calls = []
+    release = threading.Event()
+
+    @memoize()
+    def slow(value: int) -> int:
+        calls.append(value)
+        release.wait(1)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(slow, 21) for _ in range(8)]
+        time.sleep(0.05)
+        release.set()
+        assert {future.result() for future in futures} == {42}
+    assert calls == [21]
+    assert slow.cache_info()["coalesced"] == 7
+
+
+@pytest.mark.asyncio
+async def test_concurrent_coroutines_compute_once_and_share_errors() -> None:
+    calls = []
+
+    @memoize()
+    async def fetch(name: str) -> str:
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        if name == "bad":
+            raise RuntimeError("boom")
+        return name.upper()
+
+    assert await asyncio.gather(*(fetch("a") for _ in range(10))) == ["A"] * 10
+    results = await asyncio.gather(*(fetch("bad") for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert calls == ["a", "bad"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_fail_followers() -> None:
+    cache = TieredCache()
+    started = asyncio.Event()
+
+    async def compute() -> int:
+        started.set()
+        await asyncio.sleep(0.05)
+        return 7
+
+    leader = asyncio.create_task(cache.aget_or_compute("k", compute))
+    await started.wait()
+    follower = asyncio.create_task(cache.aget_or_compute("k", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == 7
+
+
+@pytest.mark.asyncio
+async def test_resource_graph_queries_are_memoized(monkeypatch) -> None:
+    calls = []
+
+    class FakeGraph:
+        async def resources(self, request):
+            calls.append(request)
+            await asyncio.sleep(0.01)
+            return type("Response", (), {"data": [{"name": "demo"}]})()
+
+    monkeypatch.setattr("scanner.client.QueryRequest", lambda **kwargs: kwargs)
+    client = AzureClient("sub", query_cache=TieredCache())
+    client._credential, client._resource_graph = object(), FakeGraph()
+
+    results = await asyncio.gather(*(client.query("resources | take 1") for _ in range(5)))
+    assert [result.total_records for result in results] == [1] * 5
+    assert len(calls) == 1
+
+
+def test_rule_files_recompile_only_when_changed(tmp_path: Path) -> None:
+    rule_file = tmp_path / "rules.yaml"
+    rule_file.write_text("- rule_id: R-1\n  title: One\n", encoding="utf-8")
+    first = load_rules_from_files([rule_file])
+    assert load_rules_from_files([rule_file])[0] is first[0]
+
+    rule_file.write_text("- rule_id: R-2\n  title: Two\n", encoding="utf-8")
+    assert load_rules_from_files([rule_file])[0].rule_id == "R-2"
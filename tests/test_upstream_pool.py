@@ -0,0 +1,141 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ai_firewall.config import UpstreamBackendConfig
+from ai_firewall.upstream import CircuitBreaker, UpstreamError, UpstreamPool
+
+PAYLOAD = {"messages": [{"role": "user", "content": "hello"}]}
+
+
+def _backends(*hosts: str) -> list[UpstreamBackendConfig]:
+    return [
+        UpstreamBackendConfig(
+            endpoint=f"http://{host}", deployment="chat", api_key="key", name=host
+        )
+        for host in hosts
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pool_spreads_load_across_backends(fake_openai, fake_openai_client) -> None:
+    pool = UpstreamPool(_backends("east", "west"), client=fake_openai_client)
+    for _ in range(4):
+        await pool.send(PAYLOAD)
+    assert fake_openai.calls[("east", "chat")] == 2
+    assert fake_openai.calls[("west", "chat")] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_fails_over_on_throttling(fake_openai, fake_openai_client) -> None:
+    fake_openai.fail(("east", "chat"), 429, retry_after=60)
+    pool = UpstreamPool(_backends("east", "west"), client=fake_openai_client)
+
+    result = await pool.send(PAYLOAD)
+
+    assert result["served_by"] == "west/chat"
+    stats = pool.stats()["backends"]
+    assert stats["east"]["throttled"] == 1
+    assert stats["east"]["circuit"] == CircuitBreaker.OPEN
+    # The throttled backend stays ejected until Retry-After elapses.
+    await pool.send(PAYLOAD)
+    assert fake_openai.calls[("east", "chat")] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_does_not_retry_client_errors(fake_openai, fake_openai_client) -> None:
+    fake_openai.fail(("east", "chat"), 400)
+    pool = UpstreamPool(_backends("east", "west"), client=fake_openai_client)
+
+    with pytest.raises(UpstreamError) as excinfo:
+        await pool.send(PAYLOAD)
+
+    assert excinfo.value.status_code == 400
+    assert fake_openai.calls[("west", "chat")] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_reports_unavailable_when_all_backends_fail(
+    fake_openai, fake_openai_client
+) -> None:
+    fake_openai.fail(("east", "chat"), 503, times=5)
+    pool = UpstreamPool(_backends("east"), failure_threshold=1, client=fake_openai_client)
+
+    with pytest.raises(UpstreamError) as excinfo:
+        await pool.send(PAYLOAD)
+    assert excinfo.value.status_code == 503
+
+    with pytest.raises(UpstreamError) as excinfo:
+        await pool.send(PAYLOAD)
+    assert "No healthy upstream" in excinfo.value.detail
+    assert fake_openai.calls[("east", "chat")] == 1
+
+
+@pytest.mark.asyncio
+async def test_remaining_quota_strategy_prefers_headroom(fake_openai, fake_openai_client) -> None:
+    fake_openai.set_remaining_requests(("east", "chat"), 2)
+    fake_openai.set_remaining_requests(("west", "chat"), 500)
+    pool = UpstreamPool(
+        _backends("east", "west"), strategy="remaining_quota", client=fake_openai_client
+    )
+
+    for _ in range(5):
+        await pool.send(PAYLOAD)
+
+    assert fake_openai.calls[("west", "chat")] >= 4
+
+
+def test_circuit_breaker_half_open_probe() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 11.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_or_unparseable_probe_does_not_eject_backend_for_good() -> None:
+    now = [0.0]
+    replies = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        reply = replies.pop(0)
+        if reply is None:
+            await asyncio.sleep(10)
+        return reply
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        pool = UpstreamPool(
+            _backends("east"), reset_timeout=10.0, client=client, clock=lambda: now[0]
+        )
+        breaker = pool.backends[0].breaker
+        breaker.record_failure(open_for=10.0)
+        now[0] = 11.0
+
+        replies.append(None)
+        probe = asyncio.create_task(pool.send(PAYLOAD))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.allow()
+        breaker.release_probe()
+
+        replies.append(httpx.Response(200, text="<html>gateway</html>"))
+        with pytest.raises(UpstreamError) as excinfo:
+            await pool.send(PAYLOAD)
+        assert excinfo.value.status_code == 502
+        assert breaker.state == CircuitBreaker.OPEN and not breaker.probing
+
+        now[0] = 30.0
+        replies.append(httpx.Response(200, json={"choices": []}))
+        assert await pool.send(PAYLOAD) == {"choices": []}
+        assert breaker.state == CircuitBreaker.CLOSED